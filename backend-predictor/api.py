@@ -1,13 +1,46 @@
+import hmac
 import io
 import os
+from typing import Literal
 
 import joblib
 import pandas as pd
-from fastapi import FastAPI, File, UploadFile
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import FastAPI, File, Header, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from rules import RuleSet
+
+# Micro-batching, pool de inferencia, perfilado y serialización son los de src/api: la raíz
+# del repo va en PYTHONPATH (ver README.md y docker-compose.yaml).
+from src.api.batching import MicroBatcher
+from src.api.executor import InferencePool, PoolSaturatedError
+from src.api.profiling import Profiler, ProfilingMiddleware
+from src.api.serialization import CompressionMiddleware, FastJSONResponse, round_proba
 
 MODEL_PATH = os.getenv("MODEL_PATH", "artifacts/model.joblib")
+BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "2"))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "32"))
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "50000"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Decimales de prob_riesgo en las respuestas JSON (vacío = precisión completa) y tamaño
+# mínimo de cuerpo para comprimir con br/gzip (0 = off).
+PROBA_DECIMALS = int(os.environ["PROBA_DECIMALS"]) if os.getenv("PROBA_DECIMALS") else None
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+FLAG_RULES_PATH = os.getenv(
+    "FLAG_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.yaml")
+)
+
+profiler = Profiler(
+    os.getenv("PROFILE_DIR", "logs/profiles"),
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    slow_ms=float(os.getenv("PROFILE_SLOW_MS", "0")),
+    interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "10")),
+)
 
 app = FastAPI(title="API Riesgo Corrupción Obras")
 
@@ -18,6 +51,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+app.router.add_event_handler("startup", profiler.start)
+app.router.add_event_handler("shutdown", profiler.stop)
+
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 
 # Carga perezosa del modelo
 _model = None
@@ -30,19 +73,19 @@ def get_model():
     return _model
 
 
-# ---- ETL/flags: replicar las banderas del notebook ----
-def add_flags(df: pd.DataFrame) -> pd.DataFrame:
-    if "adicionales_pct" in df.columns:
-        df["flag_adicionales_altos"] = (df["adicionales_pct"] > 0.15).astype(int)
-    if "ampliaciones" in df.columns:
-        df["flag_muchas_ampliaciones"] = (df["ampliaciones"] >= 2).astype(int)
-    if "penalidades" in df.columns:
-        df["flag_penalidades"] = (df["penalidades"] >= 1).astype(int)
-    if "tipo_proceso" in df.columns:
-        df["flag_contratacion_directa"] = (df["tipo_proceso"] == "Contratación Directa").astype(int)
-    if "region_riesgo" in df.columns:
-        df["flag_region_alta"] = (df["region_riesgo"] == "ALTA").astype(int)
-    return df
+def _predict_scores(X: pd.DataFrame):
+    return get_model().predict_proba(X)[:, 1]
+
+
+# Parseo e inferencia corren en un pool acotado (503 si se satura), nunca en el event loop
+pool = InferencePool(INFERENCE_WORKERS, INFERENCE_MAX_QUEUE)
+
+# /predict concurrentes se agrupan en una sola llamada a predict_proba
+batcher = MicroBatcher(_predict_scores, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, runner=pool.run)
+
+
+# ---- ETL/flags: banderas del notebook, declaradas en rules.yaml y compiladas al arrancar ----
+rules = RuleSet.from_yaml(FLAG_RULES_PATH)
 
 
 class ObraIn(BaseModel):
@@ -62,51 +105,167 @@ class ObraIn(BaseModel):
 @app.get("/health")
 def health():
     try:
-        m = get_model()
-        return {"status": "ok"}
+        get_model()
+        return {"status": "ok", "inference_pool": pool.stats()}
     except Exception as e:
         return {"status": "error", "detail": str(e)}
 
 
 @app.post("/predict")
-def predict(item: ObraIn):
+async def predict(item: ObraIn):
     df = pd.DataFrame([item.dict()])
-    df = add_flags(df)
-    model = get_model()
-    proba = model.predict_proba(df)[:, 1]
+    bits = rules.apply(df)
+    proba = await batcher.submit(df)
     pred = (proba >= 0.5).astype(int)
-    # Sugerir "flags" activados
-    flags = []
-    if df.get("flag_adicionales_altos") is not None and int(df["flag_adicionales_altos"][0]) == 1:
-        flags.append("Adicionales > 15%")
-    if (
-        df.get("flag_muchas_ampliaciones") is not None
-        and int(df["flag_muchas_ampliaciones"][0]) == 1
-    ):
-        flags.append(">= 2 Ampliaciones")
-    if df.get("flag_penalidades") is not None and int(df["flag_penalidades"][0]) == 1:
-        flags.append("Penalidades registradas")
-    if (
-        df.get("flag_contratacion_directa") is not None
-        and int(df["flag_contratacion_directa"][0]) == 1
-    ):
-        flags.append("Contratación Directa")
-    if df.get("flag_region_alta") is not None and int(df["flag_region_alta"][0]) == 1:
-        flags.append("Región de riesgo ALTA")
-
-    return {"prob_riesgo": float(proba[0]), "pred_riesgo": int(pred[0]), "top_flags": flags}
+    flags = rules.labels_for(bits)[0]
+
+    p = float(proba[0]) if PROBA_DECIMALS is None else round(float(proba[0]), PROBA_DECIMALS)
+    return {
+        "prob_riesgo": p,
+        "pred_riesgo": int(pred[0]),
+        "top_flags": flags,
+        "flags_mask": int(bits[0]),
+    }
+
+
+def _score_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Banderas y columnas de salida se agregan a df en sitio: sin copias intermedias
+    bits = rules.apply(df)
+    proba = get_model().predict_proba(df)[:, 1]
+    df["prob_riesgo"] = proba
+    df["pred_riesgo"] = (proba >= 0.5).astype(int)
+    df["flags_mask"] = bits
+    df["top_flags"] = rules.joined_labels(bits)
+    return df
+
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+
+def _upload_format(file: UploadFile) -> str:
+    """csv / parquet / arrow según Content-Type o extensión del archivo subido."""
+    ct = (file.content_type or "").lower()
+    name = (file.filename or "").lower()
+    if "parquet" in ct or name.endswith((".parquet", ".pq")):
+        return "parquet"
+    if "arrow" in ct or name.endswith((".arrow", ".arrows")):
+        return "arrow"
+    return "csv"
+
+
+def _accept_format(accept: str | None) -> str | None:
+    accept = (accept or "").lower()
+    if "parquet" in accept:
+        return PARQUET
+    if ARROW_STREAM in accept:
+        return ARROW_STREAM
+    return None
+
+
+def _read_upload(content: bytes, fmt: str) -> pd.DataFrame:
+    if fmt == "parquet":
+        return pq.read_table(pa.BufferReader(content)).to_pandas(split_blocks=True)
+    if fmt == "arrow":
+        return pa.ipc.open_stream(pa.BufferReader(content)).read_all().to_pandas(split_blocks=True)
+    return pd.read_csv(io.BytesIO(content))
+
+
+def _write_table(df: pd.DataFrame, mt: str) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if mt == PARQUET:
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _score_upload(content: bytes, fmt: str, out_mt: str | None):
+    out = _score_frame(_read_upload(content, fmt))
+    if out_mt:
+        return Response(_write_table(out, out_mt), media_type=out_mt)
+    # JSON compacto, serializado por columnas (sin pasar cada float por el encoder de FastAPI)
+    out["prob_riesgo"] = round_proba(out["prob_riesgo"].to_numpy(), PROBA_DECIMALS)
+    return FastJSONResponse({"rows": out, "count": len(out)})
 
 
 @app.post("/predict-csv")
-async def predict_csv(file: UploadFile = File(...)):
+async def predict_csv(file: UploadFile = File(...), accept: str | None = Header(default=None)):
+    """
+    Acepta CSV, Parquet o Arrow IPC (según Content-Type/extensión del archivo). Con
+    Accept Arrow/Parquet devuelve la tabla puntuada en ese formato en lugar de JSON.
+    """
     content = await file.read()
-    df = pd.read_csv(io.BytesIO(content))
-    df = add_flags(df.copy())
-    model = get_model()
-    proba = model.predict_proba(df)[:, 1]
-    pred = (proba >= 0.5).astype(int)
-    out = df.copy()
-    out["prob_riesgo"] = proba
-    out["pred_riesgo"] = pred
-    # Devolver JSON compacto
-    return {"rows": out.to_dict(orient="records"), "count": len(out)}
+    return await pool.run(_score_upload, content, _upload_format(file), _accept_format(accept))
+
+
+STREAM_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _next_scored_chunk(reader, formato: str, header: bool):
+    """Parsea, puntúa y serializa el siguiente bloque del CSV (None al terminar)."""
+    chunk = next(reader, None)
+    if chunk is None:
+        return None
+    out = _score_frame(chunk)
+    out["prob_riesgo"] = round_proba(out["prob_riesgo"].to_numpy(), PROBA_DECIMALS)
+    if formato == "ndjson":
+        return out.to_json(
+            orient="records", lines=True, force_ascii=False, double_precision=15
+        ).encode("utf-8")
+    return out.to_csv(index=False, header=header).encode("utf-8")
+
+
+@app.post("/predict-csv/stream")
+async def predict_csv_stream(
+    file: UploadFile = File(...), formato: Literal["csv", "ndjson"] = "csv"
+):
+    """
+    Puntúa el CSV por bloques de CSV_CHUNK_ROWS filas y devuelve las filas a medida que
+    se procesan (CSV o NDJSON). La subida queda en el archivo temporal de starlette, así que
+    la memoria es constante respecto al tamaño del archivo.
+    """
+    reader = pd.read_csv(file.file, chunksize=CSV_CHUNK_ROWS)
+    # El primer bloque pasa por el control de capacidad: si el pool está saturado se
+    # responde 503 antes de abrir el stream.
+    try:
+        first = await pool.run(_next_scored_chunk, reader, formato, True)
+    except Exception:
+        reader.close()
+        raise
+
+    async def body():
+        try:
+            block = first
+            while block is not None:
+                yield block
+                block = await pool.run(_next_scored_chunk, reader, formato, False, admit=False)
+        finally:
+            reader.close()
+
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[formato])
+
+
+def _require_admin(token: str | None) -> None:
+    # Los perfiles traen rutas, query strings y pilas: sin ADMIN_TOKEN, /admin no existe.
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de administración inválido.")
+
+
+@app.get("/admin/profiles")
+def profiles_list(limit: int = 50, x_admin_token: str | None = Header(default=None)):
+    _require_admin(x_admin_token)
+    return {"profiler": profiler.stats(), "profiles": profiler.store.list(limit)}
+
+
+@app.get("/admin/profiles/{name}")
+def profiles_download(name: str, x_admin_token: str | None = Header(default=None)):
+    _require_admin(x_admin_token)
+    path = profiler.store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado.")
+    return FileResponse(path, media_type="application/json", filename=name)
@@ -0,0 +1,118 @@
+"""
+Motor de banderas de riesgo declarativo (reglas en rules.yaml).
+
+Las reglas se compilan una vez al arrancar: cada una queda como (columna, comparación NumPy)
+y se evalúa sobre la columna completa del lote, sin recorrer filas. Por fila se obtiene una
+máscara de bits (bit i = regla i) y, a partir de ella, las etiquetas activadas; las etiquetas
+se arman una vez por combinación distinta de banderas, no una vez por fila.
+"""
+
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import yaml
+
+OPS: Dict[str, Callable[[np.ndarray, Any], Any]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+SET_OPS = ("in", "not_in")
+# flags_mask es int64: bit 63 reservado al signo.
+MAX_RULES = 63
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    column: str
+    op: str
+    value: Any
+    label: str
+
+    def mask(self, values: np.ndarray) -> np.ndarray:
+        """Filas del lote que cumplen la regla (NaN/None nunca la cumplen)."""
+        if self.op in SET_OPS:
+            hit = np.zeros(len(values), dtype=bool)
+            for v in self.value:
+                hit |= np.asarray(values == v, dtype=bool)
+            if self.op == "not_in":
+                hit = ~hit & pd.notna(values)
+            return hit
+        try:
+            hit = OPS[self.op](values, self.value)
+        except TypeError:  # p.ej. texto contra umbral numérico
+            hit = False
+        hit = np.broadcast_to(np.asarray(hit, dtype=bool), values.shape)
+        if self.op == "!=":
+            hit = hit & pd.notna(values)
+        return hit
+
+
+def _parse_rule(spec: Dict[str, Any]) -> Rule:
+    missing = {"name", "column", "op", "value"} - set(spec)
+    if missing:
+        raise ValueError(f"Regla {spec!r}: faltan {sorted(missing)}")
+    op = spec["op"]
+    if op not in OPS and op not in SET_OPS:
+        raise ValueError(f"Regla {spec['name']}: operador desconocido {op!r}")
+    value = spec["value"]
+    if op in SET_OPS:
+        if not isinstance(value, list):
+            raise ValueError(f"Regla {spec['name']}: '{op}' requiere una lista")
+        value = tuple(value)
+    return Rule(spec["name"], spec["column"], op, value, spec.get("label") or spec["name"])
+
+
+class RuleSet:
+    """Reglas compiladas; apply() evalúa todas sobre un DataFrame de una pasada."""
+
+    def __init__(self, rules: List[Rule]):
+        if len(rules) > MAX_RULES:
+            raise ValueError(f"Máximo {MAX_RULES} reglas (flags_mask es int64)")
+        names = [r.name for r in rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Nombres de regla repetidos")
+        self.rules = rules
+        self.labels = np.array([r.label for r in rules], dtype=object)
+
+    @classmethod
+    def from_yaml(cls, path) -> "RuleSet":
+        with open(path, "r", encoding="utf-8") as f:
+            doc = yaml.safe_load(f) or {}
+        return cls([_parse_rule(spec) for spec in doc.get("rules") or []])
+
+    def apply(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Agrega a `df` (en sitio) una columna 0/1 por regla cuya columna de entrada existe
+        (las usa el modelo) y devuelve la máscara de bits por fila.
+        """
+        bits = np.zeros(len(df), dtype=np.int64)
+        for i, rule in enumerate(self.rules):
+            if rule.column not in df.columns:
+                continue
+            hit = rule.mask(df[rule.column].to_numpy())
+            df[rule.name] = hit.astype(int)
+            bits |= hit.astype(np.int64) << i
+        return bits
+
+    def labels_for(self, bits: np.ndarray) -> List[List[str]]:
+        """Etiquetas activadas por fila, en el orden de las reglas."""
+        combos, inverse = np.unique(bits, return_inverse=True)
+        table = [self._decode(int(c)) for c in combos]
+        return [table[i] for i in inverse.ravel()]
+
+    def joined_labels(self, bits: np.ndarray, sep: str = "; ") -> np.ndarray:
+        """Etiquetas por fila unidas en un texto (columna de salida para CSV/Parquet)."""
+        combos, inverse = np.unique(bits, return_inverse=True)
+        table = np.array([sep.join(self._decode(int(c))) for c in combos], dtype=object)
+        return table[inverse.ravel()]
+
+    def _decode(self, bits: int) -> List[str]:
+        return [label for i, label in enumerate(self.labels) if bits >> i & 1]
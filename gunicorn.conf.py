@@ -0,0 +1,55 @@
+"""
+Configuración de gunicorn para producción (Dockerfile.prod).
+
+Modo preload (MODEL_PRELOAD=1, por defecto): el master importa la app y carga el modelo
+antes de hacer fork, así los N workers comparten una sola copia física del pipeline
+(copy-on-write). El master solo deserializa: el calentamiento corre en cada worker después del
+fork (lifespan), porque predecir en el master arranca los pools de hilos de OpenMP/BLAS y un
+pool de libgomp heredado por fork puede colgar al worker. Con MODEL_MMAP=1 los atributos ndarray simples quedan además respaldados por
+el archivo .pkl mapeado en solo lectura.
+
+Workers, hilos por worker, keep-alive y backlog salen del perfil de src/api/serving.py
+(CPUs disponibles del contenedor); los límites de hilos BLAS/OpenMP se fijan aquí, antes de
+que el preload importe numpy.
+"""
+
+import gc
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.api.serving import apply_thread_limits, serving_profile  # noqa: E402
+
+profile = serving_profile()
+apply_thread_limits(profile)
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "src.api.worker.TunedUvicornWorker"
+workers = profile.workers
+keepalive = profile.keepalive
+backlog = profile.backlog
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+preload_app = os.getenv("MODEL_PRELOAD", "1") == "1"
+
+
+def on_starting(server):
+    server.log.info(f"Perfil de serving: {profile}")
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from src.api import deps
+
+    try:
+        deps.registry.load()
+        server.log.info(f"Modelo precargado en el master: {deps.registry.stats()}")
+    except Exception as e:
+        server.log.error(f"No se pudo precargar el modelo: {e}")
+
+    # Congela los objetos existentes para que el GC de los workers no toque sus
+    # cabeceras (y no rompa el copy-on-write de las páginas compartidas).
+    gc.collect()
+    gc.freeze()
@@ -1,13 +1,14 @@
 """
 03_export_to_onnx.py
 --------------------
-Script del Sprint 4 para exportar un modelo sklearn a formato ONNX.
+Script del Sprint 4 para exportar un pipeline sklearn a formato ONNX.
 
 Flujo:
-1. Cargar dataset de referencia para determinar el tamaño de entrada.
-2. Cargar el modelo sklearn serializado (.pkl).
-3. Aplicar preprocesamiento simple (placeholder) para tener matrix final.
-4. Exportar a ONNX con onnxmltools.
+1. Cargar dataset de referencia (columnas crudas, como las recibe la API).
+2. Cargar el pipeline sklearn serializado (.pkl).
+3. Exportar el pipeline COMPLETO (ColumnTransformer, imputers, scaler, one-hot y
+   estimador) con una entrada tipada por columna (src/models/onnx_backend.py).
+4. Verificar paridad ONNX vs sklearn sobre el dataset de referencia.
 5. Guardar:
     - modelo_onnx.onnx
     - log en models/sprint4/logs/
@@ -15,7 +16,7 @@ Flujo:
 Uso típico:
 
 python scripts/Sprint4/03_export_to_onnx.py ^
-    --model-path models/sprint4/modelos/modelo_actual.pkl ^
+    --model-path models/pipeline.pkl ^
     --data data/processed/dataset_modelado.csv ^
     --target-column riesgo_corrupcion
 """
@@ -23,20 +24,21 @@ python scripts/Sprint4/03_export_to_onnx.py ^
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
 import numpy as np
 
-import onnxmltools
-from skl2onnx.common.data_types import FloatTensorType
-
 from utils_sprint4 import (
     load_dataset,
     load_sklearn_model,
-    preprocess_features,
     setup_logger,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.models.onnx_backend import to_onnx  # noqa: E402
+
 
 def main(args: argparse.Namespace) -> None:
     # --------------------------------------------------------
@@ -58,35 +60,31 @@ def main(args: argparse.Namespace) -> None:
     X = df.drop(columns=[args.target_column])
     logger.info(f"Dataset shape: {df.shape}")
 
-    # Preprocesar (puedes reemplazar por pipeline real)
-    logger.info("Aplicando preprocesamiento…")
-    X_proc = preprocess_features(X)
-
-    # Número de features finales
-    n_features = X_proc.shape[1]
-    logger.info(f"Número final de features: {n_features}")
-
     # --------------------------------------------------------
-    # 3. Cargar modelo sklearn
+    # 3. Cargar pipeline sklearn
     # --------------------------------------------------------
     logger.info(f"Cargando modelo desde: {args.model_path}")
     model = load_sklearn_model(args.model_path)
 
     # --------------------------------------------------------
-    # 4. Crear entrada para ONNX
+    # 4. Exportar pipeline completo + paridad
     # --------------------------------------------------------
-    logger.info("Generando representación ONNX…")
-    initial_type = [("input", FloatTensorType([None, n_features]))]
-
+    logger.info("Generando representación ONNX del pipeline completo…")
     try:
-        onnx_model = onnxmltools.convert_sklearn(
-            model,
-            initial_types=initial_type,
-            name="modelo_sprint4",
-        )
+        onnx_model = to_onnx(model)
     except Exception as e:
         logger.error(f"Error convirtiendo a ONNX: {e}")
         raise
+    logger.info(
+        f"Entradas: {len(onnx_model.num_cols)} numéricas, "
+        f"{len(onnx_model.cat_cols)} categóricas"
+    )
+
+    X = X.reindex(columns=list(onnx_model.feature_names_in_))
+    diff = np.abs(model.predict_proba(X)[:, 1] - onnx_model.predict_proba(X)[:, 1]).max()
+    logger.info(f"Paridad ONNX vs sklearn: max |diff| = {diff:.3e}")
+    if diff > args.tol:
+        raise ValueError(f"Diferencia ONNX vs sklearn sobre la tolerancia ({args.tol}).")
 
     # --------------------------------------------------------
     # 5. Guardar el archivo ONNX
@@ -95,7 +93,7 @@ def main(args: argparse.Namespace) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     logger.info(f"Guardando modelo ONNX en: {out_path}")
-    onnxmltools.utils.save_model(onnx_model, out_path.as_posix())
+    out_path.write_bytes(onnx_model.model_bytes)
 
     logger.info("=== Exportación a ONNX completada exitosamente ===")
 
@@ -107,12 +105,12 @@ if __name__ == "__main__":
     parser.add_argument(
         "--model-path",
         required=True,
-        help="Ruta al modelo sklearn .pkl (modelo_actual.pkl o baseline.pkl).",
+        help="Ruta al pipeline sklearn .pkl (p.ej. models/pipeline.pkl).",
     )
     parser.add_argument(
         "--data",
         required=True,
-        help="Dataset de referencia para determinar el tamaño de entrada.",
+        help="Dataset de referencia para verificar la paridad.",
     )
     parser.add_argument(
         "--target-column",
@@ -124,6 +122,12 @@ if __name__ == "__main__":
         default="models/sprint4/modelos/modelo_onnx.onnx",
         help="Ruta donde se guardará el modelo ONNX resultante.",
     )
+    parser.add_argument(
+        "--tol",
+        type=float,
+        default=1e-5,
+        help="Diferencia máxima de probabilidad aceptada frente a sklearn.",
+    )
     parser.add_argument(
         "--log-path",
         default="models/sprint4/logs/export_onnx.log",
@@ -4,10 +4,10 @@
 Script del Sprint 4 para medir LATENCIA usando ONNX Runtime.
 
 Flujo:
-1. Cargar dataset de evaluación.
-2. Preprocesar features (utils_sprint4.preprocess_features).
-3. Cargar modelo ONNX (onnxruntime).
-4. Ejecutar inferencia repetida N veces.
+1. Cargar dataset de evaluación (columnas crudas, como las recibe la API).
+2. Cargar el modelo ONNX del pipeline completo (03_export_to_onnx.py), con una
+   entrada por columna; la sesión es la misma que usa MODEL_BACKEND=onnx en la API.
+3. Ejecutar inferencia repetida N veces (incluye el armado de entradas por columna).
 5. Obtener estadísticas de latencia:
    - p50, p90, p95, p99, mean, std
 6. Guardar métricas + logs.
@@ -20,20 +20,21 @@ tiene una latencia significativamente más baja que en CPU puro.
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
-import numpy as np
-import onnxruntime as ort
-
 from utils_sprint4 import (
     load_dataset,
-    preprocess_features,
     time_function,
     latency_stats,
     save_metrics_csv,
     setup_logger,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.models.onnx_backend import OnnxPipeline  # noqa: E402
+
 
 def main(args: argparse.Namespace) -> None:
     # -------------------------------------------------------------
@@ -56,36 +57,27 @@ def main(args: argparse.Namespace) -> None:
     logger.info(f"Dataset shape: {df.shape}")
 
     # -------------------------------------------------------------
-    # 3. Preprocesamiento
-    # -------------------------------------------------------------
-    logger.info("Preprocesando features…")
-    X_proc = preprocess_features(X)
-    X_np = X_proc.to_numpy(dtype=np.float32)
-    logger.info(f"Shape final features: {X_np.shape}")
-
-    # -------------------------------------------------------------
-    # 4. Cargar modelo ONNX
+    # 3. Cargar modelo ONNX (pipeline completo)
     # -------------------------------------------------------------
     onnx_path = Path(args.model_path)
     logger.info(f"Cargando modelo ONNX desde: {onnx_path}")
-
-    session = ort.InferenceSession(
-        onnx_path.as_posix(),
-        providers=["CPUExecutionProvider"]
+    model = OnnxPipeline.from_bytes(
+        onnx_path.read_bytes(), intra_op_threads=args.intra_op_threads
     )
-
-    input_name = session.get_inputs()[0].name
-    logger.info(f"ONNX Input name: {input_name}")
+    logger.info(
+        f"Entradas: {len(model.num_cols)} numéricas, {len(model.cat_cols)} categóricas"
+    )
+    X = X.reindex(columns=list(model.feature_names_in_))
 
     # -------------------------------------------------------------
-    # 5. Función de inferencia
+    # 4. Función de inferencia
     # -------------------------------------------------------------
     def infer():
-        """Función simple para benchmark de ONNX."""
-        _ = session.run(None, {input_name: X_np})
+        """Misma llamada que hace la API: entradas por columna + session.run."""
+        _ = model.predict_proba(X)
 
     # -------------------------------------------------------------
-    # 6. Ejecutar iteraciones
+    # 5. Ejecutar iteraciones
     # -------------------------------------------------------------
     logger.info(f"Ejecutando {args.n_runs} iteraciones ONNX…")
 
@@ -97,7 +89,7 @@ def main(args: argparse.Namespace) -> None:
     logger.info(f"Tiempo total ejecutado: {total_time:.4f} s")
 
     # -------------------------------------------------------------
-    # 7. Estadísticas
+    # 6. Estadísticas
     # -------------------------------------------------------------
     stats = latency_stats(lat_list)
     stats["total_time_s"] = float(total_time)
@@ -106,7 +98,7 @@ def main(args: argparse.Namespace) -> None:
     logger.info(f"Estadísticas ONNX: {stats}")
 
     # -------------------------------------------------------------
-    # 8. Guardado de métricas
+    # 7. Guardado de métricas
     # -------------------------------------------------------------
     out_csv = Path(args.out_csv)
     save_metrics_csv(stats, out_csv)
@@ -135,7 +127,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "--model-path",
         required=True,
-        help="Ruta al archivo .onnx (convertido previamente).",
+        help="Ruta al .onnx del pipeline completo (03_export_to_onnx.py).",
     )
     parser.add_argument(
         "--n-runs",
@@ -143,6 +135,12 @@ if __name__ == "__main__":
         default=50,
         help="Número de iteraciones para medir latencia.",
     )
+    parser.add_argument(
+        "--intra-op-threads",
+        type=int,
+        default=1,
+        help="Hilos intra-op de ONNX Runtime.",
+    )
     parser.add_argument(
         "--out-csv",
         default="models/sprint4/resultados/latencia_onnx.csv",
@@ -0,0 +1,114 @@
+"""
+bench_predict_proba.py
+----------------------
+Benchmark del camino de /predict_proba: alineación fila a fila (implementación
+original) vs. ingesta columnar vectorizada (/predict_proba/columnar).
+
+Para cada tamaño de lote mide, con el pipeline real:
+- rowwise:  dict por fila -> DataFrame -> predict_proba -> un PredictResponse por fila
+- filas:    align_rows (una pasada) -> predict_proba -> arreglos paralelos
+- columnar: align_columns (una pasada) -> predict_proba -> arreglos paralelos
+- model:    solo pipeline.predict_proba sobre la matriz ya alineada (referencia)
+
+Uso:
+
+python scripts/bench_predict_proba.py --sizes 1000 5000 20000 --n-runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.api.inference import align_columns, align_rows, predict_scores  # noqa: E402
+from src.api.schemas import PredictBatchResponse, PredictResponse  # noqa: E402
+
+
+def rowwise(pipeline, cols, threshold, filas):
+    aligned = []
+    for row in filas:
+        aligned.append({c: row.get(c, None) for c in cols})
+    X = pd.DataFrame(aligned)[cols]
+    probas = pipeline.predict_proba(X)[:, 1]
+    resultados = []
+    for p in probas:
+        resultados.append(
+            PredictResponse(proba=float(p), threshold=threshold, riesgoso=bool(p >= threshold))
+        )
+    return PredictBatchResponse(resultados=resultados)
+
+
+def vectorized(pipeline, cols, threshold, X):
+    probas = predict_scores(pipeline, X)
+    return {"proba": probas.tolist(), "riesgoso": (probas >= threshold).tolist()}
+
+
+def bench(fn, n_runs: int) -> float:
+    times = []
+    for _ in range(n_runs):
+        t0 = perf_counter()
+        fn()
+        times.append(perf_counter() - t0)
+    return float(np.median(times)) * 1000.0
+
+
+def main(args: argparse.Namespace) -> None:
+    pipeline = joblib.load(args.model_path)
+    meta = json.loads(Path(args.meta_path).read_text(encoding="utf-8"))
+    cols = meta.get("columns") or list(pipeline.feature_names_in_)
+    threshold = float(meta.get("best_threshold_f1", 0.5))
+
+    base = pd.read_parquet(args.data)
+    base = base[[c for c in base.columns if c in cols]]
+
+    rows = []
+    for n in args.sizes:
+        df = base.sample(n, replace=len(base) < n, random_state=42).reset_index(drop=True)
+        df = df.astype(object).where(df.notna(), None)
+        filas = df.to_dict(orient="records")
+        columns = df.to_dict(orient="list")
+
+        res = {"n_filas": n}
+        res["rowwise_ms"] = bench(lambda: rowwise(pipeline, cols, threshold, filas), args.n_runs)
+        res["filas_ms"] = bench(
+            lambda: vectorized(pipeline, cols, threshold, align_rows(filas, cols)), args.n_runs
+        )
+        res["columnar_ms"] = bench(
+            lambda: vectorized(pipeline, cols, threshold, align_columns(columns, cols)),
+            args.n_runs,
+        )
+        X = align_columns(columns, cols)
+        res["model_ms"] = bench(lambda: predict_scores(pipeline, X), args.n_runs)
+        res["speedup_columnar"] = res["rowwise_ms"] / res["columnar_ms"]
+        rows.append(res)
+        print(res)
+
+    out = pd.DataFrame(rows)
+    print(out.to_string(index=False, float_format="%.2f"))
+    if args.out_csv:
+        Path(args.out_csv).parent.mkdir(parents=True, exist_ok=True)
+        out.to_csv(args.out_csv, index=False)
+        print(f"Resultados guardados en: {args.out_csv}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara el camino fila a fila vs. columnar de /predict_proba."
+    )
+    parser.add_argument("--data", default="data/processed/dataset_integrado.parquet")
+    parser.add_argument("--model-path", default="models/pipeline.pkl")
+    parser.add_argument("--meta-path", default="models/pipeline_meta.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--n-runs", type=int, default=5)
+    parser.add_argument("--out-csv", default=None)
+
+    main(parser.parse_args())
@@ -0,0 +1,128 @@
+"""
+bench_schemas.py
+----------------
+Benchmark de validación de requests y construcción de respuestas de /predict_proba,
+sin el modelo (solo el costo que agrega la capa HTTP/pydantic).
+
+Para cada tamaño de lote mide:
+- parse_generico: BatchPredictRequest (filas: List[Dict[str, Any]]) sobre el cuerpo JSON
+- parse_tipado:   esquema tipado por columna generado desde pipeline_meta (typed_adapters)
+- resp_modelos:   un PredictResponse por fila + PredictBatchResponse serializado
+- resp_objetos:   lista de dicts 'resultados' (respuesta por defecto)
+- resp_arreglos:  arreglos paralelos proba/riesgoso (formato=arreglos y /columnar)
+
+Uso:
+
+python scripts/bench_schemas.py --sizes 1 100 10000 100000 --n-runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.api.schemas import (  # noqa: E402
+    BatchPredictRequest,
+    PredictBatchResponse,
+    PredictResponse,
+    column_dtypes,
+    typed_adapters,
+)
+
+
+def bench(fn, n_runs: int) -> float:
+    times = []
+    for _ in range(n_runs):
+        t0 = perf_counter()
+        fn()
+        times.append(perf_counter() - t0)
+    return float(np.median(times)) * 1000.0
+
+
+def resp_modelos(probas, threshold):
+    resultados = [
+        PredictResponse(proba=p, threshold=threshold, riesgoso=p >= threshold) for p in probas.tolist()
+    ]
+    return PredictBatchResponse(resultados=resultados).model_dump_json()
+
+
+def resp_objetos(probas, threshold):
+    return JSONResponse(
+        {
+            "resultados": [
+                {"proba": p, "threshold": threshold, "riesgoso": p >= threshold}
+                for p in probas.tolist()
+            ]
+        }
+    ).body
+
+
+def resp_arreglos(probas, threshold):
+    return JSONResponse(
+        {"threshold": threshold, "proba": probas.tolist(), "riesgoso": (probas >= threshold).tolist()}
+    ).body
+
+
+def main(args: argparse.Namespace) -> None:
+    meta = json.loads(Path(args.meta_path).read_text(encoding="utf-8"))
+    dtypes = meta.get("dtypes")
+    if not dtypes:
+        pipeline = joblib.load(args.model_path)
+        dtypes = column_dtypes(pipeline)
+        cols = meta.get("columns") or [str(c) for c in pipeline.feature_names_in_]
+    else:
+        cols = meta["columns"]
+    generico = TypeAdapter(BatchPredictRequest)
+    tipado, _ = typed_adapters(tuple(cols), tuple(dtypes.get(c, "") for c in cols))
+
+    base = pd.read_parquet(args.data)
+    base = base[[c for c in cols if c in base.columns]]
+    threshold = 0.5
+
+    rows = []
+    for n in args.sizes:
+        df = base.sample(n, replace=len(base) < n, random_state=42).reset_index(drop=True)
+        body = df.to_json(orient="records")
+        body = ('{"filas": ' + body + "}").encode("utf-8")
+        probas = np.random.default_rng(0).random(n)
+
+        res = {"n_filas": n, "body_mb": len(body) / 1e6}
+        res["parse_generico_ms"] = bench(lambda: generico.validate_json(body), args.n_runs)
+        res["parse_tipado_ms"] = bench(lambda: tipado.validate_json(body), args.n_runs)
+        res["resp_modelos_ms"] = bench(lambda: resp_modelos(probas, threshold), args.n_runs)
+        res["resp_objetos_ms"] = bench(lambda: resp_objetos(probas, threshold), args.n_runs)
+        res["resp_arreglos_ms"] = bench(lambda: resp_arreglos(probas, threshold), args.n_runs)
+        rows.append(res)
+        print(res)
+
+    out = pd.DataFrame(rows)
+    print(out.to_string(index=False, float_format="%.3f"))
+    if args.out_csv:
+        Path(args.out_csv).parent.mkdir(parents=True, exist_ok=True)
+        out.to_csv(args.out_csv, index=False)
+        print(f"Resultados guardados en: {args.out_csv}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara validación genérica vs. tipada y respuestas por fila vs. arreglos."
+    )
+    parser.add_argument("--data", default="data/processed/dataset_modelado.parquet")
+    parser.add_argument("--model-path", default="models/pipeline.pkl")
+    parser.add_argument("--meta-path", default="models/pipeline_meta.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000, 100000])
+    parser.add_argument("--n-runs", type=int, default=5)
+    parser.add_argument("--out-csv", default=None)
+
+    main(parser.parse_args())
@@ -0,0 +1,218 @@
+"""
+bench_serving.py
+----------------
+Matriz de benchmark del perfil de serving (gunicorn.conf.py + src/api/serving.py).
+
+Para cada combinación de workers x stack (asyncio+h11 / uvloop+httptools) x keep-alive del
+cliente levanta gunicorn con la configuración de producción, espera /readyz y envía
+POST /predict_proba (o GET /livez con --endpoint livez) durante --duration segundos con
+--concurrency usuarios concurrentes
+(cliente asyncio mínimo; sin keep-alive cada request abre su propia conexión y manda
+"Connection: close"). Reporta req/s, p50/p95/p99 y errores.
+
+El generador de carga corre en la misma máquina y le quita CPU al servidor: los números
+absolutos quedan por debajo de los de producción, la comparación entre filas sigue valiendo.
+
+Uso:
+
+python scripts/bench_serving.py --workers 1 2 4 --stacks asyncio-h11 uvloop-httptools ^
+    --concurrency 64 --rows 1 --duration 15 --out reports/bench_serving.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+
+STACKS = {
+    "asyncio-h11": {"SERVING_LOOP": "asyncio", "SERVING_HTTP": "h11"},
+    "uvloop-httptools": {"SERVING_LOOP": "uvloop", "SERVING_HTTP": "httptools"},
+}
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Matriz de benchmark del perfil de serving")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    ap.add_argument("--stacks", nargs="+", default=list(STACKS), choices=list(STACKS))
+    ap.add_argument("--keepalive", nargs="+", default=["on", "off"], choices=["on", "off"])
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--rows", type=int, default=1, help="Filas por request")
+    ap.add_argument(
+        "--endpoint",
+        default="predict",
+        choices=["predict", "livez"],
+        help="livez aísla el costo del stack HTTP (sin modelo)",
+    )
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--out", default=None, help="Tabla markdown de resultados")
+    return ap.parse_args()
+
+
+def payload(url: str, rows: int) -> bytes:
+    """Filas sintéticas con las columnas que reporta /model_meta."""
+    meta = httpx.get(f"{url}/model_meta", timeout=10.0).json()
+    dtypes = meta.get("dtypes") or {}
+    rng = np.random.default_rng(0)
+    filas = [
+        {c: (None if dtypes.get(c) == "string" else float(rng.normal())) for c in meta["columns"]}
+        for _ in range(rows)
+    ]
+    return json.dumps({"filas": filas}).encode("utf-8")
+
+
+def start_server(workers: int, stack: str, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        **STACKS[stack],
+        "WEB_CONCURRENCY": str(workers),
+        "BIND": f"127.0.0.1:{port}",
+        "MODEL_WATCH_INTERVAL": "0",
+        "PREDICT_CACHE_SIZE": "0",  # mide el modelo, no la cache
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "src.api.main:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/readyz", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} no quedó listo en {timeout:.0f}s")
+
+
+def raw_request(port: int, body, keepalive: bool) -> bytes:
+    """Request HTTP/1.1 ya serializada (el cliente no re-arma cabeceras en cada envío)."""
+    conn = "keep-alive" if keepalive else "close"
+    common = f"HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nConnection: {conn}\r\n"
+    if body is None:
+        return f"GET /livez {common}\r\n".encode()
+    head = (
+        f"POST /predict_proba {common}"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def load(port: int, body, concurrency: int, duration: float, keepalive: bool):
+    """
+    Generador de carga mínimo sobre asyncio streams: un cliente HTTP completo (httpx, locust)
+    gasta más CPU por request que el servidor en /livez y terminaría midiendo al cliente.
+    """
+    request = raw_request(port, body, keepalive)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        nonlocal errors
+        conn = None
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = await asyncio.open_connection("127.0.0.1", port)
+                reader, writer = conn
+                writer.write(request)
+                ok = await read_response(reader) == 200
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                ok, conn = False, None
+            if ok:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                errors += 1
+            if not keepalive and conn is not None:
+                conn[1].close()
+                conn = None
+        if conn is not None:
+            conn[1].close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else float("nan"),
+        "p95_ms": float(np.percentile(ms, 95)) if len(ms) else float("nan"),
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else float("nan"),
+    }
+
+
+def main():
+    args = parse_args()
+    url = f"http://127.0.0.1:{args.port}"
+    body, results = None, []
+    for workers, stack in itertools.product(args.workers, args.stacks):
+        server = start_server(workers, stack, args.port)
+        try:
+            wait_ready(url)
+            if args.endpoint == "predict":
+                body = body or payload(url, args.rows)
+            for ka in args.keepalive:
+                res = asyncio.run(
+                    load(args.port, body, args.concurrency, args.duration, keepalive=ka == "on")
+                )
+                res.update(workers=workers, stack=stack, keepalive=ka)
+                results.append(res)
+                print(json.dumps(res))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    lines = [
+        f"CPUs: {os.cpu_count()} | endpoint: {args.endpoint} | concurrencia: "
+        f"{args.concurrency} | filas/request: {args.rows} | duración: {args.duration:.0f}s",
+        "",
+        "| workers | stack | keep-alive | req/s | p50 ms | p95 ms | p99 ms | errores |",
+        "|---:|---|---|---:|---:|---:|---:|---:|",
+    ]
+    for r in results:
+        lines.append(
+            f"| {r['workers']} | {r['stack']} | {r['keepalive']} | {r['rps']:.0f} | "
+            f"{r['p50_ms']:.1f} | {r['p95_ms']:.1f} | {r['p99_ms']:.1f} | {r['errors']} |"
+        )
+    table = "\n".join(lines)
+    print(table)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(table + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
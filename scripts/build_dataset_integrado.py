@@ -7,8 +7,13 @@ Versión: Semana 6 → Dataset Integrado para Semana 7
 
 import pandas as pd
 import numpy as np
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.ingesta import cargar_carpeta, leer_excel  # noqa: E402
+
 BASE = Path("data/external")
 OUT = Path("data/processed")
 OUT.mkdir(parents=True, exist_ok=True)
@@ -21,24 +26,21 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 # ----------------------------------------------------------------------
 
 def load_csv_folder(folder: Path):
-    """Lee todos los CSVs de una carpeta y los concatena."""
-    frames = []
-    for f in folder.glob("*.csv"):
-        try:
-            df = pd.read_csv(f, encoding="latin-1")
-            df["__source"] = f.name
-            frames.append(df)
-            print(f"✅ Cargado {f.name:35s} → {df.shape}")
-        except Exception as e:
-            print(f"⚠️ Error en {f.name}: {e}")
-    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    """Lee todos los CSVs de una carpeta (en paralelo, ver src/data/ingesta.py) y los concatena."""
+    df, lecturas = cargar_carpeta(folder, columna_origen="__source")
+    for s in lecturas:
+        if s.error:
+            print(f"⚠️ Error en {s.path.name}: {s.error}")
+        else:
+            print(f"✅ Cargado {s.path.name:35s} → {(s.filas, s.columnas)} ({s.mb_s:.1f} MB/s)")
+    return df
 
 def load_excel(path: Path):
     """Carga Excel de perfilamiento de riesgo."""
     if not path.exists():
         return pd.DataFrame()
     try:
-        df = pd.read_excel(path)
+        df = leer_excel(path)  # cache Parquet en data/interim/excel_cache
         df.columns = [c.strip().upper().replace(" ", "_") for c in df.columns]
         print(f"✅ Cargado perfilamiento: {path.name:35s} ({df.shape})")
         return df
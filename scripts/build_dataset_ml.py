@@ -6,8 +6,13 @@ Autor: Webconceptos / Fernando García
 
 import pandas as pd
 import numpy as np
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.ingesta import cargar_carpeta, leer_excel  # noqa: E402
+
 BASE = Path("data/external")
 OUT = Path("data/processed")
 OUT.mkdir(parents=True, exist_ok=True)
@@ -23,25 +28,24 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 # =======================
 
 def load_all_csv(folder: Path):
-    """Lee y concatena todos los CSV de una carpeta."""
-    files = list(folder.glob("*.csv"))
-    frames = []
-    for f in files:
-        try:
-            df = pd.read_csv(f, encoding="latin-1")
-            df["__source"] = f.name
-            frames.append(df)
-            print(f"✅ Cargado {f.name:40s} → {df.shape[0]} filas, {df.shape[1]} cols")
-        except Exception as e:
-            print(f"⚠️ Error en {f.name}: {e}")
-    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    """Lee en paralelo (src/data/ingesta.py) y concatena todos los CSV de una carpeta."""
+    df, lecturas = cargar_carpeta(folder, columna_origen="__source")
+    for s in lecturas:
+        if s.error:
+            print(f"⚠️ Error en {s.path.name}: {s.error}")
+        else:
+            print(
+                f"✅ Cargado {s.path.name:40s} → {s.filas} filas, {s.columnas} cols "
+                f"({s.mb_s:.1f} MB/s)"
+            )
+    return df
 
 def load_riesgo_excel(path: Path):
     """Carga hoja de perfilamiento de riesgo (si existe)."""
     if not path.exists():
         return pd.DataFrame()
     try:
-        df = pd.read_excel(path)
+        df = leer_excel(path)  # cache Parquet en data/interim/excel_cache
         df.columns = [c.strip().upper().replace(" ", "_") for c in df.columns]
         print(f"✅ Perfilamiento de riesgo: {path.name:40s} ({len(df)} filas)")
         return df
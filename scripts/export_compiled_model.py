@@ -0,0 +1,83 @@
+"""
+export_compiled_model.py
+------------------------
+Exporta models/pipeline.pkl como evaluador compilado en NumPy (src/models/compiled.py)
+y verifica paridad contra el pipeline original.
+
+El artefacto resultante se sirve con:
+
+MODEL_BACKEND=compiled MODEL_PATH=models/pipeline_compiled.pkl uvicorn src.api.main:app
+
+Con MODEL_MMAP=1 sus arreglos planos (nodos de los árboles, imputación, escalado) se mapean
+desde el archivo en lugar de copiarse en cada worker.
+
+Uso:
+
+python scripts/export_compiled_model.py --data data/processed/dataset_modelado.parquet --n-rows 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.models.compiled import compile_pipeline  # noqa: E402
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Exporta el pipeline como evaluador compilado")
+    ap.add_argument("--model-path", default="models/pipeline.pkl")
+    ap.add_argument("--meta-path", default="models/pipeline_meta.json")
+    ap.add_argument("--out", default="models/pipeline_compiled.pkl")
+    ap.add_argument("--data", default=None, help="CSV/Parquet para el chequeo de paridad")
+    ap.add_argument("--n-rows", type=int, default=20000)
+    ap.add_argument("--tol", type=float, default=1e-6)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    pipeline = joblib.load(args.model_path)
+    compiled = compile_pipeline(pipeline)
+    print(json.dumps(compiled.describe(), indent=2))
+
+    if args.data:
+        with open(args.meta_path, "r", encoding="utf-8") as f:
+            cols = json.load(f).get("columns") or list(compiled.feature_names_in_)
+        if args.data.endswith(".parquet"):
+            df = pd.read_parquet(args.data).head(args.n_rows)
+        else:
+            df = pd.read_csv(args.data, nrows=args.n_rows, low_memory=False)
+        X = df.reindex(columns=cols)
+
+        t0 = perf_counter()
+        ref = pipeline.predict_proba(X)[:, 1]
+        t1 = perf_counter()
+        got = compiled.predict_proba(X)[:, 1]
+        t2 = perf_counter()
+
+        diff = float(np.abs(ref - got).max()) if len(X) else 0.0
+        print(f"Filas: {len(X)} | max |diff|: {diff:.3e}")
+        print(f"sklearn: {t1 - t0:.4f}s | compilado: {t2 - t1:.4f}s")
+        if diff > args.tol:
+            print(f"[ERROR] Diferencia sobre la tolerancia ({args.tol}); no se exporta.")
+            sys.exit(1)
+
+    out = Path(args.out)
+    tmp = out.with_suffix(out.suffix + ".tmp")
+    joblib.dump(compiled, tmp)
+    tmp.replace(out)
+    print(f"[OK] Exportado: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+export_onnx_model.py
+--------------------
+Exporta models/pipeline.pkl completo (ColumnTransformer + imputers + scaler + one-hot +
+estimador) a ONNX con entradas tipadas por columna, y verifica paridad contra el pipeline.
+
+Genera:
+- models/pipeline.onnx      grafo ONNX (una entrada [N, 1] por columna)
+- models/pipeline_onnx.pkl  OnnxPipeline servible por la API:
+
+MODEL_BACKEND=onnx MODEL_PATH=models/pipeline_onnx.pkl uvicorn src.api.main:app
+
+Uso:
+
+python scripts/export_onnx_model.py --data data/processed/dataset_modelado.parquet --n-rows 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.models.onnx_backend import to_onnx  # noqa: E402
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Exporta el pipeline completo a ONNX")
+    ap.add_argument("--model-path", default="models/pipeline.pkl")
+    ap.add_argument("--meta-path", default="models/pipeline_meta.json")
+    ap.add_argument("--out", default="models/pipeline_onnx.pkl")
+    ap.add_argument("--onnx-out", default="models/pipeline.onnx")
+    ap.add_argument("--data", default=None, help="CSV/Parquet para el chequeo de paridad")
+    ap.add_argument("--n-rows", type=int, default=20000)
+    ap.add_argument("--intra-op-threads", type=int, default=1)
+    ap.add_argument("--tol", type=float, default=1e-5)
+    return ap.parse_args()
+
+
+def _atomic(path: Path, write) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    write(tmp)
+    tmp.replace(path)
+
+
+def main():
+    args = parse_args()
+    pipeline = joblib.load(args.model_path)
+    model = to_onnx(pipeline, intra_op_threads=args.intra_op_threads)
+    print(json.dumps(model.describe(), indent=2))
+
+    if args.data:
+        with open(args.meta_path, "r", encoding="utf-8") as f:
+            cols = json.load(f).get("columns") or list(model.feature_names_in_)
+        if args.data.endswith(".parquet"):
+            df = pd.read_parquet(args.data).head(args.n_rows)
+        else:
+            df = pd.read_csv(args.data, nrows=args.n_rows, low_memory=False)
+        X = df.reindex(columns=cols)
+
+        model.predict_proba(X.head(1))  # crea la sesión fuera de la medición
+        t0 = perf_counter()
+        ref = pipeline.predict_proba(X)[:, 1]
+        t1 = perf_counter()
+        got = model.predict_proba(X)[:, 1]
+        t2 = perf_counter()
+
+        diff = float(np.abs(ref - got).max()) if len(X) else 0.0
+        print(f"Filas: {len(X)} | max |diff|: {diff:.3e}")
+        print(f"sklearn: {t1 - t0:.4f}s | onnxruntime: {t2 - t1:.4f}s")
+        if diff > args.tol:
+            print(f"[ERROR] Diferencia sobre la tolerancia ({args.tol}); no se exporta.")
+            sys.exit(1)
+
+    onnx_out = Path(args.onnx_out)
+    onnx_out.parent.mkdir(parents=True, exist_ok=True)
+    _atomic(onnx_out, lambda p: p.write_bytes(model.model_bytes))
+    _atomic(Path(args.out), lambda p: joblib.dump(model, p))
+    print(f"[OK] Exportado: {onnx_out} y {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,212 @@
 #!/usr/bin/env python
+"""
+Ingesta de archivos fuente a data/raw con almacenamiento direccionado por contenido.
+
+- El sha256 se calcula mientras se copia (una sola lectura del origen). El contenido queda
+  una vez en data/raw/objects/<sha[:2]>/<sha><ext>; data/raw/<nombre> es un hardlink a ese
+  objeto (copia si el sistema de archivos no admite hardlinks), así los scripts que leen
+  data/raw/*.csv no cambian.
+- Un archivo cuyo sha256 ya está registrado no se vuelve a almacenar (duplicado).
+- El índice data/datasets.jsonl es de solo agregado (una línea por archivo leído) y se carga
+  en diccionarios por sha256 y por ruta de origen: búsqueda O(1).
+- Si la ruta de origen, su tamaño y su mtime coinciden con la última ingesta, el archivo no se
+  lee (re-ingesta nocturna de exportaciones SEACE/INFOBRAS sin cambios ~ solo un stat).
+  --verify fuerza el hash.
+
+data/datasets.json (formato anterior, lista reescrita en cada ingesta) queda como histórico.
+
+Uso:
+
+python scripts/ingest.py data/external/Data_Obra_1A.csv
+python scripts/ingest.py exportaciones/seace --pattern "*.csv" --workers 8
+"""
+
+import argparse
 import hashlib
 import json
 import logging
+import os
 import shutil
-import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 BASE = Path(__file__).resolve().parents[1]
 RAW = BASE / "data" / "raw"
+OBJECTS = RAW / "objects"
 LOG = BASE / "logs" / "ingest.log"
-REG = BASE / "data" / "datasets.json"
+INDEX = BASE / "data" / "datasets.jsonl"
+
+CHUNK = 1 << 20
+
+
+def _rel(p: Path) -> str:
+    try:
+        return p.relative_to(BASE).as_posix()
+    except ValueError:
+        return p.as_posix()
+
+
+class Registry:
+    """Índice de solo agregado (JSONL) con búsqueda por sha256 y por ruta de origen."""
+
+    def __init__(self, path: Path = INDEX):
+        self.path = path
+        self.by_sha: Dict[str, dict] = {}
+        self.by_source: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
 
-print("BASE:", BASE)
+    def _index(self, rec: dict) -> None:
+        if not rec.get("duplicate"):
+            self.by_sha.setdefault(rec["sha256"], rec)
+        if rec.get("source"):
+            self.by_source[rec["source"]] = rec
 
-RAW.mkdir(parents=True, exist_ok=True)
-LOG.parent.mkdir(parents=True, exist_ok=True)
+    def unchanged(self, src: Path, st: os.stat_result, dst: Path) -> Optional[dict]:
+        rec = self.by_source.get(str(src))
+        if (
+            rec
+            and rec["file"] == _rel(dst)
+            and rec["bytes"] == st.st_size
+            and rec.get("source_mtime_ns") == st.st_mtime_ns
+            and dst.exists()
+        ):
+            return rec
+        return None
 
-logging.basicConfig(
-    filename=LOG, level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s"
-)
+    def commit(self, tmp: Path, sha: str, size: int, src: Path, st, dst: Path) -> dict:
+        """Registra el contenido ya copiado en `tmp`; si el objeto del sha256 existe lo descarta."""
+        with self._lock:
+            first = self.by_sha.get(sha)
+            obj = BASE / first["object"] if first else OBJECTS / sha[:2] / (sha + src.suffix)
+            if first and obj.exists():
+                tmp.unlink()
+            else:
+                # Nuevo, o ya indexado pero sin objeto (clon nuevo, data/raw borrado): se repone.
+                obj.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, obj)
+            _link(obj, dst)
+            rec = {
+                "file": _rel(dst),
+                "object": _rel(obj),
+                "bytes": size,
+                "sha256": sha,
+                "source": str(src),
+                "source_mtime_ns": st.st_mtime_ns,
+                "duplicate": first is not None,
+                "ingested_at": datetime.utcnow().isoformat() + "Z",
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._index(rec)
+            return rec
 
 
-def sha256sum(p: Path) -> str:
+def _link(obj: Path, dst: Path) -> None:
+    """data/raw/<nombre> -> objeto (reemplazo atómico)."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists() and os.path.samefile(obj, dst):
+        return
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(obj, tmp)
+    except OSError:
+        shutil.copy2(obj, tmp)
+    os.replace(tmp, dst)
+
+
+def copy_hashing(src: Path) -> Tuple[Path, str, int]:
+    """Copia `src` a un temporal en OBJECTS calculando el sha256 en el mismo recorrido."""
+    OBJECTS.mkdir(parents=True, exist_ok=True)
     h = hashlib.sha256()
-    with open(p, "rb") as f:
-        for chunk in iter(lambda: f.read(1 << 20), b""):
-            h.update(chunk)
-    return h.hexdigest()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=OBJECTS, prefix=".ingest-")
+    try:
+        with open(src, "rb") as fin, os.fdopen(fd, "wb") as fout:
+            for chunk in iter(lambda: fin.read(CHUNK), b""):
+                h.update(chunk)
+                fout.write(chunk)
+                size += len(chunk)
+        shutil.copystat(src, tmp)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return Path(tmp), h.hexdigest(), size
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Uso: python scripts/ingest.py <ruta_origen> [nombre_destino]")
-        sys.exit(1)
+def ingest_file(registry: Registry, src: Path, dst: Path, verify: bool = False) -> dict:
+    """Ingresa un archivo; devuelve el registro y el resultado (new/duplicate/unchanged)."""
+    src = src.resolve()
+    st = src.stat()
+    rec = None if verify else registry.unchanged(src, st, dst)
+    if rec is not None:
+        return {**rec, "result": "unchanged"}
+    tmp, sha, size = copy_hashing(src)
+    rec = registry.commit(tmp, sha, size, src, st, dst)
+    result = "duplicate" if rec["duplicate"] else "new"
+    logging.info(f"{result.upper()} {_rel(dst)} | {size} bytes | {sha}")
+    return {**rec, "result": result}
+
+
+def ingest_dir(
+    registry: Registry, src: Path, dest: Path, pattern: str, workers: int, verify: bool
+) -> list:
+    files = sorted(
+        p for p in src.rglob(pattern)
+        if p.is_file() and not any(part.startswith(".") for part in p.relative_to(src).parts)
+    )
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = [
+            ex.submit(ingest_file, registry, p, dest / p.relative_to(src), verify) for p in files
+        ]
+        return [f.result() for f in futures]
 
-    src = Path(sys.argv[1])
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Ingesta a data/raw con deduplicación por sha256")
+    ap.add_argument("origen", help="Archivo o carpeta (modo masivo)")
+    ap.add_argument("destino", nargs="?", help="Nombre en data/raw (archivo) o subcarpeta")
+    ap.add_argument("--pattern", default="*", help="Patrón de archivos en modo carpeta")
+    ap.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    ap.add_argument("--verify", action="store_true", help="Re-hashear aunque no haya cambios")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    src = Path(args.origen)
     if not src.exists():
         raise FileNotFoundError(src)
 
-    dst = RAW / (sys.argv[2] if len(sys.argv) > 2 else src.name)
-    shutil.copy2(src, dst)
-
-    meta = {
-        "file": str(dst.relative_to(BASE)),
-        "bytes": dst.stat().st_size,
-        "sha256": sha256sum(dst),
-        "ingested_at": datetime.utcnow().isoformat() + "Z",
-    }
+    LOG.parent.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        filename=LOG, level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s"
+    )
+    registry = Registry()
 
-    # registrar en datasets.json
-    REG.parent.mkdir(parents=True, exist_ok=True)
-    if REG.exists():
-        register = json.loads(REG.read_text(encoding="utf-8"))
+    if src.is_dir():
+        dest = RAW / args.destino if args.destino else RAW
+        results = ingest_dir(registry, src, dest, args.pattern, args.workers, args.verify)
     else:
-        register = []
-    register.append(meta)
-    REG.write_text(json.dumps(register, indent=2), encoding="utf-8")
+        results = [
+            ingest_file(registry, src, RAW / (args.destino or src.name), verify=args.verify)
+        ]
 
-    logging.info(f"INGESTED {dst.name} | {meta['bytes']} bytes | {meta['sha256']}")
-    print("OK:", json.dumps(meta, indent=2))
+    counts = {}
+    for r in results:
+        counts[r["result"]] = counts.get(r["result"], 0) + 1
+        print(f"{r['result']:>9}  {r['file']}  {r['sha256'][:12]}")
+    print("OK:", json.dumps(counts))
 
 
 if __name__ == "__main__":
@@ -1,45 +1,107 @@
 import argparse
+import sys
 from pathlib import Path
+from typing import List, Optional
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-def read_any(path: Path) -> pd.DataFrame:
-    if path.suffix.lower() == ".csv":
-        return pd.read_csv(path, encoding="utf-8", low_memory=False)
-    if path.suffix.lower() in [".xlsx", ".xls"]:
-        return pd.read_excel(path)
-    raise ValueError(f"Formato no soportado: {path.suffix}")
+from src.data.ingesta import esquema_de, leer_archivos, unir_tablas  # noqa: E402
 
 
-def smart_concat(files):
-    frames = []
-    for f in files:
-        try:
-            df = read_any(f)
-            df.columns = [str(c).strip() for c in df.columns]
-            frames.append(df)
-        except Exception as e:
-            print(f"[WARN] {f.name}: {e}")
-    if not frames:
+def leer_partes(files) -> List[pa.Table]:
+    """CSV (latin-1, pyarrow) y Excel leídos en paralelo; nombres sin espacios en los extremos."""
+    tipos = esquema_de(files[0].parent) if files else None
+    partes = []
+    for table, stats in leer_archivos(files, tipos=tipos):
+        if table is None:
+            print(f"[WARN] {stats.path.name}: {stats.error}")
+            continue
+        partes.append(table.rename_columns([str(c).strip() for c in table.column_names]))
+    return partes
+
+
+def unificar(partes: List[pa.Table]) -> Optional[pa.Table]:
+    """
+    Esquema común calculado una vez (columnas en orden alfabético) y una sola alineación por
+    archivo, en Arrow: sin agregar columnas NaN una a una ni copias intermedias.
+    """
+    return unir_tablas(partes, ordenar=True) if partes else None
+
+
+def _numerico(t: Optional[pa.DataType]) -> bool:
+    return t is None or pa.types.is_integer(t) or pa.types.is_floating(t)
+
+
+def a_pandas(table: Optional[pa.Table], partes: List[pa.Table]) -> pd.DataFrame:
+    """
+    Conversión única a pandas con los mismos dtypes que daba pd.concat de un DataFrame por
+    archivo con np.nan en las columnas faltantes. Donde el tipo no coincide entre archivos
+    (p.ej. texto que falta en alguno: object con NaN) esa regla se aplica solo a esa columna.
+
+    Las columnas tipadas en el registro de esquemas no siguen esa regla sino el registro:
+    CODIGO_RUC_GANADOR es texto en todos los archivos de empresa, aunque en
+    DS_DASH_Empresa_2C.csv solo tenga dígitos (el pd.concat original dejaba esas filas, ~0,3%,
+    como int dentro de una columna object).
+    """
+    if table is None:
         return pd.DataFrame()
-    all_cols = sorted({c for df in frames for c in df.columns})
-    aligned = []
-    for df in frames:
-        for c in all_cols:
-            if c not in df.columns:
-                df[c] = np.nan
-        aligned.append(df[all_cols])
-    return pd.concat(aligned, ignore_index=True)
+    mixtas = {}
+    for field in table.schema:
+        tipos = [
+            p.schema.field(field.name).type if field.name in p.column_names else None
+            for p in partes
+        ]
+        if all(t == field.type for t in tipos) or all(_numerico(t) for t in tipos):
+            continue
+        mixtas[field.name] = pd.concat(
+            [
+                p.column(field.name).to_pandas() if t is not None
+                else pd.Series(np.nan, index=range(len(p)))
+                for p, t in zip(partes, tipos)
+            ],
+            ignore_index=True,
+        )
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    for name, col in mixtas.items():
+        df[name] = col
+    return df
+
+
+def smart_concat(files):
+    partes = leer_partes(files)
+    return a_pandas(unificar(partes), partes)
 
 
-def build_dataset(kind: str, src_dir: Path, out_dir: Path):
+def build_dataset(kind: str, src_dir: Path, out_dir: Path, partition_by: List[str] = ()):
+    """
+    dataset_<kind>.parquet; con partition_by, un dataset Parquet particionado
+    (dataset_<kind>/COL=valor/...) escrito directo desde la tabla Arrow unificada.
+    """
     files = [p for p in src_dir.iterdir() if p.suffix.lower() in [".csv", ".xlsx", ".xls"]]
     if not files:
         print(f"[INFO] Sin archivos en {src_dir}")
         return None
-    df = smart_concat(files)
+    partes = leer_partes(files)
+    table = unificar(partes)
+    if partition_by and table is not None:
+        faltan = [c for c in partition_by if c not in table.column_names]
+        if not faltan:
+            out_path = out_dir / f"dataset_{kind}"
+            pq.write_to_dataset(
+                table,
+                out_path,
+                partition_cols=list(partition_by),
+                existing_data_behavior="delete_matching",
+            )
+            print(f"[OK] {kind}: {table.shape} -> {out_path}/ ({', '.join(partition_by)})")
+            return out_path
+        print(f"[WARN] {kind}: sin columnas de partición {faltan}; se escribe un solo archivo")
+    df = a_pandas(table, partes)
     out_path = out_dir / f"dataset_{kind}.parquet"
     df.to_parquet(out_path, index=False)
     print(f"[OK] {kind}: {df.shape} -> {out_path}")
@@ -49,13 +111,19 @@ def build_dataset(kind: str, src_dir: Path, out_dir: Path):
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--root", type=str, default=str(Path(__file__).resolve().parents[1]))
+    ap.add_argument(
+        "--partition-by",
+        nargs="+",
+        default=[],
+        help="Escribe cada dataset particionado por estas columnas (p.ej. DEPARTAMENTO)",
+    )
     args = ap.parse_args()
     ROOT = Path(args.root)
     out = ROOT / "data/processed"
     out.mkdir(parents=True, exist_ok=True)
-    build_dataset("obras", ROOT / "data/external/obra", out)
-    build_dataset("empresas", ROOT / "data/external/empresa", out)
-    build_dataset("funcionarios", ROOT / "data/external/funcionario", out)
+    build_dataset("obras", ROOT / "data/external/obra", out, args.partition_by)
+    build_dataset("empresas", ROOT / "data/external/empresa", out, args.partition_by)
+    build_dataset("funcionarios", ROOT / "data/external/funcionario", out, args.partition_by)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,14 @@
 #!/usr/bin/env python
 import logging
+import sys
 from pathlib import Path
 
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.ingesta import cargar_archivos  # noqa: E402
+
 BASE = Path(__file__).resolve().parents[1]
 RAW = BASE / "data" / "raw"
 PROC = BASE / "data" / "processed"
@@ -20,15 +25,13 @@ OUT = PROC / "dataset_obras.parquet"
 
 
 def load_concat(glob_pattern: str) -> pd.DataFrame:
-    frames = []
-    for p in RAW.glob(glob_pattern):
-        try:
-            df = pd.read_csv(p, encoding="latin-1")
-            frames.append(df)
-            logging.info(f"Loaded {p.name} -> {df.shape}")
-        except Exception as e:
-            logging.error(f"Error reading {p.name}: {e}")
-    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    df, lecturas = cargar_archivos(sorted(RAW.glob(glob_pattern)))
+    for s in lecturas:
+        if s.error:
+            logging.error(f"Error reading {s.path.name}: {s.error}")
+        else:
+            logging.info(f"Loaded {s}")
+    return df
 
 
 def basic_clean(df: pd.DataFrame) -> pd.DataFrame:
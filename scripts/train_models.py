@@ -129,8 +129,18 @@ def main():
     Xtr, Xte, ytr, yte = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
     best_pipe = Pipeline([("prep", preproc), ("clf", best_clf)])
     best_pipe.fit(Xtr, ytr)
-    joblib.dump(best_pipe, MODEL_DIR / "pipeline.pkl")
-    json.dump(best, open(MODEL_DIR / "pipeline_meta.json", "w"), indent=2)
+    # Escritura atómica (tmp + replace): la API puede tener el .pkl anterior mapeado en
+    # memoria y recarga en caliente al detectar el nuevo par pipeline + meta.
+    tmp_pkl = MODEL_DIR / "pipeline.pkl.tmp"
+    tmp_meta = MODEL_DIR / "pipeline_meta.json.tmp"
+    joblib.dump(best_pipe, tmp_pkl)
+    # Columnas y tipos de entrada: la API genera con ellos el esquema tipado de las requests.
+    best["columns"] = list(X.columns)
+    best["dtypes"] = {c: "string" if X[c].dtype == "object" else "number" for c in X.columns}
+    with open(tmp_meta, "w") as f:
+        json.dump(best, f, indent=2)
+    os.replace(tmp_pkl, MODEL_DIR / "pipeline.pkl")
+    os.replace(tmp_meta, MODEL_DIR / "pipeline_meta.json")
     print(f"🏆 Mejor modelo: {best_name.upper()} (F1={best['f1']:.3f})")
     print(f"📁 Artefactos guardados en: {MODEL_DIR}")
 
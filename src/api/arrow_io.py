@@ -0,0 +1,74 @@
+from typing import TYPE_CHECKING, Optional, Sequence
+
+# pyarrow/pandas se importan al primer uso: el proceso arranca sin cargarlos.
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+BINARY_MEDIA_TYPES = (ARROW_STREAM, PARQUET)
+
+
+class ArrowDecodeError(ValueError):
+    """Cuerpo Arrow IPC / Parquet inválido (envuelve pyarrow.ArrowException)."""
+
+
+def media_type(header: Optional[str]) -> Optional[str]:
+    """Devuelve el formato binario pedido en Content-Type/Accept (None -> JSON)."""
+    if not header:
+        return None
+    for part in header.split(","):
+        mt = part.split(";")[0].strip().lower()
+        if mt in BINARY_MEDIA_TYPES:
+            return mt
+        if mt in ("application/x-parquet", "application/parquet"):
+            return PARQUET
+    return None
+
+
+def read_table(body: bytes, mt: str) -> "pa.Table":
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        buf = pa.BufferReader(body)
+        if mt == PARQUET:
+            return pq.read_table(buf)
+        return pa.ipc.open_stream(buf).read_all()
+    except pa.ArrowException as e:
+        raise ArrowDecodeError(str(e)) from e
+
+
+def align_table(table: "pa.Table", columns: Sequence[str]) -> "pd.DataFrame":
+    """
+    Alinea la tabla Arrow a las columnas del modelo sin pasar por objetos Python por fila:
+    se seleccionan las columnas presentes, las faltantes se agregan como nulos y la conversión
+    a pandas se hace una sola vez (columnas numéricas sin copia cuando no tienen nulos).
+    """
+    import pyarrow as pa
+
+    present = set(table.column_names)
+    arrays = [
+        table.column(c) if c in present else pa.nulls(table.num_rows, pa.float64())
+        for c in columns
+    ]
+    try:
+        aligned = pa.Table.from_arrays(arrays, names=list(columns))
+        return aligned.to_pandas(split_blocks=True, self_destruct=True)
+    except pa.ArrowException as e:
+        raise ArrowDecodeError(str(e)) from e
+
+
+def write_table(df: "pd.DataFrame", mt: str) -> bytes:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if mt == PARQUET:
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
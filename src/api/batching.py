@@ -0,0 +1,134 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# (filas, args de predict_fn, futuro de la request)
+_Item = Tuple["pd.DataFrame", tuple, asyncio.Future]
+
+
+class MicroBatcher:
+    """
+    Agrupa requests concurrentes en una sola llamada vectorizada al modelo.
+
+    Cada request envía su DataFrame ya alineado con submit(); un único consumidor junta
+    lo que llegue hasta completar `max_batch_size` filas o agotar `max_wait_ms`, ejecuta
+    `predict_fn` una vez en un hilo (sin bloquear el event loop) y reparte los resultados.
+    `runner` decide dónde corre esa llamada (por defecto asyncio.to_thread).
+
+    submit(X, *args) pasa `args` a predict_fn(X, *args) (p.ej. el pipeline que la request
+    tomó al inicio, junto con su meta y versión); solo se agrupan requests con los mismos
+    args (por identidad). Si la llamada agrupada falla, cada request se reintenta sola y solo
+    fallan las que vuelven a fallar (una fila inválida no tumba a las demás).
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[..., np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        runner: Optional[Callable[..., Awaitable[Any]]] = None,
+    ):
+        self.predict_fn = predict_fn
+        self.runner = runner or asyncio.to_thread
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.rows = 0
+
+    def _ensure_started(self) -> asyncio.Queue:
+        # El consumidor vive en el loop del worker; si cambia el loop (p.ej. TestClient),
+        # se crea uno nuevo.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._consume())
+        return self._queue
+
+    async def submit(self, X: "pd.DataFrame", *args: Any) -> np.ndarray:
+        queue = self._ensure_started()
+        fut = asyncio.get_running_loop().create_future()
+        await queue.put((X, args, fut))
+        return await fut
+
+    async def _collect(self) -> List[_Item]:
+        queue = self._queue
+        batch = [await queue.get()]
+        n = len(batch[0][0])
+        deadline = self._loop.time() + self.max_wait
+        while n < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n += len(item[0])
+        return batch
+
+    async def _consume(self) -> None:
+        while True:
+            batch = await self._collect()
+            groups: Dict[Tuple[int, ...], List[_Item]] = {}
+            for item in batch:
+                groups.setdefault(tuple(map(id, item[1])), []).append(item)
+            for items in groups.values():
+                await self._run(items)
+
+    async def _run(self, items: List[_Item]) -> None:
+        items = [item for item in items if not item[2].done()]
+        if not items:
+            return
+        frames = [X for X, _, _ in items]
+        args = items[0][1]
+        try:
+            if len(frames) == 1:
+                X = frames[0]
+            else:
+                import pandas as pd
+
+                X = pd.concat(frames, ignore_index=True)
+            scores = await self.runner(self.predict_fn, X, *args)
+        except Exception as e:
+            if len(items) == 1:
+                items[0][2].set_exception(e)
+                return
+            for item in items:
+                await self._run([item])
+            return
+
+        self.batches += 1
+        self.rows += len(X)
+        start = 0
+        for frame, _, fut in items:
+            end = start + len(frame)
+            if not fut.done():
+                fut.set_result(scores[start:end])
+            start = end
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch_rows": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
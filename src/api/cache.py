@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_type_name = np.frompyfunc(lambda v: type(v).__name__, 1, 1)
+
+
+def row_keys(X: "pd.DataFrame") -> np.ndarray:
+    """
+    Hash estable (uint64) de cada fila del DataFrame ya alineado a las columnas del modelo.
+
+    hash_pandas_object pasa las columnas object con tipos mezclados a str, así que 2023 y
+    "2023" colisionarían aunque el modelo los trate distinto: en esas columnas se mezcla
+    además el tipo de cada valor.
+    """
+    import pandas as pd
+
+    h = pd.util.hash_pandas_object(X, index=False).to_numpy()
+    for c in X.select_dtypes(include="object").columns:
+        types = _type_name(X[c].to_numpy()).astype(object)
+        h = h ^ (pd.util.hash_array(types) * _MIX)
+    return h
+
+
+class PredictionCache:
+    """
+    Cache LRU con TTL de probabilidades por fila, en memoria del proceso.
+
+    La clave es (versión del modelo, columnas, hash de la fila alineada); las entradas
+    expiran a los `ttl_seconds` y, por encima de `max_entries`, se descartan las menos
+    usadas. clear() se llama en cada swap del modelo (ver ModelRegistry.add_swap_listener).
+    Sin versión conocida (p.ej. un pipeline inyectado en tests) no se cachea nada.
+
+    La búsqueda recorre las filas en Python bajo el lock: los lotes de más de `max_rows`
+    filas no pasan por la cache (ni se buscan ni se guardan) para no serializar los hilos
+    del pool ni devolver trabajo por fila a los lotes grandes, que ya van vectorizados.
+    """
+
+    def __init__(
+        self, max_entries: int = 100_000, ttl_seconds: float = 600.0, max_rows: int = 256
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.max_rows = max_rows
+        self._data: "OrderedDict[Tuple[Hashable, int], Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+        self._invalidations = 0
+        self._bypassed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _bypass(self, version: Optional[str], X: "pd.DataFrame") -> bool:
+        if not self.enabled or version is None or len(X) == 0:
+            return True
+        if len(X) > self.max_rows:
+            self._bypassed += 1
+            return True
+        return False
+
+    def clear(self, *_: Any) -> None:
+        with self._lock:
+            self._data.clear()
+            self._invalidations += 1
+
+    def _lookup(self, prefix: Hashable, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        scores = np.full(len(keys), np.nan)
+        hit = np.zeros(len(keys), dtype=bool)
+        now = time.monotonic()
+        with self._lock:
+            for i, k in enumerate(keys.tolist()):
+                entry = self._data.get((prefix, k))
+                if entry is None:
+                    continue
+                if entry[1] < now:
+                    del self._data[(prefix, k)]
+                    self._expired += 1
+                    continue
+                self._data.move_to_end((prefix, k))
+                scores[i] = entry[0]
+                hit[i] = True
+            n_hit = int(hit.sum())
+            self._hits += n_hit
+            self._misses += len(keys) - n_hit
+        return scores, np.flatnonzero(~hit)
+
+    def _store(self, prefix: Hashable, keys: np.ndarray, scores: np.ndarray) -> None:
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for k, s in zip(keys.tolist(), scores.tolist()):
+                self._data[(prefix, k)] = (s, expires)
+                self._data.move_to_end((prefix, k))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    @staticmethod
+    def keys(version: str, X: "pd.DataFrame") -> Tuple[Hashable, np.ndarray]:
+        return (version, tuple(X.columns)), row_keys(X)
+
+    def predict(
+        self,
+        version: Optional[str],
+        X: "pd.DataFrame",
+        predict_fn: Callable[["pd.DataFrame"], np.ndarray],
+    ) -> np.ndarray:
+        """predict_fn(X) calculando solo las filas que no están en cache."""
+        if self._bypass(version, X):
+            return predict_fn(X)
+        prefix, keys = self.keys(version, X)
+        scores, miss = self._lookup(prefix, keys)
+        if len(miss):
+            fresh = predict_fn(X if len(miss) == len(X) else X.iloc[miss])
+            scores[miss] = fresh
+            self._store(prefix, keys[miss], np.asarray(fresh, dtype=float))
+        return scores
+
+    async def apredict(self, version: Optional[str], X: "pd.DataFrame", submit) -> np.ndarray:
+        """Como predict(), pero las filas faltantes se resuelven con `await submit(X)`."""
+        if self._bypass(version, X):
+            return await submit(X)
+        prefix, keys = self.keys(version, X)
+        scores, miss = self._lookup(prefix, keys)
+        if len(miss):
+            fresh = await submit(X if len(miss) == len(X) else X.iloc[miss])
+            scores[miss] = fresh
+            self._store(prefix, keys[miss], np.asarray(fresh, dtype=float))
+        return scores
+
+    def stats(self) -> Dict[str, Any]:
+        total = self._hits + self._misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "max_rows": self.max_rows,
+            "bypassed_batches": self._bypassed,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": self._hits / total if total else 0.0,
+            "evictions": self._evictions,
+            "expired": self._expired,
+            "invalidations": self._invalidations,
+        }
@@ -0,0 +1,235 @@
+"""
+Catálogo de modelos con nombre servidos a la vez por el mismo proceso.
+
+El modelo principal (deps.registry) es el que atienden los endpoints por defecto; los
+adicionales se declaran con MODELS="nombre=ruta.pkl[@backend],..." y se eligen por request
+con la cabecera X-Model o con el prefijo de ruta /models/{nombre}/... (ModelRouteMiddleware).
+
+Cada modelo vive en su propio ModelRegistry (checksum, calentamiento, estado). Los
+adicionales se cargan en segundo plano al primer uso (503 + Retry-After mientras tanto) y
+comparten un presupuesto de memoria: si la suma estimada de los cargados lo supera, se
+descargan los menos usados recientemente. Los modelos fijados (el principal y el challenger
+de shadow) no se descargan nunca.
+
+Si la carga falla, el modelo queda en "failed" y las requests reciben 503 sin relanzarla
+hasta que vence una espera que se duplica con cada fallo (retry_seconds, 2x, ... hasta
+max_retry_seconds); reset(nombre) la anula.
+"""
+
+import gc
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.api.registry import FAILED, LOADING, WARMING, ModelNotReadyError, ModelRegistry
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class UnknownModelError(KeyError): ...
+
+
+def _meta_for(pipeline_path: Path, default_meta: Path) -> Path:
+    """<modelo>_meta.json o pipeline_meta.json junto al .pkl; si no, la meta principal."""
+    for candidate in (
+        pipeline_path.with_name(f"{pipeline_path.stem}_meta.json"),
+        pipeline_path.with_name("pipeline_meta.json"),
+    ):
+        if candidate.exists():
+            return candidate
+    return default_meta
+
+
+def parse_model_specs(spec: str, default_meta: Path) -> List[Tuple[str, Path, Path, str]]:
+    """
+    "rf=models/sprint4/modelo_final_RandomForest.pkl,onnx=models/pipeline_onnx.pkl@onnx"
+    -> [(nombre, ruta_pkl, ruta_meta, backend), ...]. El backend por defecto es sklearn.
+    """
+    out = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, target = item.partition("=")
+        if not sep or not name.strip() or not target.strip():
+            raise ValueError(f"MODELS mal formado (se espera nombre=ruta[@backend]): {item!r}")
+        target = target.strip()
+        path, backend = target.rsplit("@", 1) if "@" in target else (target, "sklearn")
+        path = Path(path)
+        out.append((name.strip(), path, _meta_for(path, default_meta), backend))
+    return out
+
+
+class ModelCatalog:
+    """Modelos por nombre con carga perezosa y presupuesto de memoria compartido (LRU)."""
+
+    def __init__(
+        self,
+        default: str,
+        budget_bytes: Optional[int] = None,
+        retry_seconds: float = 30.0,
+        max_retry_seconds: float = 600.0,
+    ):
+        self.default = default
+        self.budget_bytes = budget_bytes or None
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._loading: set = set()
+        self._registries: Dict[str, ModelRegistry] = {}
+        self._pinned: set = set()
+        self._last_used: Dict[str, float] = {}
+        self._evictions = 0
+        self._lock = threading.Lock()
+        # Una carga a la vez: el delta de RSS de cada bundle no se mezcla con otra carga.
+        self._load_lock = threading.Lock()
+
+    def add(self, name: str, registry: ModelRegistry, pinned: bool = False) -> None:
+        self._registries[name] = registry
+        if pinned:
+            self._pinned.add(name)
+
+    def pin(self, name: str) -> None:
+        self.registry(name)
+        self._pinned.add(name)
+
+    def names(self) -> List[str]:
+        return list(self._registries)
+
+    def registry(self, name: str) -> ModelRegistry:
+        try:
+            return self._registries[name]
+        except KeyError:
+            raise UnknownModelError(f"Modelo desconocido: {name}") from None
+
+    def get(self, name: str) -> Tuple[Any, Dict]:
+        """(pipeline, meta) de `name`; si no está cargado, lanza la carga en segundo plano."""
+        reg = self.registry(name)
+        now = time.monotonic()
+        self._last_used[name] = now
+        if not reg.loaded:
+            # El hilo de carga sigue activo hasta registrar el fallo: sin reintento en línea.
+            if name in self._loading:
+                raise ModelNotReadyError(f"Modelo '{name}' no listo ({reg.state}).")
+            if reg.state == FAILED and now < self._retry_at.get(name, 0.0):
+                wait = self._retry_at[name] - now
+                raise ModelNotReadyError(
+                    f"Modelo '{name}' falló al cargar ({reg.error}); reintento en {wait:.0f}s."
+                )
+            if reg.state not in (LOADING, WARMING):
+                self.load_async(name)
+        return reg.get()
+
+    def reset(self, name: str) -> None:
+        """Anula la espera tras un fallo: el próximo uso vuelve a intentar la carga."""
+        self.registry(name)
+        self._failures.pop(name, None)
+        self._retry_at.pop(name, None)
+
+    def load_async(self, name: str) -> Optional[threading.Thread]:
+        """Carga y calienta `name` en un hilo; luego aplica el presupuesto de memoria."""
+        reg = self.registry(name)
+        with self._lock:
+            if reg.loaded or reg.state in (LOADING, WARMING) or name in self._loading:
+                return None
+            reg.state = LOADING
+            self._loading.add(name)
+
+        def run():
+            try:
+                with self._load_lock:
+                    try:
+                        reg.load(warm=True)
+                    except Exception as e:
+                        n = self._failures.get(name, 0) + 1
+                        wait = min(self.retry_seconds * 2 ** (n - 1), self.max_retry_seconds)
+                        self._failures[name] = n
+                        self._retry_at[name] = time.monotonic() + wait
+                        logger.error(
+                            f"No se pudo cargar el modelo '{name}' (fallo {n}, "
+                            f"reintento en {wait:.0f}s): {e}"
+                        )
+                        return
+                self._failures.pop(name, None)
+                self._retry_at.pop(name, None)
+            finally:
+                self._loading.discard(name)
+            self._last_used.setdefault(name, time.monotonic())
+            self._enforce_budget(keep=name)
+
+        thread = threading.Thread(target=run, name=f"model-load-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def used_bytes(self) -> int:
+        return sum(reg.memory_bytes() for reg in self._registries.values() if reg.loaded)
+
+    def _enforce_budget(self, keep: str) -> None:
+        if self.budget_bytes is None:
+            return
+        with self._lock:
+            used = self.used_bytes()
+            candidates = sorted(
+                (
+                    n
+                    for n, r in self._registries.items()
+                    if r.loaded and n != keep and n not in self._pinned
+                ),
+                key=lambda n: self._last_used.get(n, 0.0),
+            )
+            for name in candidates:
+                if used <= self.budget_bytes:
+                    break
+                reg = self._registries[name]
+                used -= reg.memory_bytes()
+                reg.unload()
+                self._evictions += 1
+                logger.info(f"Modelo '{name}' descargado por presupuesto de memoria")
+            if used > self.budget_bytes:
+                logger.warning(
+                    f"Modelos fijados ({used} B) por encima del presupuesto "
+                    f"({self.budget_bytes} B)"
+                )
+        gc.collect()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "default": self.default,
+            "budget_bytes": self.budget_bytes,
+            "used_bytes": self.used_bytes(),
+            "evictions": self._evictions,
+            "models": {
+                name: {
+                    **reg.stats(),
+                    "pinned": name in self._pinned,
+                    "memory_bytes": reg.memory_bytes(),
+                    "failures": self._failures.get(name, 0),
+                }
+                for name, reg in self._registries.items()
+            },
+        }
+
+
+class ModelRouteMiddleware:
+    """
+    Middleware ASGI: /models/{nombre}/<ruta> -> /<ruta> con la cabecera X-Model agregada,
+    de modo que los endpoints solo miran la cabecera.
+    """
+
+    def __init__(self, app, prefix: str = "/models/"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.prefix):
+            name, sep, rest = scope["path"][len(self.prefix):].partition("/")
+            if name and sep and rest:
+                headers = [(k, v) for k, v in scope.get("headers", ()) if k != b"x-model"]
+                headers.append((b"x-model", name.encode("latin-1")))
+                path = "/" + rest
+                scope = {**scope, "path": path, "raw_path": path.encode(), "headers": headers}
+        await self.app(scope, receive, send)
+
@@ -1,28 +1,199 @@
-import json
-import pickle
-from functools import lru_cache
+import hmac
+import os
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Header, HTTPException
+
+from src.api.cache import PredictionCache
+from src.api.catalog import ModelCatalog, UnknownModelError, parse_model_specs
+from src.api.executor import InferencePool
+from src.api.jobs import JobManager
+from src.api.profiling import Profiler
+from src.api.registry import (
+    MetaNotFoundError,
+    ModelNotFoundError,
+    ModelNotReadyError,
+    ModelRegistry,
+)
+from src.api.shadow import ShadowScorer
 
 MODELS_DIR = Path("models")
 PIPELINE_PKL = MODELS_DIR / "pipeline.pkl"
 PIPELINE_META = MODELS_DIR / "pipeline_meta.json"
 
+__all__ = [
+    "MetaNotFoundError",
+    "ModelNotFoundError",
+    "ModelNotReadyError",
+    "UnknownModelError",
+    "catalog",
+    "get_model",
+    "get_model_and_meta",
+    "jobs",
+    "inference_pool",
+    "prediction_cache",
+    "profiler",
+    "registry",
+    "require_admin",
+    "shadow",
+]
+
+# Backend de inferencia: "sklearn" (Pipeline original), "compiled" (evaluador NumPy de
+# src/models/compiled.py) u "onnx" (ONNX Runtime, src/models/onnx_backend.py). Ambos se
+# generan al cargar o se exportan antes con scripts/export_compiled_model.py / export_onnx_model.py.
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "sklearn")
+# Artefacto a servir (p.ej. models/pipeline_compiled.pkl ya exportado).
+MODEL_PATH = Path(os.getenv("MODEL_PATH", str(PIPELINE_PKL)))
+# MODEL_MMAP=1 -> atributos ndarray del pipeline mapeados en memoria (solo lectura).
+MODEL_MMAP = os.getenv("MODEL_MMAP", "0") == "1"
+# Segundos entre revisiones de models/ para recarga en caliente (0 = desactivado).
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+# Versión activa publicada por /admin/model/reload|rollback; el vigía de cada worker la sigue.
+MODEL_ACTIVE_PATH = Path(os.getenv("MODEL_ACTIVE_PATH", str(MODELS_DIR / "active_version.json")))
+# Hilos propios del estimador (n_jobs de RandomForest/XGBoost); vacío = los del .pkl.
+# gunicorn.conf.py lo fija a NATIVE_THREADS para no sobreasignar CPUs entre workers.
+MODEL_N_JOBS = int(os.environ["MODEL_N_JOBS"]) if os.getenv("MODEL_N_JOBS") else None
+# Tamaños de los lotes sintéticos de calentamiento antes de marcar el worker como listo.
+WARMUP_SIZES = [int(n) for n in os.getenv("WARMUP_SIZES", "1,64,1024").split(",") if n.strip()]
+# Micro-batching de requests pequeñas: filas máximas por llamada y espera máxima (ms).
+BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "2"))
+# Pool acotado para inferencia/parseo: hilos de cómputo y requests en espera antes del 503.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "32"))
+# Hilos de ONNX Runtime por sesión: el pool ya corre INFERENCE_WORKERS llamadas en paralelo,
+# así que cada una usa su parte de la CPU.
+ONNX_INTRA_OP_THREADS = int(
+    os.getenv("ONNX_INTRA_OP_THREADS", str(max(1, (os.cpu_count() or 1) // INFERENCE_WORKERS)))
+)
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+# Cache de probabilidades por fila (LRU + TTL, por proceso), desactivada por defecto
+# (PREDICT_CACHE_SIZE=0); solo atiende lotes de hasta PREDICT_CACHE_MAX_ROWS filas.
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "0"))
+PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "600"))
+PREDICT_CACHE_MAX_ROWS = int(os.getenv("PREDICT_CACHE_MAX_ROWS", "256"))
+# Respuestas JSON: decimales de las probabilidades (vacío = precisión completa) y
+# compresión br/gzip negociada para cuerpos desde COMPRESS_MIN_BYTES (0 = off).
+PROBA_DECIMALS = int(os.environ["PROBA_DECIMALS"]) if os.getenv("PROBA_DECIMALS") else None
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+# Perfilado por muestreo de pilas: fracción de requests y/o umbral de latencia (0 = off).
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "logs/profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+# Modelos adicionales servidos junto al principal ("nombre=ruta.pkl[@backend],...") y
+# presupuesto de memoria compartido en MB (0 = sin límite); ver src/api/catalog.py.
+MODEL_NAME = os.getenv("MODEL_NAME", "default")
+MODELS = os.getenv("MODELS", "")
+MODELS_MEMORY_MB = float(os.getenv("MODELS_MEMORY_MB", "0"))
+MODELS_RETRY_SECONDS = float(os.getenv("MODELS_RETRY_SECONDS", "30"))
+# Shadow scoring: challenger (uno de MODELS), fracción de requests y carpeta de diferencias.
+SHADOW_MODEL = os.getenv("SHADOW_MODEL") or None
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "1"))
+SHADOW_DIR = Path(os.getenv("SHADOW_DIR", "logs/shadow"))
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "8"))
+# Jobs de scoring de archivos grandes (POST /jobs): carpeta de estado/resultados, hilos de
+# scoring por chunk, filas por chunk, jobs simultáneos, horas que se conservan los terminados
+# y tamaño máximo de subida.
+JOBS_DIR = Path(os.getenv("JOBS_DIR", "data/jobs"))
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+JOBS_CHUNK_ROWS = int(os.getenv("JOBS_CHUNK_ROWS", "50000"))
+JOBS_MAX_ACTIVE = int(os.getenv("JOBS_MAX_ACTIVE", "2"))
+JOBS_KEEP_HOURS = float(os.getenv("JOBS_KEEP_HOURS", "72"))
+JOBS_MAX_UPLOAD_BYTES = int(float(os.getenv("JOBS_MAX_UPLOAD_MB", "2048")) * 1024 * 1024)
+# Los endpoints /admin exigen la cabecera X-Admin-Token con este valor; sin él responden 404.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+
+def _backend_adapter(backend: str):
+    if backend == "sklearn":
+        return None
+    if backend == "compiled":
+        from src.models.compiled import ensure_compiled
 
-class ModelNotFoundError(RuntimeError): ...
+        return ensure_compiled
+    if backend == "onnx":
+        from src.models.onnx_backend import ensure_onnx
 
+        return partial(
+            ensure_onnx,
+            intra_op_threads=ONNX_INTRA_OP_THREADS,
+            inter_op_threads=ONNX_INTER_OP_THREADS,
+        )
+    raise ValueError(f"MODEL_BACKEND no soportado: {backend}")
 
-class MetaNotFoundError(RuntimeError): ...
+
+# Instancia única por proceso. Con gunicorn --preload se carga en el master antes del
+# fork y los workers la heredan (copy-on-write); ver gunicorn.conf.py.
+registry = ModelRegistry(
+    MODEL_PATH,
+    PIPELINE_META,
+    mmap_mode="r" if MODEL_MMAP else None,
+    adapter=_backend_adapter(MODEL_BACKEND),
+    backend=MODEL_BACKEND,
+    warmup_sizes=WARMUP_SIZES,
+    n_jobs=MODEL_N_JOBS,
+    active_path=MODEL_ACTIVE_PATH,
+)
+inference_pool = InferencePool(INFERENCE_WORKERS, INFERENCE_MAX_QUEUE)
+prediction_cache = PredictionCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL, PREDICT_CACHE_MAX_ROWS)
+registry.add_swap_listener(prediction_cache.clear)
+catalog = ModelCatalog(
+    MODEL_NAME, int(MODELS_MEMORY_MB * 1024 * 1024), retry_seconds=MODELS_RETRY_SECONDS
+)
+catalog.add(MODEL_NAME, registry, pinned=True)
+for _name, _path, _meta, _backend in parse_model_specs(MODELS, PIPELINE_META):
+    catalog.add(
+        _name,
+        ModelRegistry(
+            _path,
+            _meta,
+            mmap_mode="r" if MODEL_MMAP else None,
+            adapter=_backend_adapter(_backend),
+            backend=_backend,
+            warmup_sizes=WARMUP_SIZES,
+            n_jobs=MODEL_N_JOBS,
+        ),
+    )
+if SHADOW_MODEL is not None:
+    catalog.pin(SHADOW_MODEL)
+shadow = ShadowScorer(SHADOW_MODEL, SHADOW_SAMPLE_RATE, SHADOW_DIR, SHADOW_MAX_PENDING)
+jobs = JobManager(
+    JOBS_DIR,
+    lambda name: get_model(name),
+    workers=JOBS_WORKERS,
+    chunk_rows=JOBS_CHUNK_ROWS,
+    max_active=JOBS_MAX_ACTIVE,
+    keep_hours=JOBS_KEEP_HOURS,
+)
+profiler = Profiler(
+    PROFILE_DIR,
+    sample_rate=PROFILE_SAMPLE_RATE,
+    slow_ms=PROFILE_SLOW_MS,
+    interval_ms=PROFILE_INTERVAL_MS,
+    max_files=PROFILE_MAX_FILES,
+)
 
 
-@lru_cache(maxsize=1)
 def get_model_and_meta() -> Tuple[Any, Dict]:
-    if not PIPELINE_PKL.exists():
-        raise ModelNotFoundError(f"No existe {PIPELINE_PKL}")
-    if not PIPELINE_META.exists():
-        raise MetaNotFoundError(f"No existe {PIPELINE_META}")
-    with open(PIPELINE_PKL, "rb") as f:
-        pipeline = pickle.load(f)
-    with open(PIPELINE_META, "r", encoding="utf-8") as f:
-        meta = json.load(f)
-    return pipeline, meta
+    return registry.get()
+
+
+def get_model(name: Optional[str] = None) -> Tuple[Any, Dict]:
+    """(pipeline, meta) del modelo `name` del catálogo; None o MODEL_NAME = el principal."""
+    if name is None or name == MODEL_NAME:
+        return get_model_and_meta()
+    return catalog.get(name)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    # Cerrado por defecto: sin ADMIN_TOKEN configurado, /admin no existe.
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de administración inválido.")
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict
+
+import numpy as np
+
+
+class PoolSaturatedError(RuntimeError): ...
+
+
+def _summary(values: Deque[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    arr = np.fromiter(values, dtype=float) * 1000.0
+    return {
+        "count": len(arr),
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "max_ms": float(arr.max()),
+    }
+
+
+class InferencePool:
+    """
+    Pool acotado para trabajo CPU (parseo, alineación, predict_proba) fuera del event loop.
+
+    Admite como máximo `max_workers` tareas en ejecución más `max_queue` en espera; por
+    encima de eso run() lanza PoolSaturatedError (la API responde 503). Se mide por
+    separado la espera en cola y el tiempo de cómputo de cada tarea.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, window: int = 1024):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="infer")
+        self._pending = 0
+        self._rejected = 0
+        self._queue_wait: Deque[float] = deque(maxlen=window)
+        self._compute: Deque[float] = deque(maxlen=window)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn: Callable[..., Any], *args: Any, admit: bool = True) -> Any:
+        """
+        Ejecuta fn(*args) en el pool. admit=False omite el control de capacidad (p.ej. para
+        los bloques siguientes de una respuesta en streaming ya admitida).
+        """
+        # _pending solo se toca desde el event loop: no necesita lock.
+        if admit and self._pending >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise PoolSaturatedError("Servicio saturado, reintente en unos segundos.")
+
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._queue_wait.append(started - submitted)
+                self._compute.append(time.perf_counter() - started)
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "rejected": self._rejected,
+            "queue_wait": _summary(self._queue_wait),
+            "compute": _summary(self._compute),
+        }
@@ -0,0 +1,64 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.api.metrics import STAGE_SECONDS
+
+
+def align_rows(filas: List[Dict[str, Any]], columns: Sequence[str]) -> "pd.DataFrame":
+    """
+    Alinea registros (forma 'filas') a las columnas del modelo en una sola pasada.
+    Faltantes -> NaN; extras -> se ignoran.
+    """
+    import pandas as pd
+
+    return pd.DataFrame.from_records(filas, columns=list(columns))
+
+
+def align_columns(data: Dict[str, Sequence[Any]], columns: Sequence[str]) -> "pd.DataFrame":
+    """
+    Alinea un cuerpo columnar ({"col": [v1, v2, ...]}) a las columnas del modelo.
+    Cada columna se copia una sola vez; faltantes -> NaN; extras -> se ignoran.
+    """
+    lengths = {len(v) for v in data.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columnas con longitudes distintas: {sorted(lengths)}")
+    n = lengths.pop() if lengths else 0
+    if n == 0:
+        raise ValueError("Cuerpo columnar sin filas.")
+
+    import pandas as pd
+
+    missing = np.full(n, np.nan)
+    return pd.DataFrame({c: data[c] if c in data else missing for c in columns})
+
+
+def _split_pipeline(pipeline: Any):
+    """(preprocesamiento, estimador final) de un Pipeline sklearn; si no, (None, pipeline)."""
+    steps = getattr(pipeline, "steps", None)
+    if isinstance(steps, list) and len(steps) > 1:
+        return pipeline[:-1], pipeline[-1]
+    return None, pipeline
+
+
+def predict_scores(pipeline: Any, X: "pd.DataFrame") -> np.ndarray:
+    """
+    Probabilidad de la clase positiva. Sin predict_proba se aplica la sigmoide al
+    decision_function: depende solo de la fila (no del resto del lote), así el score no
+    cambia según con qué requests se agrupe en el micro-batcher ni lo que guarde la cache.
+    """
+    # Se ejecutan por separado transform y el estimador final (mismo resultado que
+    # Pipeline.predict_proba) para medir ambas etapas en /metrics.
+    prep, est = _split_pipeline(pipeline)
+    if prep is not None:
+        with STAGE_SECONDS.time(stage="preprocessing"):
+            X = prep.transform(X)
+    with STAGE_SECONDS.time(stage="model"):
+        try:
+            return np.asarray(est.predict_proba(X))[:, 1]
+        except AttributeError:
+            scores = np.asarray(est.decision_function(X), dtype=float)
+            return 1.0 / (1.0 + np.exp(-scores))
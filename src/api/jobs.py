@@ -0,0 +1,462 @@
+"""
+Jobs asíncronos de scoring para archivos grandes (CSV / Parquet).
+
+POST /jobs guarda la subida en disco y responde de inmediato con el id del job; el scoring
+corre en segundo plano:
+
+1. preparing: el archivo se normaliza a input.parquet con solo las columnas del modelo (+ las
+   de identificación pedidas), en row groups de `chunk_rows` filas. El CSV se lee en
+   streaming con los tipos de meta["dtypes"], sin inferencia por bloque.
+2. running: cada row group es un chunk que se puntúa en el pool local de `workers` hilos y
+   se escribe como chunks/NNNNN.parquet (escritura atómica: tmp + rename).
+3. done: los chunks se concatenan en result.parquet (fila, ids, proba, riesgoso).
+
+El estado vive en JOBS_DIR/<id>/job.json, así que cualquier worker de gunicorn responde el
+progreso y la descarga. Al arrancar, resume() retoma los jobs sin terminar: un chunk cuyo
+archivo ya existe no se vuelve a puntuar. Con varios workers, un flock sobre el directorio
+del job garantiza que solo uno lo ejecute (el lock se libera solo si el proceso muere).
+"""
+
+import json
+import re
+import secrets
+import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.api.arrow_io import align_table
+from src.api.inference import predict_scores
+from src.api.registry import ModelNotReadyError
+from src.api.schemas import NUMBER
+from src.utils.logging import get_logger
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: un solo proceso, sin lock entre workers
+    fcntl = None
+
+logger = get_logger(__name__)
+
+QUEUED, PREPARING, RUNNING = "queued", "preparing", "running"
+DONE, FAILED, CANCELLED = "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+FORMATS = ("csv", "parquet")
+
+_ID_RE = re.compile(r"^[0-9a-f]{16}$")
+# Espera máxima a que el modelo termine de cargar antes de dar el job por fallido.
+MODEL_WAIT_SECONDS = 600.0
+
+
+class JobNotFoundError(KeyError): ...
+
+
+class JobNotFinishedError(RuntimeError): ...
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _rechunk(batches: Iterable["pa.RecordBatch"], rows: int) -> Iterator["pa.Table"]:
+    """Reagrupa lotes de cualquier tamaño en tablas de `rows` filas (la última, el resto)."""
+    import pyarrow as pa
+
+    pending: List["pa.RecordBatch"] = []
+    n = 0
+    for batch in batches:
+        pending.append(batch)
+        n += batch.num_rows
+        while n >= rows:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, rows)
+            rest = table.slice(rows)
+            pending, n = rest.to_batches(), rest.num_rows
+    if n:
+        yield pa.Table.from_batches(pending)
+
+
+class JobManager:
+    """
+    Jobs en disco + pool local de scoring. `model_getter(nombre)` devuelve (pipeline, meta)
+    del modelo con que se envió el job (None = principal).
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        model_getter: Callable[[Optional[str]], Tuple[Any, Dict]],
+        workers: int = 2,
+        chunk_rows: int = 50_000,
+        max_active: int = 2,
+        keep_hours: float = 72.0,
+    ):
+        self.directory = Path(directory)
+        self.model_getter = model_getter
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.max_active = max_active
+        self.keep_hours = keep_hours
+        self._chunks: Optional[ThreadPoolExecutor] = None
+        self._runners: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    # -- estado en disco -----------------------------------------------------------------
+
+    def _dir(self, job_id: str) -> Path:
+        if not _ID_RE.match(job_id):
+            raise JobNotFoundError(job_id)
+        return self.directory / job_id
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        path = self._dir(job_id) / "job.json"
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raise JobNotFoundError(job_id) from None
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        job["updated_at"] = time.time()
+        _write_json(self._dir(job["id"]) / "job.json", job)
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """Estado público del job con progreso y estimación del tiempo restante."""
+        job = self.get(job_id)
+        out = {k: v for k, v in job.items() if k not in ("columns", "dtypes")}
+        rows, done = job.get("rows"), job.get("rows_done", 0)
+        out["progress"] = round(done / rows, 4) if rows else float(job["status"] == DONE)
+        started = job.get("started_at")
+        if job["status"] == RUNNING and started and done and rows:
+            rate = done / max(time.time() - started, 1e-9)
+            out["rows_per_second"] = round(rate, 1)
+            out["eta_seconds"] = round((rows - done) / rate, 1)
+        return out
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        if not self.directory.exists():
+            return []
+        jobs = []
+        for p in self.directory.iterdir():
+            if _ID_RE.match(p.name):
+                try:
+                    jobs.append(self.status(p.name))
+                except JobNotFoundError:
+                    continue
+        return sorted(jobs, key=lambda j: j["created_at"], reverse=True)[:limit]
+
+    def result_path(self, job_id: str) -> Path:
+        job = self.get(job_id)
+        if job["status"] != DONE:
+            raise JobNotFinishedError(f"Job {job_id} en estado '{job['status']}'.")
+        return self._dir(job_id) / "result.parquet"
+
+    # -- envío ---------------------------------------------------------------------------
+
+    def create(
+        self,
+        fmt: str,
+        model: Optional[str] = None,
+        id_columns: Iterable[str] = (),
+        encoding: str = "utf-8",
+        sep: str = ",",
+        chunk_rows: Optional[int] = None,
+    ) -> Tuple[Dict[str, Any], Path]:
+        """Crea el job (estado queued) y devuelve (job, ruta donde guardar la subida)."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato no soportado: {fmt}")
+        job_id = secrets.token_hex(8)
+        path = self._dir(job_id)
+        (path / "chunks").mkdir(parents=True)
+        job = {
+            "id": job_id,
+            "status": QUEUED,
+            "format": fmt,
+            "model": model,
+            "id_columns": list(id_columns),
+            "encoding": encoding,
+            "sep": sep,
+            "chunk_rows": chunk_rows or self.chunk_rows,
+            "rows": None,
+            "chunks": None,
+            "chunks_done": 0,
+            "rows_done": 0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        self._save(job)
+        return job, path / f"upload.{fmt}"
+
+    def start(self, job_id: str) -> None:
+        with self._lock:
+            if self._runners is None:
+                self._runners = ThreadPoolExecutor(self.max_active, thread_name_prefix="job")
+        self._runners.submit(self._run_guarded, job_id)
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Marca el job para cancelar (el que lo ejecuta lo detiene entre chunks)."""
+        job = self.get(job_id)
+        if job["status"] in FINISHED:
+            shutil.rmtree(self._dir(job_id), ignore_errors=True)
+            return {"id": job_id, "deleted": True}
+        (self._dir(job_id) / "cancel").touch()
+        return {"id": job_id, "deleted": False, "status": "cancelling"}
+
+    def discard(self, job_id: str) -> None:
+        """Borra un job que no llegó a arrancar (p.ej. subida interrumpida)."""
+        shutil.rmtree(self._dir(job_id), ignore_errors=True)
+
+    # -- ejecución -----------------------------------------------------------------------
+
+    def _run_guarded(self, job_id: str) -> None:
+        lock_file = None
+        try:
+            if fcntl is not None:
+                lock_file = open(self._dir(job_id) / ".lock", "a")
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return  # otro worker ya lo está ejecutando
+            self.run(job_id)
+        except Exception as e:
+            if self._stopping.is_set():
+                return  # apagado: el job queda sin terminar y se retoma al reiniciar
+            logger.error(f"Job {job_id} falló: {e}")
+            try:
+                job = self.get(job_id)
+                job.update(status=FAILED, error=str(e), finished_at=time.time())
+                self._save(job)
+            except JobNotFoundError:
+                pass
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+    def _model(self, job: Dict[str, Any]) -> Tuple[Any, Dict]:
+        deadline = time.monotonic() + MODEL_WAIT_SECONDS
+        while True:
+            try:
+                return self.model_getter(job["model"])
+            except ModelNotReadyError:
+                if time.monotonic() > deadline or self._stopping.wait(1.0):
+                    raise
+
+    def _cancelled(self, job: Dict[str, Any]) -> bool:
+        if self._stopping.is_set():
+            return True
+        if (self._dir(job["id"]) / "cancel").exists():
+            job.update(status=CANCELLED, finished_at=time.time())
+            self._save(job)
+            self._cleanup(job["id"], keep_result=False)
+            return True
+        return False
+
+    def run(self, job_id: str) -> Dict[str, Any]:
+        """Ejecuta (o retoma) el job hasta terminar; idempotente por chunk."""
+        job = self.get(job_id)
+        if job["status"] in FINISHED:
+            return job
+        pipeline, meta = self._model(job)
+        threshold = float(meta.get("best_threshold_f1", 0.5))
+        version = meta.get("model_version")
+        if job.get("model_version") not in (None, version):
+            logger.warning(f"Job {job_id} se retoma con otra versión del modelo: {version}")
+            job["resumed_with_version"] = version
+        job.setdefault("model_version", version)
+        job.update(threshold=threshold, columns=meta.get("columns"), dtypes=meta.get("dtypes"))
+
+        path = self._dir(job_id)
+        if not (path / "input.parquet").exists():
+            job["status"] = PREPARING
+            self._save(job)
+            self._prepare(job)
+        if self._cancelled(job):
+            return job
+
+        import pyarrow.parquet as pq
+
+        n_chunks = pq.ParquetFile(path / "input.parquet").num_row_groups
+        job.update(status=RUNNING, chunks=n_chunks, started_at=job["started_at"] or time.time())
+        self._save(job)
+        todo = [i for i in range(n_chunks) if not self._chunk_path(job_id, i).exists()]
+        with self._lock:
+            if self._chunks is None:
+                self._chunks = ThreadPoolExecutor(self.workers, thread_name_prefix="job-chunk")
+
+        # Como mucho 2 chunks por hilo en vuelo: la cancelación corta sin encolar todo.
+        pending = set()
+        for i in todo:
+            if len(pending) >= 2 * self.workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self._progress(job, done)
+                if self._cancelled(job):
+                    return job
+            pending.add(self._chunks.submit(self._score_chunk, job, pipeline, threshold, i))
+        done, _ = wait(pending)
+        self._progress(job, done)
+        if self._cancelled(job):
+            return job
+
+        self._finish(job)
+        return job
+
+    def _progress(self, job: Dict[str, Any], done) -> None:
+        for f in done:
+            f.result()  # propaga el error del chunk
+        files = list((self._dir(job["id"]) / "chunks").glob("*.parquet"))
+        job["chunks_done"] = len(files)
+        job["rows_done"] = min(job["rows"], job["chunks_done"] * job["chunk_rows"])
+        self._save(job)
+
+    def _chunk_path(self, job_id: str, i: int) -> Path:
+        return self._dir(job_id) / "chunks" / f"{i:05d}.parquet"
+
+    def _prepare(self, job: Dict[str, Any]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self._dir(job["id"])
+        upload = path / f"upload.{job['format']}"
+        cols = list(dict.fromkeys((job["columns"] or []) + job["id_columns"]))
+        if job["format"] == "csv":
+            import pyarrow.csv as pacsv
+
+            types = {
+                c: pa.float64() if t == NUMBER else pa.string()
+                for c, t in (job["dtypes"] or {}).items()
+            }
+            types.update({c: pa.string() for c in job["id_columns"]})
+            reader = pacsv.open_csv(
+                upload,
+                read_options=pacsv.ReadOptions(encoding=job["encoding"], block_size=1 << 22),
+                parse_options=pacsv.ParseOptions(delimiter=job["sep"]),
+                convert_options=pacsv.ConvertOptions(
+                    column_types=types,
+                    include_columns=cols or None,
+                    include_missing_columns=True,
+                    strings_can_be_null=True,
+                ),
+            )
+        else:
+            source = pq.ParquetFile(upload)
+            present = set(source.schema_arrow.names)
+            reader = source.iter_batches(
+                batch_size=job["chunk_rows"], columns=[c for c in cols if c in present] or None
+            )
+
+        rows = 0
+        tmp = path / "input.parquet.tmp"
+        writer = None
+        try:
+            for table in _rechunk(reader, job["chunk_rows"]):
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, table.schema)
+                writer.write_table(table, row_group_size=job["chunk_rows"])
+                rows += table.num_rows
+            if writer is None:
+                raise ValueError("El archivo no tiene filas.")
+        finally:
+            if writer is not None:
+                writer.close()
+        tmp.replace(path / "input.parquet")
+        upload.unlink(missing_ok=True)
+        job["rows"] = rows
+        self._save(job)
+        logger.info(f"Job {job['id']}: {rows} filas preparadas")
+
+    def _score_chunk(self, job: Dict[str, Any], pipeline, threshold: float, i: int) -> int:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pq.ParquetFile(self._dir(job["id"]) / "input.parquet").read_row_group(i)
+        X = align_table(table, job["columns"]) if job["columns"] else table.to_pandas()
+        probas = predict_scores(pipeline, X)
+        first = i * job["chunk_rows"]
+        out = {"fila": pa.array(np.arange(first, first + len(probas), dtype=np.int64))}
+        for c in job["id_columns"]:
+            if c in table.column_names:
+                out[c] = table.column(c)
+        out["proba"] = pa.array(probas, type=pa.float64())
+        out["riesgoso"] = pa.array(probas >= threshold)
+        target = self._chunk_path(job["id"], i)
+        tmp = target.with_suffix(".tmp")
+        pq.write_table(pa.table(out), tmp)
+        tmp.replace(target)
+        return len(probas)
+
+    def _finish(self, job: Dict[str, Any]) -> None:
+        import pyarrow.parquet as pq
+
+        path = self._dir(job["id"])
+        tmp = path / "result.parquet.tmp"
+        writer = None
+        for i in range(job["chunks"]):
+            table = pq.read_table(self._chunk_path(job["id"], i))
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+        writer.close()
+        tmp.replace(path / "result.parquet")
+        self._cleanup(job["id"], keep_result=True)
+        job.update(
+            status=DONE,
+            rows_done=job["rows"],
+            finished_at=time.time(),
+            result_bytes=(path / "result.parquet").stat().st_size,
+        )
+        self._save(job)
+        logger.info(f"Job {job['id']} terminado: {job['rows']} filas")
+
+    def _cleanup(self, job_id: str, keep_result: bool) -> None:
+        path = self._dir(job_id)
+        shutil.rmtree(path / "chunks", ignore_errors=True)
+        for name in ("input.parquet", "upload.csv", "upload.parquet", "cancel"):
+            (path / name).unlink(missing_ok=True)
+        if not keep_result:
+            (path / "result.parquet").unlink(missing_ok=True)
+
+    # -- ciclo de vida -------------------------------------------------------------------
+
+    def resume(self) -> List[str]:
+        """Retoma los jobs sin terminar y borra los terminados hace más de `keep_hours`."""
+        if not self.directory.exists():
+            return []
+        resumed = []
+        now = time.time()
+        for p in sorted(self.directory.iterdir()):
+            if not _ID_RE.match(p.name):
+                continue
+            try:
+                job = self.get(p.name)
+            except JobNotFoundError:
+                continue
+            if job["status"] in FINISHED:
+                if self.keep_hours > 0 and now - job["updated_at"] > self.keep_hours * 3600:
+                    shutil.rmtree(p, ignore_errors=True)
+                continue
+            # Un job queued sin subida completa quedó a medio recibir: no se puede retomar.
+            if not (p / f"upload.{job['format']}").exists() and not (p / "input.parquet").exists():
+                continue
+            self.start(job["id"])
+            resumed.append(job["id"])
+        if resumed:
+            logger.info(f"Jobs retomados: {resumed}")
+        return resumed
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for executor in (self._runners, self._chunks):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._runners = self._chunks = None
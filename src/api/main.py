@@ -1,16 +1,91 @@
-import json
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Literal, Optional
 
-import joblib
-import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
-from src.api.deps import get_model_and_meta
+from src.api import deps
+from src.api.arrow_io import (
+    ARROW_STREAM,
+    PARQUET,
+    ArrowDecodeError,
+    align_table,
+    media_type,
+    read_table,
+    write_table,
+)
+from src.api.batching import MicroBatcher
+from src.api.catalog import ModelRouteMiddleware, UnknownModelError
+from src.api.executor import PoolSaturatedError
+from src.api.inference import align_columns, align_rows, predict_scores
+from src.api.metrics import BATCH_ROWS, MICROBATCH_ROWS, STAGE_SECONDS, MetricsMiddleware
+from src.api.profiling import ProfilingMiddleware, annotate
+from src.api.registry import ModelNotReadyError
+from src.api.routes.admin import router as admin_router
 from src.api.routes.health import router as health_router
-from src.api.schemas import BatchPredictRequest, PredictBatchResponse, PredictResponse
+from src.api.routes.jobs import router as jobs_router
+from src.api.routes.metrics import router as metrics_router
+from src.api.schemas import (
+    BatchPredictRequest,
+    ColumnarPredictRequest,
+    PredictArrayResponse,
+    PredictBatchResponse,
+    PredictRequest,
+    PredictResponse,
+    request_adapters,
+)
+from src.api.serialization import CompressionMiddleware, FastJSONResponse, round_proba
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _predict_batch(X, pipeline):
+    MICROBATCH_ROWS.observe(len(X))
+    return predict_scores(pipeline, X)
+
+
+# Requests pequeñas concurrentes se agrupan en una sola llamada a predict_proba,
+# ejecutada (como todo el cómputo) en el pool acotado de inferencia. Cada request pasa el
+# pipeline que tomó al inicio (el de su meta y versión): durante un swap no se mezclan.
+batcher = MicroBatcher(
+    _predict_batch,
+    deps.BATCH_MAX_SIZE,
+    deps.BATCH_MAX_WAIT_MS,
+    runner=deps.inference_pool.run,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Carga única del modelo al arrancar el worker, en un hilo: joblib + sklearn/xgboost
+    # tardan ~1 s y el worker ya acepta conexiones (503 + Retry-After hasta que esté listo).
+    # /health reporta el estado (loading/ready/failed) y el error si falla. Si el master de
+    # gunicorn ya lo precargó, aquí solo se calienta (después del fork).
+    deps.registry.load_async()
+    # El hilo vigía se arranca en cada worker (los hilos no sobreviven al fork). Con el
+    # modelo precargado solo sigue la versión publicada por /admin: recargar por cambios en
+    # models/ dejaría una copia privada en cada worker y se perdería el copy-on-write.
+    deps.registry.start_watcher(deps.MODEL_WATCH_INTERVAL, watch_files=not deps.registry.preloaded)
+    deps.profiler.start()
+    # El challenger de shadow se carga desde el inicio; los demás modelos, al primer uso.
+    if deps.shadow.enabled:
+        deps.catalog.load_async(deps.SHADOW_MODEL)
+    # Jobs de scoring que quedaron sin terminar (reinicio o caída del worker).
+    deps.jobs.resume()
+    yield
+    await batcher.stop()
+    deps.registry.stop_watcher()
+    deps.profiler.stop()
+    deps.shadow.stop()
+    deps.jobs.stop()
+
 
-app = FastAPI(title="Detección de Riesgos de Corrupción", version="1.0.0")
+app = FastAPI(title="Detección de Riesgos de Corrupción", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,11 +94,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=deps.COMPRESS_MIN_BYTES,
+    gzip_level=deps.GZIP_LEVEL,
+    brotli_quality=deps.BROTLI_QUALITY,
+)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware, profiler=deps.profiler)
+# El último agregado corre primero: /models/{nombre}/... ya llega reescrito a los demás.
+app.add_middleware(ModelRouteMiddleware)
 app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
+app.include_router(jobs_router)
+
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 
-pipe = joblib.load("models/pipeline.pkl")
-meta = json.load(open("models/pipeline_meta.json"))
-THR = meta.get("best_threshold_f1", 0.5)
+@app.exception_handler(ModelNotReadyError)
+async def model_not_ready_handler(request: Request, exc: ModelNotReadyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(UnknownModelError)
+async def unknown_model_handler(request: Request, exc: UnknownModelError):
+    return JSONResponse(status_code=404, content={"detail": exc.args[0]})
 
 
 class Item(BaseModel):
@@ -35,45 +134,295 @@ class Item(BaseModel):
     pass
 
 
-@app.post("/predict_proba", response_model=PredictBatchResponse, tags=["predict"])
-def predict_proba(req: BatchPredictRequest):
-    pipeline, meta = get_model_and_meta()
-
+def _columns_and_threshold(meta: dict):
     cols_meta = meta.get("columns")
     threshold = float(meta.get("best_threshold_f1", 0.5))
     if not cols_meta or not isinstance(cols_meta, list):
         raise HTTPException(status_code=500, detail="Meta sin columnas válidas.")
+    return cols_meta, threshold
+
+
+def _selected_model(request: Request) -> Optional[str]:
+    """Modelo pedido con X-Model (o /models/{nombre}/...); None = modelo principal."""
+    name = request.headers.get("x-model")
+    return None if not name or name == deps.MODEL_NAME else name
+
+
+def _cached_scores(pipeline, X, version):
+    """predict_scores solo para las filas que no están en la cache de predicciones."""
+    return deps.prediction_cache.predict(version, X, partial(predict_scores, pipeline))
+
+
+def _dataframe(data):
+    import pandas as pd
+
+    return pd.DataFrame(data)
+
+
+def _stage(name: str):
+    return STAGE_SECONDS.time(stage=name)
+
+
+def _observe_rows(path: str, rows: int, cols=None) -> None:
+    BATCH_ROWS.observe(rows, path=path)
+    annotate(rows=rows, cols=len(cols) if cols is not None else None)
+
+
+def _rows_scores(pipeline, filas, cols, version):
+    with _stage("alignment"):
+        X = align_rows(filas, cols)
+    return _cached_scores(pipeline, X, version)
+
+
+def _align_columnar(req: ColumnarPredictRequest, cols):
+    if req.columns is not None:
+        return align_columns(req.columns, cols)
+    return align_rows(req.filas, cols)
+
+
+def _columnar_scores(pipeline, req: ColumnarPredictRequest, cols, version):
+    with _stage("alignment"):
+        X = _align_columnar(req, cols)
+    return _cached_scores(pipeline, X, version)
+
+
+def _submit(pipeline, X):
+    return batcher.submit(X, pipeline)
+
+
+async def _score_rows(pipeline, filas, cols, version, batched: bool = True):
+    """
+    Lotes pequeños -> micro-batcher (solo el modelo principal); lotes grandes u otros
+    modelos -> una tarea en el pool de inferencia.
+    """
+    if batched and len(filas) < batcher.max_batch_size:
+        with _stage("alignment"):
+            X = align_rows(filas, cols)
+        return await deps.prediction_cache.apredict(version, X, partial(_submit, pipeline))
+    return await deps.inference_pool.run(_rows_scores, pipeline, filas, cols, version)
 
-    # Alinear columnas: faltantes -> NaN; extras -> se ignoran
-    aligned = []
-    for i, row in enumerate(req.filas):
-        aligned.append({c: row.get(c, None) for c in cols_meta})
 
-    X = pd.DataFrame(aligned)[cols_meta]
+def _challenger_scores(align, data):
+    pipeline, meta = deps.catalog.get(deps.SHADOW_MODEL)
+    X = align(data, meta.get("columns"))
+    threshold = float(meta.get("best_threshold_f1", 0.5))
+    return predict_scores(pipeline, X), threshold, meta.get("model_version")
+
+
+def _shadow(name, path: str, align, data, probas, threshold: float, meta: dict) -> None:
+    """
+    Encola el shadow scoring de las filas que respondió el modelo principal; align(data,
+    columnas) las alinea a las columnas del challenger. No bloquea la respuesta.
+    """
+    if name is None and deps.shadow.should_sample():
+        score_fn = partial(_challenger_scores, align, data)
+        deps.shadow.submit(path, score_fn, probas, threshold, meta.get("model_version"))
+
+
+@app.post("/predict", response_model=PredictResponse, tags=["predict"])
+async def predict(req: PredictRequest, request: Request):
+    name = _selected_model(request)
+    pipeline, meta = deps.get_model(name)
+    cols_meta, threshold = _columns_and_threshold(meta)
+    version = meta.get("model_version")
+
+    with _stage("alignment"):
+        X = align_rows([req.features], cols_meta)
+    if name is None:
+        scores = await deps.prediction_cache.apredict(version, X, partial(_submit, pipeline))
+    else:
+        scores = await deps.inference_pool.run(_cached_scores, pipeline, X, version)
+    p = float(scores[0])
+    _observe_rows("/predict", 1, cols_meta)
+    _shadow(name, "/predict", align_rows, [req.features], scores, threshold, meta)
+    riesgoso = p >= threshold
+    if deps.PROBA_DECIMALS is not None:
+        p = round(p, deps.PROBA_DECIMALS)
+    return _json_response({"proba": p, "threshold": threshold, "riesgoso": riesgoso})
+
+
+def _parse_json(adapter, body: bytes):
+    try:
+        with _stage("parse"):
+            return adapter.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+def _json_response(content) -> FastJSONResponse:
+    """Serializa la respuesta dentro del handler para medir la etapa 'serialization'."""
+    with _stage("serialization"):
+        return FastJSONResponse(content)
+
+
+def _array_response(probas, threshold: float) -> FastJSONResponse:
+    return _json_response(
+        {
+            "threshold": threshold,
+            "proba": round_proba(probas, deps.PROBA_DECIMALS),
+            "riesgoso": probas >= threshold,
+        }
+    )
+
+
+def _binary_body_doc(schema: dict) -> dict:
+    """Documenta en OpenAPI el cuerpo JSON y las variantes Arrow IPC / Parquet."""
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": schema}, ARROW_STREAM: binary, PARQUET: binary},
+        }
+    }
+
+
+def _align_table(data, cols):
+    body, mt = data
+    table = read_table(body, mt)
+    return align_table(table, cols) if cols is not None else table.to_pandas()
+
+
+def _table_scores(pipeline, body: bytes, mt: str, cols, version):
+    with _stage("parse"):
+        table = read_table(body, mt)
+    with _stage("alignment"):
+        X = align_table(table, cols) if cols is not None else table.to_pandas()
+    return _cached_scores(pipeline, X, version)
+
+
+async def _score_binary(pipeline, body: bytes, mt: str, cols, version):
     try:
-        probas = pipeline.predict_proba(X)[:, 1]
-    except AttributeError:
-        # Si es un pipeline de decision_function:
-        scores = pipeline.decision_function(X)
-        probas = (scores - scores.min()) / (scores.max() - scores.min() + 1e-9)
-
-    resultados = []
-    for p in probas:
-        resultados.append(
-            PredictResponse(
-                proba=float(p),
-                threshold=threshold,
-                riesgoso=bool(p >= threshold),
-            )
+        return await deps.inference_pool.run(_table_scores, pipeline, body, mt, cols, version)
+    except ArrowDecodeError as e:
+        raise HTTPException(status_code=422, detail=f"Cuerpo {mt} inválido: {e}")
+
+
+def _binary_response(data: dict, mt: str, threshold: float) -> Response:
+    with _stage("serialization"):
+        body = write_table(_dataframe(data), mt)
+    return Response(body, media_type=mt, headers={"X-Threshold": str(threshold)})
+
+
+_BATCH_REQUEST = TypeAdapter(BatchPredictRequest)
+_BATCH_PAYLOAD = TypeAdapter(list[dict])
+_COLUMNAR_REQUEST = TypeAdapter(ColumnarPredictRequest)
+_DEFAULT_ADAPTERS = (_BATCH_REQUEST, _COLUMNAR_REQUEST)
+
+
+@app.post(
+    "/predict_proba",
+    response_model=PredictBatchResponse,
+    tags=["predict"],
+    openapi_extra=_binary_body_doc(BatchPredictRequest.model_json_schema()),
+)
+async def predict_proba(request: Request, formato: Literal["objetos", "arreglos"] = "objetos"):
+    """
+    Acepta JSON ({"filas": [...]}) o una tabla Arrow IPC / Parquet (Content-Type).
+    Con Accept Arrow/Parquet responde una tabla con columnas 'proba' y 'riesgoso'; con
+    formato=arreglos, JSON con arreglos paralelos como /predict_proba/columnar.
+    """
+    name = _selected_model(request)
+    pipeline, meta = deps.get_model(name)
+    cols_meta, threshold = _columns_and_threshold(meta)
+    version = meta.get("model_version")
+
+    in_mt = media_type(request.headers.get("content-type"))
+    if in_mt:
+        body = await request.body()
+        probas = await _score_binary(pipeline, body, in_mt, cols_meta, version)
+        align, data = _align_table, (body, in_mt)
+    else:
+        adapter, _ = request_adapters(meta, _DEFAULT_ADAPTERS)
+        req = _parse_json(adapter, await request.body())
+        # Alinear columnas: faltantes -> NaN; extras -> se ignoran
+        probas = await _score_rows(pipeline, req.filas, cols_meta, version, batched=name is None)
+        align, data = align_rows, req.filas
+    _observe_rows("/predict_proba", len(probas), cols_meta)
+    _shadow(name, "/predict_proba", align, data, probas, threshold, meta)
+
+    out_mt = media_type(request.headers.get("accept"))
+    if out_mt:
+        return _binary_response({"proba": probas, "riesgoso": probas >= threshold}, out_mt, threshold)
+    if formato == "arreglos":
+        return _array_response(probas, threshold)
+
+    # Un objeto por fila, pero serializado por columnas (DataFrame.to_json) y no en Python.
+    resultados = _dataframe(
+        {
+            "proba": round_proba(probas, deps.PROBA_DECIMALS),
+            "threshold": threshold,
+            "riesgoso": probas >= threshold,
+        }
+    )
+    return _json_response({"resultados": resultados})
+
+
+@app.post(
+    "/predict_proba/columnar",
+    response_model=PredictArrayResponse,
+    tags=["predict"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": ColumnarPredictRequest.model_json_schema()}},
+        }
+    },
+)
+async def predict_proba_columnar(request: Request):
+    """
+    Variante vectorizada de /predict_proba: arma la matriz alineada en una sola pasada
+    y responde con arreglos paralelos 'proba'/'riesgoso' (sin un objeto por fila).
+    """
+    name = _selected_model(request)
+    pipeline, meta = deps.get_model(name)
+    cols_meta, threshold = _columns_and_threshold(meta)
+    _, adapter = request_adapters(meta, _DEFAULT_ADAPTERS)
+    req = _parse_json(adapter, await request.body())
+
+    try:
+        probas = await deps.inference_pool.run(
+            _columnar_scores, pipeline, req, cols_meta, meta.get("model_version")
         )
-    return PredictBatchResponse(resultados=resultados)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    _observe_rows("/predict_proba/columnar", len(probas), cols_meta)
+    _shadow(name, "/predict_proba/columnar", _align_columnar, req, probas, threshold, meta)
+    return _array_response(probas, threshold)
 
 
-@app.post("/predict_batch")
-def predict_batch(payload: list[dict]):
-    import pandas as pd
+def _batch_scores(pipe, payload, version):
+    with _stage("alignment"):
+        X = _dataframe(payload)
+    return _cached_scores(pipe, X, version)
+
+
+@app.post(
+    "/predict_batch",
+    openapi_extra=_binary_body_doc({"type": "array", "items": {"type": "object"}}),
+)
+async def predict_batch(request: Request):
+    name = _selected_model(request)
+    pipe, meta = deps.get_model(name)
+    thr = float(meta.get("best_threshold_f1", 0.5))
+    version = meta.get("model_version")
+
+    in_mt = media_type(request.headers.get("content-type"))
+    if in_mt:
+        body = await request.body()
+        probas = await _score_binary(pipe, body, in_mt, None, version)
+        align, data = _align_table, (body, in_mt)
+    else:
+        payload = _parse_json(_BATCH_PAYLOAD, await request.body())
+        probas = await deps.inference_pool.run(_batch_scores, pipe, payload, version)
+        align, data = align_rows, payload
+    labels = (probas >= thr).astype(int)
+    _observe_rows("/predict_batch", len(probas))
+    # El challenger recibe las filas alineadas a sus columnas.
+    _shadow(name, "/predict_batch", align, data, probas, thr, meta)
 
-    X = pd.DataFrame(payload)
-    probas = pipe.predict_proba(X)[:, 1]
-    labels = (probas >= THR).astype(int)
-    return {"probas": probas.tolist(), "labels": labels.tolist(), "threshold": THR}
+    out_mt = media_type(request.headers.get("accept"))
+    if out_mt:
+        return _binary_response({"probas": probas, "labels": labels}, out_mt, thr)
+    return _json_response(
+        {"probas": round_proba(probas, deps.PROBA_DECIMALS), "labels": labels, "threshold": thr}
+    )
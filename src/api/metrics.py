@@ -0,0 +1,256 @@
+"""
+Métricas de la API en formato de exposición de Prometheus (text/plain 0.0.4), sin
+dependencias externas. Los valores son por proceso: con gunicorn cada worker expone los suyos.
+
+Etapas de /predict*:  parse -> alignment -> preprocessing -> model -> serialization
+(ver STAGE_SECONDS); con los backends compiled/onnx el preprocesamiento va plegado en "model".
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+DIFF_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+ROWS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000, 50000, 100000)
+
+Labels = Tuple[str, ...]
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Labels:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> Iterable[str]:  # pragma: no cover - interfaz
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        out.extend(self.samples())
+        return out
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_fmt(v)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Por serie: conteos por bucket (no acumulados), suma y total.
+        self._series: Dict[Labels, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def observe_many(self, values, **labels: str) -> None:
+        """observe() de un arreglo entero de una vez (p.ej. una diferencia por fila)."""
+        import numpy as np
+
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        counts = np.bincount(
+            np.searchsorted(self.buckets, values, side="left"), minlength=len(self.buckets) + 1
+        )
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for i, c in enumerate(counts.tolist()):
+                series[0][i] += c
+            series[1] += float(values.sum())
+            series[2] += len(values)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2]) for k, s in self._series.items()]
+        for key, counts, total, n in items:
+            acc = 0
+            for le, c in zip(self.buckets + (math.inf,), counts):
+                acc += c
+                labels = _labels(self.labelnames, key, f'le="{_fmt(le)}"')
+                yield f"{self.name}_bucket{labels} {acc}"
+            base = _labels(self.labelnames, key)
+            yield f"{self.name}_sum{base} {_fmt(total)}"
+            yield f"{self.name}_count{base} {n}"
+
+
+class MetricsRegistry:
+    """Conjunto de métricas + colectores que leen estado ya existente al exponer."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], Iterable[_Metric]]) -> None:
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        for fn in self._collectors:
+            for m in fn():
+                lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter("http_requests_total", "Requests HTTP atendidas.", ("method", "path", "status"))
+)
+HTTP_LATENCY = REGISTRY.register(
+    Histogram("http_request_duration_seconds", "Latencia total por endpoint.", ("method", "path"))
+)
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge("http_requests_in_flight", "Requests HTTP en curso."))
+HTTP_IN_FLIGHT.set(0)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "predict_stage_seconds",
+        "Latencia por etapa: parse, alignment, preprocessing, model, serialization.",
+        ("stage",),
+    )
+)
+BATCH_ROWS = REGISTRY.register(
+    Histogram("predict_batch_rows", "Filas por request de predicción.", ("path",), ROWS_BUCKETS)
+)
+MICROBATCH_ROWS = REGISTRY.register(
+    Histogram(
+        "predict_microbatch_rows", "Filas por llamada agrupada al modelo.", (), ROWS_BUCKETS
+    )
+)
+SHADOW_REQUESTS = REGISTRY.register(
+    Counter(
+        "shadow_requests_total",
+        "Requests puntuadas en shadow por resultado (ok, skipped, dropped, error).",
+        ("model", "result"),
+    )
+)
+SHADOW_ABS_DIFF = REGISTRY.register(
+    Histogram(
+        "shadow_abs_diff",
+        "Diferencia absoluta por fila entre la probabilidad del challenger y la principal.",
+        ("model",),
+        DIFF_BUCKETS,
+    )
+)
+SHADOW_DISAGREEMENTS = REGISTRY.register(
+    Counter(
+        "shadow_disagreements_total",
+        "Filas en que challenger y modelo principal difieren en 'riesgoso'.",
+        ("model",),
+    )
+)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI (sin BaseHTTPMiddleware) que cuenta requests, mide latencia total y
+    mantiene el gauge de requests en curso. La etiqueta `path` es la plantilla de la ruta
+    (scope["route"]) para no disparar la cardinalidad; lo que no enruta queda como "other".
+    """
+
+    def __init__(self, app, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "other"
+            method = scope.get("method", "")
+            HTTP_LATENCY.observe(time.perf_counter() - t0, method=method, path=path)
+            HTTP_REQUESTS.inc(method=method, path=path, status=str(status["code"]))
@@ -0,0 +1,280 @@
+"""
+Perfilado por request con muestreo de pilas (sin dependencias externas).
+
+Un hilo muestrea cada `interval_ms` las pilas de todos los hilos del proceso
+(sys._current_frames) y guarda las de los últimos `window_s` segundos en un buffer
+circular. Al terminar una request, ProfilingMiddleware decide si se guarda su perfil: una
+fracción aleatoria (`sample_rate`) o cualquiera que supere `slow_ms`. Como el muestreo ya
+estaba corriendo, también se capturan las requests lentas que no se sabía que lo serían.
+
+El perfil son las pilas "colapsadas" (frame;frame;frame -> muestras) de la ventana de la
+request, incluidas las de los hilos del pool de inferencia donde corren alineación,
+ColumnTransformer y estimador; con mucha concurrencia se mezclan otras requests. Se guarda
+como JSON bajo logs/profiles/ con la forma de la request (ruta, tamaño del cuerpo, filas y
+columnas si el endpoint las anotó) y se sirve en /admin/profiles.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Hojas de pila de hilos ociosos (pool esperando tareas, event loop en select).
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+_NAME_RE = re.compile(r"^[0-9]{13}_[A-Za-z0-9_-]+_[0-9]+ms\.json$")
+
+_shape: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "profile_shape", default=None
+)
+
+
+def annotate(**fields: Any) -> None:
+    """Agrega datos de forma (p.ej. rows, cols) al perfil de la request en curso."""
+    shape = _shape.get()
+    if shape is not None:
+        shape.update(fields)
+
+
+class StackSampler:
+    def __init__(self, interval_ms: float = 10.0, window_s: float = 60.0):
+        self.interval = interval_ms / 1000.0
+        self.window = window_s
+        self._samples: Deque[Tuple[float, Tuple[str, ...]]] = deque()
+        self._labels: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _stack(self, frame) -> Optional[Tuple[str, ...]]:
+        if os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+            return None
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        return tuple(self._label(c) for c in reversed(codes))
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            stacks = [
+                s
+                for tid, frame in sys._current_frames().items()
+                if tid != me and (s := self._stack(frame)) is not None
+            ]
+            with self._lock:
+                for s in stacks:
+                    self._samples.append((now, s))
+                while self._samples and self._samples[0][0] < now - self.window:
+                    self._samples.popleft()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def collapsed(self, t0: float, t1: float) -> Counter:
+        with self._lock:
+            window = [s for t, s in self._samples if t0 <= t <= t1]
+        return Counter(";".join(s) for s in window)
+
+
+class ProfileStore:
+    def __init__(self, directory: Path, max_files: int = 200):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def save(self, record: Dict[str, Any]) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", record["request"]["path"]).strip("-") or "root"
+        name = f"{int(record['started_at'] * 1000)}_{slug}_{int(record['duration_ms'])}ms.json"
+        path = self.directory / name
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(record), encoding="utf-8")
+        tmp.replace(path)
+        for old in self._files()[self.max_files :]:
+            old.unlink(missing_ok=True)
+        return path
+
+    def _files(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        files = [p for p in self.directory.iterdir() if _NAME_RE.match(p.name)]
+        return sorted(files, key=lambda p: p.name, reverse=True)
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        out = []
+        for p in self._files()[:limit]:
+            ts, _, rest = p.name.partition("_")
+            slug, _, dur = rest.rpartition("_")
+            out.append(
+                {
+                    "name": p.name,
+                    "started_at": int(ts) / 1000.0,
+                    "path": slug,
+                    "duration_ms": int(dur[: -len("ms.json")]),
+                    "bytes": p.stat().st_size,
+                }
+            )
+        return out
+
+    def path(self, name: str) -> Optional[Path]:
+        """Ruta del perfil `name` (solo nombres generados por save(); None si no existe)."""
+        if not _NAME_RE.match(name):
+            return None
+        p = self.directory / name
+        return p if p.exists() else None
+
+
+class Profiler:
+    """Configuración + sampler + almacén; `enabled` si hay fracción de muestreo o umbral."""
+
+    def __init__(
+        self,
+        directory: Path,
+        sample_rate: float = 0.0,
+        slow_ms: float = 0.0,
+        interval_ms: float = 10.0,
+        window_s: float = 60.0,
+        max_files: int = 200,
+    ):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.sampler = StackSampler(interval_ms, window_s)
+        self.store = ProfileStore(directory, max_files)
+        self.saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.slow_ms > 0
+
+    def start(self) -> None:
+        if self.enabled:
+            self.sampler.start()
+
+    def stop(self) -> None:
+        self.sampler.stop()
+
+    def should_keep(self, duration_ms: float) -> Optional[str]:
+        if self.slow_ms > 0 and duration_ms >= self.slow_ms:
+            return "slow"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def record(self, shape: Dict[str, Any], t0: float, t1: float, started_at: float, reason: str):
+        stacks = self.sampler.collapsed(t0, t1)
+        record = {
+            "started_at": started_at,
+            "duration_ms": (t1 - t0) * 1000.0,
+            "reason": reason,
+            "request": shape,
+            "interval_ms": self.sampler.interval * 1000.0,
+            "samples": sum(stacks.values()),
+            "stacks": dict(stacks.most_common()),
+        }
+        self.store.save(record)
+        self.saved += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self.sampler.running,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "saved": self.saved,
+            "directory": str(self.store.directory),
+        }
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for k, v in scope.get("headers", ()):
+        if k == name:
+            return v.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI: guarda el perfil de las requests muestreadas o lentas."""
+
+    def __init__(self, app, profiler: Profiler, exclude: Sequence[str] = ("/admin", "/metrics")):
+        self.app = app
+        self.profiler = profiler
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not self.profiler.sampler.running
+            or scope["path"].startswith(self.exclude)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        shape = {
+            "method": scope.get("method"),
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "content_type": _header(scope, b"content-type"),
+            "content_length": _header(scope, b"content-length"),
+        }
+        token = _shape.set(shape)
+        started_at = time.time()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            t1 = time.perf_counter()
+            _shape.reset(token)
+            reason = self.profiler.should_keep((t1 - t0) * 1000.0)
+            if reason is not None:
+                shape["status"] = status["code"]
+                # Escritura fuera del event loop; un fallo no afecta la respuesta.
+                asyncio.get_running_loop().run_in_executor(
+                    None, self._record, shape, t0, t1, started_at, reason
+                )
+
+    def _record(self, *args) -> None:
+        try:
+            self.profiler.record(*args)
+        except Exception as e:
+            logger.error(f"No se pudo guardar el perfil: {e}")
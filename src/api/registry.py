@@ -0,0 +1,453 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.api.inference import predict_scores
+from src.api.schemas import column_dtypes
+from src.api.serving import limit_n_jobs
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ModelNotFoundError(RuntimeError): ...
+
+
+class MetaNotFoundError(RuntimeError): ...
+
+
+class RollbackUnavailableError(RuntimeError): ...
+
+
+class ModelNotReadyError(RuntimeError): ...
+
+
+def _synthetic(dtype: Optional[str], n: int, rng) -> np.ndarray:
+    """Columna sintética para el calentamiento: numéricas con ~10% de NaN, categóricas NaN."""
+    if dtype == "string":
+        return np.full(n, np.nan, dtype=object)
+    values = rng.normal(size=n)
+    values[rng.random(n) < 0.1] = np.nan
+    return values
+
+
+# Estados de carga del registro (ver ModelRegistry.state).
+IDLE, LOADING, WARMING, READY, FAILED = "idle", "loading", "warming", "ready", "failed"
+
+
+def _rss_bytes() -> Optional[int]:
+    """Memoria residente del proceso (Linux); None si no está disponible."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _checksum(*paths: Path) -> str:
+    """sha256 del par de artefactos (pipeline + meta), leído por bloques."""
+    h = hashlib.sha256()
+    for p in paths:
+        with open(p, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+@dataclass
+class ModelBundle:
+    pipeline: Any
+    meta: Dict[str, Any]
+    version: str
+    load_seconds: float
+    file_bytes: int
+    rss_delta_bytes: Optional[int]
+    loaded_at: float = field(default_factory=time.time)
+    pid: int = field(default_factory=os.getpid)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Estimación de memoria del modelo: delta de RSS al cargar (o el tamaño del .pkl)."""
+        return max(self.rss_delta_bytes or 0, self.file_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "load_seconds": round(self.load_seconds, 4),
+            "file_bytes": self.file_bytes,
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    """
+    Registro único de artefactos del modelo por proceso.
+    El pipeline y su meta se deserializan una sola vez y se comparten entre endpoints.
+
+    Con mmap_mode="r" los atributos ndarray simples del pickle de joblib (coeficientes,
+    estadísticos del imputer/scaler) quedan respaldados por el archivo en modo solo lectura y
+    todos los workers comparten las mismas páginas físicas. Los árboles de sklearn
+    (Tree.__setstate__ copia los nodos) y los boosters de XGBoost (buffer serializado) se
+    cargan igual en memoria propia de cada proceso; el artefacto compilado
+    (scripts/export_compiled_model.py) guarda esos nodos como ndarray planos y sí se mapea.
+
+    El modelo vive en un "slot" versionado por checksum: reload() carga y calienta el par
+    pipeline.pkl + pipeline_meta.json nuevo fuera del slot y luego lo intercambia con una
+    sola asignación. Cada request toma su bundle al inicio, así que las requests en curso
+    terminan con la versión anterior. La versión previa se conserva para rollback().
+
+    Con varios workers cada proceso tiene su propio slot. publish() escribe la versión
+    servida en `active_path` (reemplazo atómico) y el vigía de cada worker la sigue
+    (follow_active: rollback si es su versión previa, reload si no), así un reload/rollback
+    por /admin llega a todos en un intervalo del vigía. Un worker que no tiene esa versión en
+    memoria ni en disco sigue con la suya y lo deja en el log.
+
+    `n_jobs` limita los hilos propios de los estimadores entrenados con n_jobs=-1 (ver
+    src/api/serving.py).
+
+    `adapter` transforma el objeto deserializado antes de servirlo (p.ej. el backend
+    "compiled" convierte el pipeline sklearn en un evaluador NumPy); `backend` lo identifica.
+
+    `state` es el estado de la primera carga: idle -> loading -> warming -> ready | failed.
+    load_async() (lifespan) carga y calienta el modelo con lotes sintéticos de
+    `warmup_sizes` filas antes de publicarlo: hasta entonces get() falla rápido con
+    ModelNotReadyError en lugar de bloquear al llamador y /readyz responde 503. En "idle" o
+    "failed", get() carga (o reintenta) en el momento, sin calentamiento. Un modelo precargado
+    sin calentar (master de gunicorn) se calienta en load_async() de cada worker.
+    """
+
+    def __init__(
+        self,
+        pipeline_path: Path,
+        meta_path: Path,
+        mmap_mode: Optional[str] = None,
+        adapter: Optional[Callable[[Any], Any]] = None,
+        backend: str = "sklearn",
+        warmup_sizes: Sequence[int] = (1,),
+        n_jobs: Optional[int] = None,
+        active_path: Optional[Path] = None,
+    ):
+        self.pipeline_path = Path(pipeline_path)
+        self.meta_path = Path(meta_path)
+        self.mmap_mode = mmap_mode
+        self.adapter = adapter
+        self.backend = backend
+        self.warmup_sizes = tuple(warmup_sizes)
+        self.n_jobs = n_jobs
+        self.active_path = Path(active_path) if active_path is not None else None
+        self._active_seen: Optional[str] = None
+        self._bundle: Optional[ModelBundle] = None
+        self._previous: Optional[ModelBundle] = None
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._watch_files = False
+        self._stop = threading.Event()
+        self._swap_listeners: List[Callable[[str], None]] = []
+        self.state = IDLE
+        self.error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._bundle is not None
+
+    @property
+    def preloaded(self) -> bool:
+        """El modelo servido se cargó en otro proceso (master de gunicorn) y llegó por fork."""
+        bundle = self._bundle
+        return bundle is not None and bundle.pid != os.getpid()
+
+    def _load_bundle(self) -> ModelBundle:
+        if not self.pipeline_path.exists():
+            raise ModelNotFoundError(f"No existe {self.pipeline_path}")
+        if not self.meta_path.exists():
+            raise MetaNotFoundError(f"No existe {self.meta_path}")
+
+        version = _checksum(self.pipeline_path, self.meta_path)
+        rss0 = _rss_bytes()
+        t0 = time.perf_counter()
+        import joblib  # importa sklearn/xgboost al deserializar: solo al cargar el modelo
+
+        pipeline = joblib.load(self.pipeline_path, mmap_mode=self.mmap_mode)
+        if self.n_jobs is not None:
+            limit_n_jobs(pipeline, self.n_jobs)
+        if self.adapter is not None:
+            pipeline = self.adapter(pipeline)
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        elapsed = time.perf_counter() - t0
+        rss1 = _rss_bytes()
+
+        # Meta antiguas no guardan 'columns' ni 'dtypes': se derivan del pipeline entrenado.
+        if not meta.get("columns") and hasattr(pipeline, "feature_names_in_"):
+            meta["columns"] = [str(c) for c in pipeline.feature_names_in_]
+        if not meta.get("dtypes"):
+            dtypes = column_dtypes(pipeline)
+            if dtypes is not None:
+                meta["dtypes"] = dtypes
+        meta["model_version"] = version
+
+        bundle = ModelBundle(
+            pipeline=pipeline,
+            meta=meta,
+            version=version,
+            load_seconds=elapsed,
+            file_bytes=self.pipeline_path.stat().st_size,
+            rss_delta_bytes=(rss1 - rss0) if rss0 is not None and rss1 is not None else None,
+        )
+        logger.info(f"Modelo {version} cargado desde {self.pipeline_path} en {elapsed:.3f}s")
+        return bundle
+
+    def _warm(self, bundle: ModelBundle) -> None:
+        """
+        Predicciones sobre lotes sintéticos de cada tamaño de `warmup_sizes` (inicialización
+        perezosa de sklearn/xgboost/ONNX Runtime y primeras reservas de memoria fuera del
+        camino de las requests). Los tiempos quedan en meta["warmup"]; si falla no se publica.
+        """
+        import pandas as pd
+
+        cols = bundle.meta.get("columns") or []
+        dtypes = bundle.meta.get("dtypes") or {}
+        rng = np.random.default_rng(0)
+        batches = []
+        for n in self.warmup_sizes:
+            X = pd.DataFrame({c: _synthetic(dtypes.get(c), n, rng) for c in cols})
+            t0 = time.perf_counter()
+            predict_scores(bundle.pipeline, X)
+            batches.append({"rows": n, "ms": round((time.perf_counter() - t0) * 1000.0, 3)})
+        bundle.meta["warmup"] = {
+            "batches": batches,
+            "total_ms": round(sum(b["ms"] for b in batches), 3),
+        }
+
+    def _pending(self, warm: bool) -> bool:
+        bundle = self._bundle
+        return bundle is None or (warm and "warmup" not in bundle.meta)
+
+    def load(self, warm: bool = False) -> ModelBundle:
+        """
+        Carga los artefactos si aún no están en memoria (idempotente). Con warm=True calienta
+        también un modelo ya cargado sin calentar (precargado en el master de gunicorn).
+        """
+        if self._pending(warm):
+            with self._lock:
+                if self._pending(warm):
+                    bundle = self._bundle
+                    self.state, self.error = (LOADING if bundle is None else WARMING), None
+                    try:
+                        if bundle is None:
+                            bundle = self._load_bundle()
+                        if warm:
+                            self.state = WARMING
+                            self._warm(bundle)
+                    except Exception as e:
+                        self.state, self.error = FAILED, str(e)
+                        raise
+                    self._bundle = bundle
+                    self.state = READY
+        return self._bundle
+
+    def load_async(self) -> threading.Thread:
+        """Carga y calienta en un hilo aparte; hasta que termine get() da ModelNotReadyError."""
+        # Precargado sin calentar en el master de gunicorn: el worker lo calienta tras el fork
+        # y sigue sirviendo con él, pero /readyz responde 503 hasta terminar.
+        if self._bundle is None:
+            self.state = LOADING
+        elif "warmup" not in self._bundle.meta:
+            self.state = WARMING
+
+        def run():
+            try:
+                self.load(warm=True)
+            except Exception as e:
+                logger.error(f"No se pudo cargar el modelo al iniciar: {e}")
+
+        t = threading.Thread(target=run, name="model-loader", daemon=True)
+        t.start()
+        return t
+
+    def get(self) -> Tuple[Any, Dict]:
+        bundle = self._bundle
+        if bundle is None:
+            if self.state in (LOADING, WARMING):
+                raise ModelNotReadyError(f"Modelo no listo ({self.state}).")
+            bundle = self.load()
+        return bundle.pipeline, bundle.meta
+
+    def unload(self) -> None:
+        """Libera el modelo y la versión previa; el estado vuelve a "idle"."""
+        with self._lock:
+            self._bundle = self._previous = None
+            self.state, self.error = IDLE, None
+
+    def memory_bytes(self) -> int:
+        bundle = self._bundle
+        return bundle.memory_bytes if bundle is not None else 0
+
+    def current_version(self) -> Optional[str]:
+        bundle = self._bundle
+        return bundle.version if bundle is not None else None
+
+    def reload(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Carga y calienta el par de artefactos en disco y lo intercambia con el actual.
+        Sin cambios de checksum (y sin force) no hace nada.
+        """
+        with self._lock:
+            current = self._bundle
+            version = _checksum(self.pipeline_path, self.meta_path)
+            if current is not None and current.version == version and not force:
+                return {"swapped": False, "version": version}
+
+            new = self._load_bundle()
+            self._warm(new)
+            self._previous, self._bundle = current, new
+
+        logger.info(f"Modelo intercambiado: {self._previous_version()} -> {new.version}")
+        self._notify_swap(new.version)
+        return {"swapped": True, "version": new.version, "previous": self._previous_version()}
+
+    def rollback(self) -> Dict[str, Any]:
+        """Vuelve a la versión anterior (y deja la actual como 'previous')."""
+        with self._lock:
+            if self._previous is None:
+                raise RollbackUnavailableError("No hay versión anterior para rollback.")
+            self._previous, self._bundle = self._bundle, self._previous
+        logger.info(f"Rollback del modelo a {self._bundle.version}")
+        self._notify_swap(self._bundle.version)
+        return {"version": self._bundle.version, "previous": self._previous_version()}
+
+    def publish(self) -> bool:
+        """Escribe la versión servida en `active_path` para que la sigan los demás workers."""
+        if self.active_path is None:
+            return False
+        raw = json.dumps(
+            {"version": self.current_version(), "published_at": time.time(), "pid": os.getpid()}
+        )
+        tmp = self.active_path.with_name(f".{self.active_path.name}.{os.getpid()}.tmp")
+        try:
+            self.active_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(raw, encoding="utf-8")
+            os.replace(tmp, self.active_path)
+        except OSError as e:
+            logger.error(f"No se pudo publicar la versión activa en {self.active_path}: {e}")
+            return False
+        self._active_seen = raw
+        return True
+
+    def follow_active(self) -> Optional[Dict[str, Any]]:
+        """Aplica la versión publicada en `active_path` si cambió desde la última lectura."""
+        if self.active_path is None or self._bundle is None:
+            return None
+        try:
+            raw = self.active_path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+        if raw == self._active_seen:
+            return None
+        self._active_seen = raw
+        try:
+            target = json.loads(raw)["version"]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Versión activa ilegible en {self.active_path}: {e}")
+            return None
+        if target is None or target == self.current_version():
+            return None
+        if target == self._previous_version():
+            return self.rollback()
+        out = self.reload()
+        if out["version"] != target:
+            logger.warning(
+                f"Versión publicada {target} no disponible en este worker; "
+                f"se mantiene {self.current_version()}"
+            )
+        return out
+
+    def add_swap_listener(self, fn: Callable[[str], None]) -> None:
+        """Registra fn(version) para cada swap (reload o rollback), p.ej. invalidar caches."""
+        self._swap_listeners.append(fn)
+
+    def _notify_swap(self, version: str) -> None:
+        for fn in self._swap_listeners:
+            try:
+                fn(version)
+            except Exception as e:
+                logger.error(f"Listener de swap falló: {e}")
+
+    def _previous_version(self) -> Optional[str]:
+        return self._previous.version if self._previous is not None else None
+
+    def _fingerprint(self) -> Optional[Tuple[int, ...]]:
+        try:
+            a, b = self.pipeline_path.stat(), self.meta_path.stat()
+        except OSError:
+            return None
+        return (a.st_mtime_ns, a.st_size, b.st_mtime_ns, b.st_size)
+
+    def _watch(self, interval: float) -> None:
+        seen = self._fingerprint()
+        while not self._stop.wait(interval):
+            try:
+                self.follow_active()
+            except Exception as e:
+                logger.error(f"No se pudo aplicar la versión publicada: {e}")
+            if not self._watch_files:
+                continue
+            fp = self._fingerprint()
+            if fp is None or fp == seen:
+                continue
+            # Esperar un ciclo sin cambios: el entrenamiento escribe el .pkl y luego la meta.
+            if self._stop.wait(interval) or self._fingerprint() != fp:
+                continue
+            seen = fp
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Recarga automática fallida, se mantiene el modelo actual: {e}")
+
+    def start_watcher(self, interval: float, watch_files: bool = True) -> None:
+        """
+        Sigue la versión publicada en `active_path` cada `interval` segundos y, con
+        `watch_files`, vigila también los artefactos y recarga si cambian.
+        """
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._watch_files = watch_files
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="model-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def stats(self) -> Dict[str, Any]:
+        bundle = self._bundle
+        out: Dict[str, Any] = {
+            "loaded": bundle is not None,
+            "state": self.state,
+            "error": self.error,
+            "backend": self.backend,
+            "path": str(self.pipeline_path),
+            "mmap_mode": self.mmap_mode,
+            "pid": os.getpid(),
+            "previous_version": self._previous_version(),
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+            "watching_files": self._watch_files,
+            "preloaded": self.preloaded,
+            "active_path": str(self.active_path) if self.active_path is not None else None,
+        }
+        if bundle is not None:
+            out.update(bundle.stats())
+        return out
@@ -0,0 +1,75 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from src.api import deps
+from src.api.registry import RollbackUnavailableError
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(deps.require_admin)])
+
+
+@router.get("/model")
+def model_status():
+    return deps.registry.stats()
+
+
+# Reload y rollback se aplican en el worker que atiende la request y se publican en
+# MODEL_ACTIVE_PATH; los demás workers los siguen desde su vigía (MODEL_WATCH_INTERVAL).
+@router.post("/model/reload")
+def model_reload(force: bool = False):
+    try:
+        out = deps.registry.reload(force=force)
+    except Exception as e:
+        # El modelo actual sigue sirviendo; solo se informa el fallo.
+        raise HTTPException(status_code=409, detail=f"Recarga fallida: {e}")
+    return {**out, "published": deps.registry.publish()}
+
+
+@router.post("/model/rollback")
+def model_rollback():
+    try:
+        out = deps.registry.rollback()
+    except RollbackUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**out, "published": deps.registry.publish()}
+
+
+@router.get("/models")
+def models_status():
+    """Modelos del catálogo, memoria estimada de cada uno y presupuesto (MODELS_MEMORY_MB)."""
+    return deps.catalog.stats()
+
+
+@router.post("/models/{name}/load")
+def models_load(name: str):
+    """Lanza la carga de `name` ya, sin esperar el reintento tras un fallo."""
+    deps.catalog.reset(name)
+    started = deps.catalog.load_async(name) is not None
+    return {"name": name, "started": started, **deps.catalog.registry(name).stats()}
+
+
+@router.get("/shadow")
+def shadow_status():
+    return deps.shadow.stats()
+
+
+@router.get("/profiles")
+def profiles_list(limit: int = 50):
+    """Perfiles guardados más recientes (ver PROFILE_SAMPLE_RATE / PROFILE_SLOW_MS)."""
+    return {"profiler": deps.profiler.stats(), "profiles": deps.profiler.store.list(limit)}
+
+
+@router.get("/profiles/{name}")
+def profiles_download(name: str, format: str = "json"):
+    """
+    Descarga un perfil. format=folded devuelve las pilas colapsadas ("a;b;c N"), listas
+    para flamegraph.pl o speedscope.
+    """
+    path = deps.profiler.store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado.")
+    if format == "folded":
+        stacks = json.loads(path.read_text(encoding="utf-8"))["stacks"]
+        return PlainTextResponse("".join(f"{k} {v}\n" for k, v in stacks.items()))
+    return FileResponse(path, media_type="application/json", filename=name)
@@ -1,6 +1,10 @@
-from fastapi import APIRouter
+from typing import Optional
 
-from src.api.deps import get_model_and_meta
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse
+
+from src.api import deps
+from src.api.registry import READY, ModelNotReadyError
 
 router = APIRouter(tags=["health"])
 
@@ -8,15 +12,53 @@ router = APIRouter(tags=["health"])
 @router.get("/health")
 def health():
     try:
-        _ = get_model_and_meta()
-        return {"status": "ok"}
+        _ = deps.get_model_and_meta()
+        return {
+            "status": "ok",
+            "model": deps.registry.stats(),
+            "inference_pool": deps.inference_pool.stats(),
+            "prediction_cache": deps.prediction_cache.stats(),
+        }
+    except ModelNotReadyError as e:
+        return {"status": "loading", "detail": str(e), "model": deps.registry.stats()}
     except Exception as e:
         return {"status": "error", "detail": str(e)}
 
 
+@router.get("/livez")
+def livez():
+    """Liveness: el proceso atiende requests (no depende del modelo)."""
+    return {"status": "alive"}
+
+
+@router.get("/readyz")
+def readyz():
+    """Readiness: 200 solo con el modelo cargado y calentado; si no, 503 con el estado."""
+    reg = deps.registry
+    body = {"status": reg.state, "version": reg.current_version()}
+    if reg.state != READY:
+        body["error"] = reg.error
+        return JSONResponse(status_code=503, content=body, headers={"Retry-After": "1"})
+    return body
+
+
+@router.get("/models")
+def models():
+    """Modelos seleccionables con X-Model o /models/{nombre}/..."""
+    stats = deps.catalog.stats()["models"]
+    return {
+        "default": deps.MODEL_NAME,
+        "shadow": deps.SHADOW_MODEL,
+        "models": {
+            name: {k: s.get(k) for k in ("state", "backend", "version")}
+            for name, s in stats.items()
+        },
+    }
+
+
 @router.get("/model_meta")
-def model_meta():
-    _, meta = get_model_and_meta()
+def model_meta(x_model: Optional[str] = Header(default=None)):
+    _, meta = deps.get_model(x_model)
     # Filtra campos largos si fuese necesario
     safe = {k: v for k, v in meta.items() if k not in {"feature_importances_raw"}}
     return safe
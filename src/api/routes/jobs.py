@@ -0,0 +1,120 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from src.api import deps
+from src.api.arrow_io import PARQUET, media_type
+from src.api.jobs import JobNotFinishedError, JobNotFoundError
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+_CSV_TYPES = ("text/csv", "application/csv", "text/plain")
+
+
+def _upload_format(content_type: Optional[str]) -> str:
+    if media_type(content_type) == PARQUET:
+        return "parquet"
+    if content_type and content_type.split(";")[0].strip().lower() in _CSV_TYPES:
+        return "csv"
+    raise HTTPException(status_code=415, detail=f"Se espera text/csv o {PARQUET}.")
+
+
+@router.post(
+    "",
+    status_code=202,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string", "format": "binary"}},
+                PARQUET: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+async def submit_job(
+    request: Request,
+    id_columns: str = "",
+    encoding: str = "utf-8",
+    sep: str = ",",
+    chunk_rows: Optional[int] = Query(default=None, ge=1),
+    x_model: Optional[str] = Header(default=None),
+):
+    """
+    Recibe un CSV o Parquet (cuerpo crudo, en streaming a disco) y devuelve el id del job.
+    `id_columns` (separadas por coma) se copian al resultado junto a 'fila', 'proba' y
+    'riesgoso'. El progreso se consulta en GET /jobs/{id} y el resultado en /jobs/{id}/result.
+    """
+    fmt = _upload_format(request.headers.get("content-type"))
+    model = x_model if x_model and x_model != deps.MODEL_NAME else None
+    if model is not None:
+        deps.catalog.registry(model)  # nombre desconocido -> 404 antes de recibir el archivo
+    job, upload = deps.jobs.create(
+        fmt,
+        model=model,
+        id_columns=[c.strip() for c in id_columns.split(",") if c.strip()],
+        encoding=encoding,
+        sep=sep,
+        chunk_rows=chunk_rows,
+    )
+    # Se escribe a .part y se renombra al terminar: una subida cortada no se retoma.
+    part = upload.with_name(upload.name + ".part")
+    size = 0
+    try:
+        # Las escrituras van a un hilo: una subida de cientos de MB no frena el event loop
+        # (/predict, /readyz) del worker.
+        f = await run_in_threadpool(open, part, "wb")
+        try:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > deps.JOBS_MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Archivo demasiado grande.")
+                await run_in_threadpool(f.write, chunk)
+        finally:
+            await run_in_threadpool(f.close)
+        part.replace(upload)
+    except BaseException:
+        deps.jobs.discard(job["id"])
+        raise
+    deps.jobs.start(job["id"])
+    return JSONResponse(
+        status_code=202,
+        content={"id": job["id"], "status": job["status"], "bytes": size},
+        headers={"Location": f"/jobs/{job['id']}"},
+    )
+
+
+@router.get("")
+def list_jobs(limit: int = 50):
+    return {"jobs": deps.jobs.list(limit)}
+
+
+@router.get("/{job_id}")
+def job_status(job_id: str):
+    """Estado, filas procesadas, progreso (0-1) y ETA mientras corre."""
+    try:
+        return deps.jobs.status(job_id)
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail="Job no encontrado.")
+
+
+@router.get("/{job_id}/result")
+def job_result(job_id: str):
+    try:
+        path = deps.jobs.result_path(job_id)
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail="Job no encontrado.")
+    except JobNotFinishedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return FileResponse(path, media_type=PARQUET, filename=f"job_{job_id}.parquet")
+
+
+@router.delete("/{job_id}")
+def job_delete(job_id: str):
+    """Cancela un job en curso o borra uno terminado (con su resultado)."""
+    try:
+        return deps.jobs.cancel(job_id)
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail="Job no encontrado.")
@@ -0,0 +1,40 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.api import deps
+from src.api.metrics import REGISTRY, Counter, Gauge
+
+router = APIRouter(tags=["health"])
+
+
+def _runtime_metrics():
+    """Estado ya contabilizado por el pool de inferencia y la cache, leído al exponer."""
+    pool = deps.inference_pool.stats()
+    cache = deps.prediction_cache.stats()
+
+    pending = Gauge("inference_pool_pending", "Tareas en ejecución o en cola del pool.")
+    pending.set(pool["pending"])
+    capacity = Gauge("inference_pool_capacity", "Tareas admitidas antes del 503.")
+    capacity.set(pool["max_workers"] + pool["max_queue"])
+    rejected = Counter("inference_pool_rejected_total", "Requests rechazadas con 503.")
+    rejected.inc(pool["rejected"])
+    lookups = Counter("prediction_cache_lookups_total", "Filas consultadas en cache.", ("result",))
+    lookups.inc(cache["hits"], result="hit")
+    lookups.inc(cache["misses"], result="miss")
+    entries = Gauge("prediction_cache_entries", "Filas guardadas en la cache de predicciones.")
+    entries.set(cache["entries"])
+    loaded = Gauge("model_loaded", "1 si el modelo está cargado.", ("version", "backend"))
+    loaded.set(
+        int(deps.registry.loaded),
+        version=deps.registry.current_version() or "",
+        backend=deps.registry.backend,
+    )
+    return [pending, capacity, rejected, lookups, entries, loaded]
+
+
+REGISTRY.add_collector(_runtime_metrics)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,6 +1,23 @@
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    StrictBool,
+    StrictFloat,
+    StrictInt,
+    StrictStr,
+    TypeAdapter,
+    create_model,
+    model_validator,
+)
+from typing_extensions import Annotated, TypedDict
+
+# Tipos por columna en pipeline_meta.json["dtypes"]: {"col": "number" | "string"}.
+NUMBER = "number"
+STRING = "string"
 
 
 class BatchPredictRequest(BaseModel):
@@ -14,13 +31,19 @@ class BatchPredictRequest(BaseModel):
     # Permitimos claves variables (columnas) por fila, pero validamos vs meta.
     model_config = ConfigDict(extra="allow")
 
-    @field_validator("filas")
-    @classmethod
-    def non_empty_rows(cls, v):
-        for i, row in enumerate(v):
-            if not isinstance(row, dict) or not row:
-                raise ValueError(f"Fila {i} vacía o inválida.")
-        return v
+    @model_validator(mode="after")
+    def non_empty_rows(self):
+        # all() recorre la lista en C; solo se busca el índice si hay una fila vacía.
+        if not all(self.filas):
+            i = next(i for i, row in enumerate(self.filas) if not row)
+            raise ValueError(f"Fila {i} vacía o inválida.")
+        return self
+
+
+class PredictRequest(BaseModel):
+    """Una sola obra para /predict: {"features": {"col": valor, ...}}."""
+
+    features: Dict[str, Any] = Field(..., min_length=1)
 
 
 class PredictResponse(BaseModel):
@@ -31,3 +54,122 @@ class PredictResponse(BaseModel):
 
 class PredictBatchResponse(BaseModel):
     resultados: List[PredictResponse]
+
+
+class ColumnarPredictRequest(BaseModel):
+    """
+    Estructura esperada para /predict_proba/columnar.
+    Acepta la forma columnar {"columns": {"col": [v1, v2, ...]}} o la forma clásica 'filas'.
+    """
+
+    columns: Optional[Dict[str, List[Any]]] = None
+    filas: Optional[List[Dict[str, Any]]] = None
+
+    @model_validator(mode="after")
+    def exactly_one_form(self):
+        if (self.columns is None) == (self.filas is None):
+            raise ValueError("Enviar exactamente uno de 'columns' o 'filas'.")
+        if self.columns is not None and not self.columns:
+            raise ValueError("'columns' vacío.")
+        if self.filas is not None and not self.filas:
+            raise ValueError("'filas' vacío.")
+        return self
+
+
+class PredictArrayResponse(BaseModel):
+    threshold: float
+    proba: List[float]
+    riesgoso: List[bool]
+
+
+def column_dtypes(pipeline: Any) -> Optional[Dict[str, str]]:
+    """
+    Tipo de cada columna de entrada según el pipeline: las del bloque con OneHotEncoder son
+    'string' y el resto 'number'. Sirve para metas antiguas sin 'dtypes'; None si el
+    pipeline no permite deducirlo.
+    """
+    num_cols = getattr(pipeline, "num_cols", None)  # OnnxPipeline
+    cat_cols = getattr(pipeline, "cat_cols", None)
+    prep = getattr(pipeline, "preprocessor", None)  # CompiledPipeline
+    if prep is not None:
+        num_cols, cat_cols = prep.num_cols, prep.cat_cols
+    if num_cols is None or cat_cols is None:
+        try:
+            num_cols, cat_cols = _sklearn_columns(pipeline)
+        except Exception:
+            return None
+    out = {str(c): NUMBER for c in num_cols}
+    out.update({str(c): STRING for c in cat_cols})
+    return out
+
+
+def _sklearn_columns(pipeline) -> Tuple[List[str], List[str]]:
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+
+    from src.models.compiled import _block_steps, _split_steps
+
+    prep, _ = _split_steps(pipeline)
+    if not isinstance(prep, ColumnTransformer):
+        raise TypeError("Sin ColumnTransformer.")
+    num_cols, cat_cols = [], []
+    for name, transformer, cols in prep.transformers_:
+        if transformer == "drop" or name == "remainder":
+            continue
+        steps = _block_steps(transformer)
+        is_cat = any(isinstance(s, OneHotEncoder) for s in steps)
+        (cat_cols if is_cat else num_cols).extend(str(c) for c in cols)
+    return num_cols, cat_cols
+
+
+# Numéricas: float (acepta enteros y textos numéricos; otro texto -> 422).
+# Categóricas: el valor escalar se conserva tal cual (sklearn distingue 2023 de "2023");
+# left_to_right con tipos estrictos evita probar todas las ramas de la unión en cada celda.
+_FIELD_TYPES = {
+    NUMBER: Optional[float],
+    STRING: Annotated[
+        Optional[Union[StrictStr, StrictBool, StrictInt, StrictFloat]],
+        Field(union_mode="left_to_right"),
+    ],
+}
+
+
+@lru_cache(maxsize=8)
+def typed_adapters(columns: Tuple[str, ...], dtypes: Tuple[str, ...]) -> Tuple[TypeAdapter, TypeAdapter]:
+    """
+    (adaptador de /predict_proba, adaptador de /predict_proba/columnar) tipados por columna.
+
+    Las filas son TypedDict: pydantic-core valida el cuerpo completo en una sola llamada y
+    devuelve dicts, sin instanciar un modelo ni ejecutar validadores Python por fila. Las
+    columnas ausentes se permiten (-> NaN al alinear) y las extra se descartan al validar,
+    así que una fila sin ninguna columna del modelo cuenta como vacía.
+    """
+    types = [_FIELD_TYPES.get(t, Any) for t in dtypes]
+    config = ConfigDict(extra="ignore")
+
+    fila = TypedDict("Fila", dict(zip(columns, types)), total=False)
+    fila.__pydantic_config__ = config
+    cols = TypedDict("Columnas", {c: List[t] for c, t in zip(columns, types)}, total=False)
+    cols.__pydantic_config__ = config
+
+    batch = create_model(
+        "BatchPredictRequestTipado",
+        __base__=BatchPredictRequest,
+        filas=(List[fila], Field(..., min_length=1)),
+    )
+    columnar = create_model(
+        "ColumnarPredictRequestTipado",
+        __base__=ColumnarPredictRequest,
+        columns=(Optional[cols], None),
+        filas=(Optional[List[fila]], None),
+    )
+    return TypeAdapter(batch), TypeAdapter(columnar)
+
+
+def request_adapters(meta: Dict[str, Any], default: Tuple[TypeAdapter, TypeAdapter]):
+    """Adaptadores tipados si la meta trae 'dtypes' para sus columnas; si no, `default`."""
+    dtypes = meta.get("dtypes")
+    columns = meta.get("columns")
+    if not isinstance(dtypes, dict) or not columns:
+        return default
+    return typed_adapters(tuple(columns), tuple(dtypes.get(c, "") for c in columns))
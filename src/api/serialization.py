@@ -0,0 +1,235 @@
+"""
+Serialización y compresión de las respuestas de predicción.
+
+FastJSONResponse codifica arreglos NumPy y DataFrames sin pasar por el encoder por defecto
+de FastAPI (que recorre cada float en Python):
+- con orjson instalado, los ndarray se serializan en C (OPT_SERIALIZE_NUMPY);
+- sin orjson, json estándar con los ndarray convertidos por .tolist();
+- los DataFrame se escriben con DataFrame.to_json(orient="records") del encoder C de pandas
+  (hasta 15 decimales) y se insertan ya serializados en el cuerpo.
+
+CompressionMiddleware negocia gzip o brotli (si el paquete `brotli` está instalado) según
+Accept-Encoding para respuestas de texto por encima de `minimum_size` bytes.
+"""
+
+import asyncio
+import json
+import sys
+import zlib
+from typing import TYPE_CHECKING, Any, Optional, Sequence
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+# Máximo de decimales de DataFrame.to_json.
+FRAME_DECIMALS = 15
+
+
+def round_proba(values: np.ndarray, decimals: Optional[int]) -> np.ndarray:
+    """
+    Redondea probabilidades a `decimals` (None = sin cambios) para achicar el cuerpo.
+    La etiqueta 'riesgoso' se calcula antes, sobre la probabilidad sin redondear.
+    """
+    if decimals is None:
+        return values
+    return np.round(values, decimals)
+
+
+def _is_frame(obj: Any) -> bool:
+    # Sin pandas importado no puede haber DataFrames: no se fuerza su import.
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(obj, pd.DataFrame)
+
+
+def _default(obj: Any):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "to_numpy"):  # Series / Index
+        return obj.to_numpy().tolist()
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _frame(df: "pd.DataFrame") -> bytes:
+    return df.to_json(
+        orient="records", force_ascii=False, date_format="iso", double_precision=FRAME_DECIMALS
+    ).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON de `content`; los DataFrame (en el primer nivel de un dict) van como registros."""
+    if _is_frame(content):
+        return _frame(content)
+    if isinstance(content, dict) and any(_is_frame(v) for v in content.values()):
+        parts = [
+            _dumps(str(k)) + b":" + (_frame(v) if _is_frame(v) else _dumps(v))
+            for k, v in content.items()
+        ]
+        return b"{" + b",".join(parts) + b"}"
+    return _dumps(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que acepta ndarray/DataFrame en el contenido (ver dumps)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ---------------------------------------------------------------------------
+# Compresión
+# ---------------------------------------------------------------------------
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Por encima de este tamaño se comprime en un hilo para no bloquear el event loop.
+_THREAD_MIN_BYTES = 128 * 1024
+
+
+def negotiate(accept_encoding: str, available: Sequence[str]) -> Optional[str]:
+    """Codificación preferida por el cliente entre `available` (q-values; q=0 excluye)."""
+    qs = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.strip()
+        try:
+            qs[name] = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            qs[name] = 0.0
+    best, best_q = None, 0.0
+    # A igual q gana el orden de preferencia del servidor (`available`).
+    for c in available:
+        q = qs.get(c, qs.get("*", 0.0))
+        if q > best_q:
+            best, best_q = c, q
+    return best
+
+
+class _Encoder:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._c = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._c.process(data)
+            return out + (self._c.finish() if final else self._c.flush())
+        out = self._c.compress(data)
+        return out + self._c.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI: comprime con br/gzip las respuestas de texto grandes según
+    Accept-Encoding. Las respuestas en streaming se comprimen bloque a bloque.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 5,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.available = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.minimum_size <= 0:
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for k, v in scope.get("headers", ()):
+            if k == b"accept-encoding":
+                accept = v.decode("latin-1")
+                break
+        encoding = negotiate(accept, self.available) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "encoder": None, "passthrough": False}
+
+        async def compress(data: bytes, final: bool) -> bytes:
+            encoder = state["encoder"]
+            if len(data) >= _THREAD_MIN_BYTES:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, encoder.compress, data, final)
+            return encoder.compress(data, final)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", ())}
+                ctype = headers.get(b"content-type", b"").decode("latin-1").lower()
+                state["passthrough"] = (
+                    b"content-encoding" in headers
+                    or message["status"] == 206
+                    or not ctype.startswith(COMPRESSIBLE_TYPES)
+                )
+                if state["passthrough"]:
+                    await send(message)
+                else:
+                    state["start"] = message
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            start = state["start"]
+            if start is not None:
+                state["start"] = None
+                if not more and len(body) < self.minimum_size:
+                    await send(start)
+                    await send(message)
+                    state["passthrough"] = True
+                    return
+                state["encoder"] = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers, vary = [], [b"Accept-Encoding"]
+                for k, v in start.get("headers", ()):
+                    if k.lower() == b"vary":
+                        vary.insert(0, v)
+                    elif k.lower() != b"content-length":
+                        headers.append((k, v))
+                data = await compress(body, not more)
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                headers.append((b"vary", b", ".join(vary)))
+                if not more:
+                    headers.append((b"content-length", str(len(data)).encode("latin-1")))
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": data, "more_body": more})
+                return
+            data = await compress(body, not more)
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
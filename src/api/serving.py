@@ -0,0 +1,115 @@
+"""
+Perfil de serving para gunicorn (ver gunicorn.conf.py).
+
+Dimensiona el proceso a partir de las CPUs realmente disponibles (afinidad y cuota de cgroup,
+no os.cpu_count() del host):
+- workers = CPUs (WEB_CONCURRENCY lo fija a mano);
+- cada worker recibe CPUs / workers hilos de cómputo: el pool de inferencia y los jobs;
+- cada llamada al modelo usa NATIVE_THREADS hilos de BLAS/OpenMP (default 1), y los
+  estimadores entrenados con n_jobs=-1 (RandomForest, XGBoost) se limitan a MODEL_N_JOBS.
+  Sin estos límites cada worker abre un hilo por CPU del host en cada predict_proba y N
+  workers x M hilos compiten por las mismas CPUs.
+
+Este módulo no importa numpy ni el modelo: los límites de hilos nativos tienen que quedar en
+el entorno antes de que el master (preload) importe la app.
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, MutableMapping, Optional
+
+# Variables que leen OpenMP y las BLAS al cargarse (numpy, sklearn, xgboost, lightgbm).
+NATIVE_THREAD_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPUs de la cuota del contenedor (docker --cpus); None si no hay límite."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max", "r") as f:  # cgroup v2
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "r") as f:  # cgroup v1
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", "r") as f:
+            period = int(f.read())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    try:
+        n = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - macOS / Windows
+        n = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        n = min(n, math.floor(quota))
+    return max(1, n)
+
+
+@dataclass
+class ServingProfile:
+    cpus: int
+    workers: int
+    threads: int  # hilos de cómputo por worker
+    native_threads: int  # hilos BLAS/OpenMP por llamada al modelo
+    keepalive: int
+    backlog: int
+
+
+def serving_profile(env: Optional[MutableMapping[str, str]] = None) -> ServingProfile:
+    env = os.environ if env is None else env
+    cpus = available_cpus()
+    workers = int(env.get("WEB_CONCURRENCY") or cpus)
+    return ServingProfile(
+        cpus=cpus,
+        workers=workers,
+        threads=int(env.get("WORKER_THREADS") or max(1, cpus // workers)),
+        native_threads=int(env.get("NATIVE_THREADS") or 1),
+        # Mayor que el idle timeout del balanceador (60 s en ALB/nginx): así es el
+        # balanceador el que cierra y no se reutiliza una conexión que el worker ya cerró.
+        keepalive=int(env.get("KEEPALIVE", "75")),
+        backlog=int(env.get("BACKLOG", "2048")),
+    )
+
+
+def apply_thread_limits(
+    profile: ServingProfile, env: Optional[MutableMapping[str, str]] = None
+) -> None:
+    """Deja en el entorno (sin pisar lo ya definido) los hilos por worker del perfil."""
+    env = os.environ if env is None else env
+    for var in NATIVE_THREAD_VARS:
+        env.setdefault(var, str(profile.native_threads))
+    env.setdefault("MODEL_N_JOBS", str(profile.native_threads))
+    env.setdefault("ONNX_INTRA_OP_THREADS", str(profile.native_threads))
+    env.setdefault("INFERENCE_WORKERS", str(profile.threads))
+    env.setdefault("JOBS_WORKERS", str(profile.threads))
+
+
+def limit_n_jobs(model: Any, n_jobs: int) -> int:
+    """
+    Fija n_jobs en los pasos del pipeline que lo tienen (RandomForest, XGBoost, LightGBM
+    entrenados con n_jobs=-1). Devuelve cuántos estimadores se ajustaron.
+    """
+    steps = getattr(model, "steps", None)
+    estimators = [s for _, s in steps] if isinstance(steps, list) else [model]
+    changed = 0
+    for est in estimators:
+        get_params = getattr(est, "get_params", None)
+        if get_params is None or "n_jobs" not in get_params(deep=False):
+            continue
+        est.set_params(n_jobs=n_jobs)
+        changed += 1
+    return changed
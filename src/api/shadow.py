@@ -0,0 +1,160 @@
+"""
+Shadow scoring: el tráfico del modelo principal se puntúa también con un challenger.
+
+La respuesta sale solo con el modelo principal; después, en un hilo propio (no en el pool de
+inferencia, para no quitarle capacidad ni provocar 503), el challenger puntúa las mismas
+filas y se registra la diferencia: una línea JSONL por request en logs/shadow/ y las
+métricas shadow_* en /metrics. Con más de `max_pending` requests en espera las nuevas se
+descartan (contadas como "dropped") en lugar de acumular memoria.
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.api.metrics import SHADOW_ABS_DIFF, SHADOW_DISAGREEMENTS, SHADOW_REQUESTS
+from src.api.registry import ModelNotReadyError
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Índices de filas en desacuerdo guardados por request (el conteo va completo).
+MAX_DISAGREE_ROWS = 20
+
+
+def compare(
+    primary: np.ndarray, challenger: np.ndarray, threshold: float, challenger_threshold: float
+) -> Dict[str, Any]:
+    """Resumen de diferencias entre dos vectores de probabilidades de las mismas filas."""
+    diff = np.abs(np.asarray(challenger, dtype=float) - np.asarray(primary, dtype=float))
+    disagree = np.flatnonzero((primary >= threshold) != (challenger >= challenger_threshold))
+    return {
+        "rows": len(primary),
+        "mean_abs_diff": float(np.nanmean(diff)) if len(diff) else 0.0,
+        "max_abs_diff": float(np.nanmax(diff)) if len(diff) else 0.0,
+        "primary_positive": int((primary >= threshold).sum()),
+        "challenger_positive": int((challenger >= challenger_threshold).sum()),
+        "disagreements": len(disagree),
+        "disagree_rows": disagree[:MAX_DISAGREE_ROWS].tolist(),
+    }
+
+
+ScoreFn = Callable[[], Tuple[np.ndarray, float, Optional[str]]]
+
+
+class ShadowScorer:
+    """
+    `submit()` encola la puntuación del challenger; `score_fn()` devuelve
+    (probabilidades, umbral, versión) del challenger para las filas de la request.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str],
+        sample_rate: float = 1.0,
+        directory: Path = Path("logs/shadow"),
+        max_pending: int = 8,
+    ):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.directory = Path(directory)
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._counts = {"ok": 0, "skipped": 0, "dropped": 0, "error": 0}
+        self._rows = 0
+        self._disagreements = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.model is not None and self.sample_rate > 0
+
+    def should_sample(self) -> bool:
+        return self.enabled and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+    def _count(self, result: str) -> None:
+        self._counts[result] += 1
+        SHADOW_REQUESTS.inc(model=self.model, result=result)
+
+    def submit(
+        self,
+        path: str,
+        score_fn: ScoreFn,
+        primary: np.ndarray,
+        threshold: float,
+        primary_version: Optional[str],
+    ) -> bool:
+        """Encola la comparación sin esperarla; False si se descartó por cola llena."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._count("dropped")
+                return False
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._executor.submit(self._run, path, score_fn, primary, threshold, primary_version)
+        return True
+
+    def _run(self, path, score_fn: ScoreFn, primary, threshold, primary_version) -> None:
+        try:
+            t0 = time.perf_counter()
+            try:
+                challenger, challenger_threshold, version = score_fn()
+            except ModelNotReadyError:
+                self._count("skipped")
+                return
+            record = {
+                "ts": time.time(),
+                "path": path,
+                "model": self.model,
+                "version": version,
+                "primary_version": primary_version,
+                "threshold": threshold,
+                "challenger_threshold": challenger_threshold,
+                "ms": round((time.perf_counter() - t0) * 1000.0, 3),
+                **compare(primary, challenger, threshold, challenger_threshold),
+            }
+            self._write(record)
+            SHADOW_ABS_DIFF.observe_many(np.abs(challenger - primary), model=self.model)
+            SHADOW_DISAGREEMENTS.inc(record["disagreements"], model=self.model)
+            self._rows += record["rows"]
+            self._disagreements += record["disagreements"]
+            self._count("ok")
+        except Exception as e:
+            self._count("error")
+            logger.error(f"Shadow scoring con '{self.model}' falló: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        # Un solo hilo escribe: no hace falta lock. Un archivo por día.
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = time.strftime("shadow_%Y%m%d.jsonl", time.localtime(record["ts"]))
+        with open(self.directory / name, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "model": self.model,
+            "sample_rate": self.sample_rate,
+            "pending": self._pending,
+            "requests": dict(self._counts),
+            "rows": self._rows,
+            "disagreements": self._disagreements,
+            "disagreement_ratio": self._disagreements / self._rows if self._rows else 0.0,
+            "directory": str(self.directory),
+        }
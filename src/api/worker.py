@@ -0,0 +1,18 @@
+"""
+Worker de gunicorn para la API (worker_class en gunicorn.conf.py).
+
+UvicornWorker con el event loop y el parser HTTP elegibles por entorno: "auto" usa uvloop y
+httptools si están instalados (uvicorn[standard]); SERVING_LOOP=asyncio / SERVING_HTTP=h11
+vuelven a las implementaciones en Python puro (p.ej. para comparar en bench_serving.py).
+"""
+
+import os
+
+from uvicorn.workers import UvicornWorker
+
+
+class TunedUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": os.getenv("SERVING_LOOP", "auto"),
+        "http": os.getenv("SERVING_HTTP", "auto"),
+    }
@@ -1,11 +1,200 @@
+"""
+Lectura de las fuentes de data/external (exportaciones DS_DASH_* de SEACE/INFOBRAS).
+
+cargar_carpeta / cargar_archivos leen varios archivos en paralelo (hilos: el parser CSV de
+pyarrow libera el GIL) y los concatenan como tablas Arrow, con una sola conversión final a
+pandas (sin un DataFrame intermedio por archivo más la copia de pd.concat).
+
+Los tipos salen del registro de esquemas (data/external/esquemas.json, un mapa columna -> tipo
+por carpeta): con tipos explícitos no se infiere en cada lectura y una columna tiene el mismo
+tipo en todos los archivos del dominio. Las columnas que no están en el registro se infieren.
+El registro se regenera con:
+
+python -m src.data.ingesta --inferir data/external/obra data/external/empresa ...
+
+Si pyarrow no puede leer un CSV (filas con más campos, separador distinto) se usa pandas para
+ese archivo. Cada lectura deja filas, MB y MB/s en LecturaStats.
+
+leer_excel guarda cada hoja leída como Parquet en data/interim/excel_cache, con el sha256 del
+libro y el nombre de la hoja en la clave: mientras el archivo no cambie, las lecturas siguientes
+no pasan por openpyxl. iter_excel recorre un libro grande por bloques de filas en modo
+read-only (memoria acotada); leer_excel(..., streaming=True) llena la cache de esa forma.
+Las hojas con columnas de tipos mezclados (p.ej. códigos numéricos y texto) no se cachean:
+Parquet las guardaría como texto y leer_excel dejaría de devolver lo mismo que pd.read_excel.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+ESQUEMAS_PATH = Path("data/external/esquemas.json")
+EXCEL_CACHE_DIR = Path("data/interim/excel_cache")
+EXCEL_CHUNK_ROWS = 50_000
+ENCODING = "latin-1"
+
+# Tipos admitidos en el registro. Fechas y horas quedan como texto (igual que pd.read_csv sin
+# parse_dates).
+TIPOS = {
+    "int64": pa.int64(),
+    "double": pa.float64(),
+    "bool": pa.bool_(),
+    "string": pa.string(),
+}
+# Mismos valores nulos que pd.read_csv por defecto.
+NULL_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def leer_excel(
+    path: Union[str, Path],
+    sheet_name: Union[int, str, List[Union[int, str]], None] = 0,
+    cache: bool = True,
+    streaming: bool = False,
+    cache_dir: Union[str, Path] = EXCEL_CACHE_DIR,
+):
+    """
+    pd.read_excel con cache Parquet por hoja (ver docstring del módulo). Como pd.read_excel,
+    sheet_name=None o una lista devuelve {hoja: DataFrame}.
+    """
+    path = Path(path)
+    if sheet_name is None or isinstance(sheet_name, list):
+        names = _hojas(path) if sheet_name is None else sheet_name
+        return {h: leer_excel(path, h, cache, streaming, cache_dir) for h in names}
+    table, original = _tabla_excel(path, sheet_name, cache, streaming, cache_dir)
+    return original if original is not None else table.to_pandas()
+
+
+def _tabla_excel(
+    path: Path, sheet_name: Union[int, str], cache: bool, streaming: bool, cache_dir
+) -> Tuple[pa.Table, Optional[pd.DataFrame]]:
+    """(tabla, DataFrame original si la hoja mezcla tipos en una columna; ver _leer_hoja)."""
+    if not cache:
+        return _leer_hoja(path, sheet_name, streaming)
+    sha = _sha256(path)
+    destino = Path(cache_dir) / f"{_clave(path, sheet_name)}__{sha[:16]}.parquet"
+    if destino.exists():
+        return pq.read_table(destino), None
+    table, original = _leer_hoja(path, sheet_name, streaming)
+    if original is not None:
+        logger.info("Cache Excel: %s [%s] mezcla tipos, no se cachea", path.name, sheet_name)
+        return table, original
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_suffix(".tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, destino)
+    # Versiones anteriores del mismo libro/hoja ya no sirven.
+    for viejo in destino.parent.glob(f"{_clave(path, sheet_name)}__*.parquet"):
+        if viejo != destino:
+            viejo.unlink(missing_ok=True)
+    logger.info("Cache Excel: %s [%s] -> %s", path.name, sheet_name, destino.name)
+    # Lo mismo que leerá la próxima corrida desde la cache.
+    return table, None
+
+
+def iter_excel(
+    path: Union[str, Path], sheet_name: Union[int, str] = 0, chunk_rows: int = EXCEL_CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """
+    Bloques de `chunk_rows` filas de una hoja, en modo read-only de openpyxl (no arma el
+    libro completo en memoria). La primera fila es el encabezado; las filas vacías se omiten.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _encabezado(header)
+        block: List[Tuple[Any, ...]] = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            block.append(row[: len(columns)])
+            if len(block) >= chunk_rows:
+                yield pd.DataFrame.from_records(block, columns=columns)
+                block = []
+        if block:
+            yield pd.DataFrame.from_records(block, columns=columns)
+    finally:
+        wb.close()
+
+
+def _encabezado(header: Tuple[Any, ...]) -> List[str]:
+    """Nombres como los arma pd.read_excel: 'Unnamed: i' si falta, '.n' si se repite."""
+    columns, vistos = [], {}
+    for i, v in enumerate(header):
+        name = f"Unnamed: {i}" if v is None else str(v)
+        if name in vistos:
+            vistos[name] += 1
+            name = f"{name}.{vistos[name]}"
+        else:
+            vistos[name] = 0
+        columns.append(name)
+    return columns
 
 
-def leer_excel(path: Union[str, Path], sheet_name=0) -> pd.DataFrame:
-    return pd.read_excel(path, sheet_name=sheet_name)
+def _leer_hoja(
+    path: Path, sheet_name: Union[int, str], streaming: bool
+) -> Tuple[pa.Table, Optional[pd.DataFrame]]:
+    """
+    La hoja como tabla Arrow y, si alguna columna mezcla tipos (Arrow la guarda como texto),
+    también el DataFrame de pandas con los valores originales.
+    """
+    if not streaming:
+        df = pd.read_excel(path, sheet_name=sheet_name)
+        table, mixta = _a_arrow(df)
+        return table, df if mixta else None
+    convertidas = [_a_arrow(chunk) for chunk in iter_excel(path, sheet_name)]
+    if not convertidas:
+        return pa.table({}), None
+    table = unir_tablas([t for t, _ in convertidas])
+    if any(mixta for _, mixta in convertidas):
+        # Los bloques no se guardan para no duplicar memoria: se relee la hoja (caso raro).
+        return table, pd.concat(iter_excel(path, sheet_name), ignore_index=True)
+    return table, None
+
+
+def _hojas(path: Path) -> List[str]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def _clave(path: Path, sheet_name: Union[int, str]) -> str:
+    hoja = f"idx{sheet_name}" if isinstance(sheet_name, int) else str(sheet_name)
+    return re.sub(r"[^\w.-]+", "_", f"{path.parent.name}__{path.stem}__{hoja}")
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
 
 def leer_csv(path: Union[str, Path], sep=",") -> pd.DataFrame:
@@ -15,3 +204,274 @@ def leer_csv(path: Union[str, Path], sep=",") -> pd.DataFrame:
 def guardar_parquet(df: pd.DataFrame, path: Union[str, Path]):
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     df.to_parquet(path, index=False)
+
+
+# ---------------------------------------------------------------------------
+# Registro de esquemas
+# ---------------------------------------------------------------------------
+
+
+def cargar_esquemas(path: Union[str, Path] = ESQUEMAS_PATH) -> Dict[str, Dict[str, str]]:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def esquema_de(
+    carpeta: Union[str, Path], path: Union[str, Path] = ESQUEMAS_PATH
+) -> Dict[str, str]:
+    """Columna -> tipo del dominio (nombre de la carpeta); vacío si no está registrado."""
+    return cargar_esquemas(path).get(Path(carpeta).name, {})
+
+
+def _nombre_tipo(t: pa.DataType) -> str:
+    if pa.types.is_integer(t):
+        return "int64"
+    if pa.types.is_floating(t):
+        return "double"
+    if pa.types.is_boolean(t):
+        return "bool"
+    return "string"
+
+
+def _unificar(a: str, b: str) -> str:
+    if a == b:
+        return a
+    if {a, b} == {"int64", "double"}:
+        return "double"
+    return "string"
+
+
+def inferir_esquema(paths: Iterable[Path], encoding: str = ENCODING) -> Dict[str, str]:
+    """Infiere una vez los tipos de todos los archivos y los unifica por columna."""
+    esquema: Dict[str, Optional[str]] = {}
+    for p in paths:
+        for field in leer_csv_arrow(p, encoding).schema:
+            if pa.types.is_null(field.type):  # columna vacía en este archivo
+                esquema.setdefault(field.name, None)
+                continue
+            t = _nombre_tipo(field.type)
+            previo = esquema.get(field.name)
+            esquema[field.name] = t if previo is None else _unificar(previo, t)
+    # Vacía en todos los archivos: pd.read_csv la deja en float64 (NaN).
+    return {c: t or "double" for c, t in esquema.items()}
+
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class LecturaStats:
+    path: Path
+    filas: int = 0
+    columnas: int = 0
+    bytes: int = 0
+    segundos: float = 0.0
+    motor: str = "pyarrow"
+    error: Optional[str] = None
+
+    @property
+    def mb_s(self) -> float:
+        return self.bytes / 1e6 / self.segundos if self.segundos > 0 else 0.0
+
+    def __str__(self) -> str:
+        if self.error:
+            return f"{self.path.name}: ERROR {self.error}"
+        return (
+            f"{self.path.name}: {self.filas} filas x {self.columnas} cols, "
+            f"{self.bytes / 1e6:.1f} MB en {self.segundos:.2f}s "
+            f"({self.mb_s:.1f} MB/s, {self.motor})"
+        )
+
+
+def leer_csv_arrow(
+    path: Union[str, Path], encoding: str = ENCODING, tipos: Optional[Dict[str, str]] = None
+) -> pa.Table:
+    column_types = {c: TIPOS[t] for c, t in (tipos or {}).items()}
+    table = pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(encoding=encoding),
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types,
+            null_values=NULL_VALUES,
+            strings_can_be_null=True,
+        ),
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+    )
+    # pyarrow infiere fechas y horas ISO; pandas (sin parse_dates) las deja como texto.
+    for i, field in enumerate(table.schema):
+        if pa.types.is_temporal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return table
+
+
+def _a_arrow(df: pd.DataFrame) -> Tuple[pa.Table, bool]:
+    """(tabla, True si hubo que pasar columnas object de tipos mezclados a texto)."""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False), False
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columnas object con tipos mezclados (p.ej. códigos numéricos y texto en Excel).
+        mixtas = {c: "string" for c in df.columns if df[c].dtype == object}
+        return pa.Table.from_pandas(df.astype(mixtas), preserve_index=False), True
+
+
+def _desde_pandas(df: pd.DataFrame) -> pa.Table:
+    return _a_arrow(df)[0]
+
+
+def _tipo_comun(a: pa.DataType, b: pa.DataType) -> pa.DataType:
+    if pa.types.is_integer(a) and pa.types.is_integer(b):
+        return pa.int64()
+    if (pa.types.is_integer(a) or pa.types.is_floating(a)) and (
+        pa.types.is_integer(b) or pa.types.is_floating(b)
+    ):
+        return pa.float64()
+    return pa.string()
+
+
+def esquema_unificado(tables: List[pa.Table], ordenar: bool = False) -> pa.Schema:
+    """
+    Esquema destino, calculado una vez: unión de columnas (orden de aparición o alfabético) y
+    un tipo por columna. Una columna vacía en un archivo (tipo null) no cuenta; enteros y
+    decimales se unifican en double y el resto de los conflictos queda como texto.
+    """
+    tipos: Dict[str, pa.DataType] = {}
+    for t in tables:
+        for f in t.schema:
+            previo = tipos.get(f.name)
+            if previo is None or pa.types.is_null(previo):
+                tipos[f.name] = f.type
+            elif not pa.types.is_null(f.type) and f.type != previo:
+                tipos[f.name] = _tipo_comun(previo, f.type)
+    nombres = sorted(tipos) if ordenar else list(tipos)
+    return pa.schema([pa.field(c, tipos[c]) for c in nombres])
+
+
+def alinear(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """
+    Lleva `table` al esquema en un solo paso: columnas en el orden del esquema (sin copia si el
+    tipo ya coincide) y nulos tipados para las que el archivo no trae.
+    """
+    presentes = set(table.column_names)
+    columnas = [
+        table.column(f.name).cast(f.type) if f.name in presentes else pa.nulls(len(table), f.type)
+        for f in schema
+    ]
+    return pa.Table.from_arrays(columnas, schema=schema)
+
+
+def unir_tablas(tables: List[pa.Table], ordenar: bool = False) -> pa.Table:
+    """Concatena tablas con columnas distintas (ver esquema_unificado), sin pasar por pandas."""
+    schema = esquema_unificado(tables, ordenar)
+    return pa.concat_tables([alinear(t, schema) for t in tables])
+
+
+def leer_archivo(
+    path: Union[str, Path], encoding: str = ENCODING, tipos: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[pa.Table], LecturaStats]:
+    """Lee un CSV (pyarrow, con pandas de respaldo) o Excel; nunca lanza: el error va en stats."""
+    path = Path(path)
+    stats = LecturaStats(path)
+    t0 = time.perf_counter()
+    table = None
+    try:
+        stats.bytes = path.stat().st_size
+        if path.suffix.lower() in (".xlsx", ".xls"):
+            stats.motor = "excel"
+            table = _tabla_excel(path, 0, True, False, EXCEL_CACHE_DIR)[0]
+        else:
+            try:
+                table = leer_csv_arrow(path, encoding, tipos)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                logger.info("pyarrow no pudo leer %s (%s); se usa pandas", path.name, e)
+                stats.motor = "pandas"
+                table = _desde_pandas(pd.read_csv(path, encoding=encoding, low_memory=False))
+        stats.filas, stats.columnas = table.num_rows, table.num_columns
+    except Exception as e:
+        stats.error = str(e)
+    stats.segundos = time.perf_counter() - t0
+    logger.info("%s", stats)
+    return table, stats
+
+
+def leer_archivos(
+    paths: Iterable[Union[str, Path]],
+    encoding: str = ENCODING,
+    tipos: Optional[Dict[str, str]] = None,
+    workers: Optional[int] = None,
+) -> List[Tuple[Optional[pa.Table], LecturaStats]]:
+    """leer_archivo en paralelo; conserva el orden de `paths`."""
+    paths = [Path(p) for p in paths]
+    if not paths:
+        return []
+    workers = workers or min(8, os.cpu_count() or 1, len(paths))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(lambda p: leer_archivo(p, encoding, tipos), paths))
+
+
+def concatenar(
+    lecturas: List[Tuple[Optional[pa.Table], LecturaStats]], columna_origen: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Une las tablas leídas (columnas en orden de aparición, nulos donde un archivo no trae la
+    columna, como pd.concat) y convierte a pandas una sola vez.
+    """
+    tables = []
+    for table, stats in lecturas:
+        if table is None:
+            continue
+        if columna_origen:
+            table = table.append_column(
+                columna_origen, pa.array([stats.path.name] * table.num_rows, pa.string())
+            )
+        tables.append(table)
+    if not tables:
+        return pd.DataFrame()
+    merged = unir_tablas(tables)
+    del tables
+    return merged.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def cargar_archivos(
+    paths: Iterable[Union[str, Path]],
+    encoding: str = ENCODING,
+    tipos: Optional[Dict[str, str]] = None,
+    workers: Optional[int] = None,
+    columna_origen: Optional[str] = None,
+) -> Tuple[pd.DataFrame, List[LecturaStats]]:
+    lecturas = leer_archivos(paths, encoding, tipos, workers)
+    return concatenar(lecturas, columna_origen), [s for _, s in lecturas]
+
+
+def cargar_carpeta(
+    carpeta: Union[str, Path],
+    pattern: str = "*.csv",
+    encoding: str = ENCODING,
+    workers: Optional[int] = None,
+    columna_origen: Optional[str] = None,
+    esquemas: Union[str, Path] = ESQUEMAS_PATH,
+) -> Tuple[pd.DataFrame, List[LecturaStats]]:
+    """Todos los archivos de `carpeta` que cumplen `pattern`, con los tipos del registro."""
+    paths = sorted(Path(carpeta).glob(pattern))
+    return cargar_archivos(paths, encoding, esquema_de(carpeta, esquemas), workers, columna_origen)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Registro de esquemas de data/external")
+    ap.add_argument("--inferir", nargs="+", required=True, help="Carpetas de dominio")
+    ap.add_argument("--pattern", default="*.csv")
+    ap.add_argument("--out", default=str(ESQUEMAS_PATH))
+    args = ap.parse_args()
+
+    esquemas = cargar_esquemas(args.out)
+    for carpeta in map(Path, args.inferir):
+        esquemas[carpeta.name] = inferir_esquema(sorted(carpeta.glob(args.pattern)))
+        print(f"{carpeta.name}: {len(esquemas[carpeta.name])} columnas")
+    Path(args.out).write_text(json.dumps(esquemas, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,488 @@
+"""
+Evaluador compilado en NumPy para los pipelines de clasificación del proyecto.
+
+compile_pipeline() aplana un Pipeline sklearn ya entrenado
+(ColumnTransformer -> SimpleImputer -> StandardScaler -> OneHotEncoder -> estimador)
+en arreglos planos:
+
+- Numéricas: imputación y escalado quedan como un vector de relleno + una afinidad por
+  columna (x - mean) / scale aplicada una sola vez sobre toda la matriz.
+- Categóricas: cada columna se codifica a un entero (índice de categoría, -1 = desconocida)
+  en lugar de expandir el one-hot.
+- LogisticRegression: el escalado se pliega en los coeficientes y el one-hot se reduce a una
+  tabla de pesos por categoría (logit = b + X @ w + sum(tabla[código])).
+- RandomForest / ExtraTrees / DecisionTree / XGBoost: todos los árboles en arreglos planos
+  (feature, umbral, hijos, valor de hoja) evaluados por niveles y de forma vectorizada sobre
+  filas x árboles; los splits sobre columnas one-hot se evalúan como "código == categoría".
+
+Los árboles comparan en float32, igual que sklearn y XGBoost, para mantener paridad exacta.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+KIND_LEAF, KIND_NUM, KIND_CAT = -1, 0, 1
+# pd.Index.get_indexer no encuentra None/NaN como categoría: se sustituyen por marcas.
+_NONE, _NAN = "\x00<None>", "\x00<NaN>"
+
+
+def _mark_missing(v: np.ndarray) -> np.ndarray:
+    none, nan = np.equal(v, None), v != v
+    if none.any() or nan.any():
+        v = v.copy()
+        v[none] = _NONE
+        v[nan] = _NAN
+    return v
+
+
+class UnsupportedPipelineError(ValueError): ...
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+@dataclass
+class CompiledPreprocessor:
+    num_cols: List[str]
+    num_fill: np.ndarray
+    num_mean: np.ndarray
+    num_scale: np.ndarray
+    cat_cols: List[str]
+    cat_categories: List[np.ndarray]
+    cat_fill: List[Any]
+    # Mapa de cada feature de salida del ColumnTransformer -> (tipo, columna, categoría)
+    out_kind: np.ndarray
+    out_col: np.ndarray
+    out_cat: np.ndarray
+    _cat_index: Optional[List[pd.Index]] = field(default=None, repr=False, compare=False)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cat_index"] = None
+        return state
+
+    def numeric(self, X: pd.DataFrame) -> np.ndarray:
+        """Numéricas imputadas (sin escalar), float64 (n, n_num)."""
+        if not self.num_cols:
+            return np.empty((len(X), 0))
+        A = np.asarray(X[self.num_cols], dtype=np.float64)
+        return np.where(np.isnan(A), self.num_fill, A)
+
+    def scaled(self, X: pd.DataFrame) -> np.ndarray:
+        return (self.numeric(X) - self.num_mean) / self.num_scale
+
+    def codes(self, X: pd.DataFrame) -> np.ndarray:
+        """Índice de categoría por columna categórica (-1 = desconocida), int64 (n, n_cat)."""
+        if self._cat_index is None:
+            self._cat_index = [
+                pd.Index(_mark_missing(np.asarray(c, dtype=object)), dtype=object)
+                for c in self.cat_categories
+            ]
+        out = np.empty((len(X), len(self.cat_cols)), dtype=np.int64)
+        for j, col in enumerate(self.cat_cols):
+            v = np.asarray(X[col], dtype=object)
+            # SimpleImputer solo considera faltante al NaN (x != x); None es un valor más.
+            missing = v != v
+            if missing.any():
+                v = v.copy()
+                v[missing] = self.cat_fill[j]
+            out[:, j] = self._cat_index[j].get_indexer(_mark_missing(v))
+        return out
+
+
+@dataclass
+class LinearHead:
+    coef_num: np.ndarray
+    intercept: float
+    # Una tabla por columna categórica; el último elemento (0.0) corresponde al código -1.
+    cat_tables: List[np.ndarray]
+
+    def decision(self, pre: CompiledPreprocessor, X: pd.DataFrame) -> np.ndarray:
+        z = np.full(len(X), self.intercept)
+        if len(self.coef_num):
+            z += pre.numeric(X) @ self.coef_num
+        if self.cat_tables:
+            codes = pre.codes(X)
+            for j, table in enumerate(self.cat_tables):
+                z += table[codes[:, j]]
+        return z
+
+    def predict_proba1(self, pre: CompiledPreprocessor, X: pd.DataFrame) -> np.ndarray:
+        return _sigmoid(self.decision(pre, X))
+
+
+@dataclass
+class TreeEnsemble:
+    kind: np.ndarray  # int8: -1 hoja, 0 numérica, 1 categórica (one-hot)
+    col: np.ndarray  # columna en la matriz numérica o de códigos
+    cat: np.ndarray  # categoría que vale 1 en el one-hot (solo kind == 1)
+    threshold: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    default_left: np.ndarray  # hacia dónde va un NaN
+    value: np.ndarray  # proba clase 1 (RF) o peso de hoja (XGBoost)
+    roots: np.ndarray
+    max_depth: int
+    strict: bool  # XGBoost: x < umbral; sklearn: x <= umbral
+    mode: str  # "mean" (promedio de probas) o "logit" (suma de márgenes + sigmoide)
+    base_margin: float = 0.0
+    chunk_rows: int = 2048
+
+    def _leaves(self, Z: np.ndarray, C: np.ndarray) -> np.ndarray:
+        n, T = len(Z), len(self.roots)
+        rows = np.arange(n)[:, None]
+        node = np.broadcast_to(self.roots, (n, T)).copy()
+        for _ in range(self.max_depth):
+            kind = self.kind[node]
+            active = kind != KIND_LEAF
+            if not active.any():
+                break
+            col = self.col[node]
+            is_cat = kind == KIND_CAT
+            v_num = Z[rows, np.where(is_cat, 0, col)]
+            v_cat = (C[rows, np.where(is_cat, col, 0)] == self.cat[node]).astype(np.float32)
+            v = np.where(is_cat, v_cat, v_num)
+            thr = self.threshold[node]
+            go_left = v < thr if self.strict else v <= thr
+            go_left = np.where(np.isnan(v), self.default_left[node], go_left)
+            nxt = np.where(go_left, self.left[node], self.right[node])
+            node = np.where(active, nxt, node)
+        return self.value[node]
+
+    def predict_proba1(self, pre: CompiledPreprocessor, X: pd.DataFrame) -> np.ndarray:
+        Z = pre.scaled(X).astype(np.float32)
+        C = pre.codes(X)
+        # Columna ficticia para que el gather sea válido si no hay numéricas/categóricas.
+        if Z.shape[1] == 0:
+            Z = np.zeros((len(X), 1), dtype=np.float32)
+        if C.shape[1] == 0:
+            C = np.full((len(X), 1), -1, dtype=np.int64)
+
+        out = np.empty(len(X))
+        for s in range(0, len(X), self.chunk_rows):
+            leaves = self._leaves(Z[s : s + self.chunk_rows], C[s : s + self.chunk_rows])
+            if self.mode == "mean":
+                out[s : s + self.chunk_rows] = leaves.mean(axis=1)
+            else:
+                out[s : s + self.chunk_rows] = _sigmoid(self.base_margin + leaves.sum(axis=1))
+        return out
+
+
+@dataclass
+class CompiledPipeline:
+    """Sustituto de Pipeline.predict_proba evaluado íntegramente en NumPy."""
+
+    preprocessor: CompiledPreprocessor
+    head: Any  # LinearHead | TreeEnsemble
+    feature_names_in_: np.ndarray
+    classes_: np.ndarray
+    source: str
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        p = self.head.predict_proba1(self.preprocessor, X)
+        return np.column_stack([1.0 - p, p])
+
+    def describe(self) -> Dict[str, Any]:
+        out = {
+            "source": self.source,
+            "n_num": len(self.preprocessor.num_cols),
+            "n_cat": len(self.preprocessor.cat_cols),
+            "n_features_out": len(self.preprocessor.out_kind),
+        }
+        if isinstance(self.head, TreeEnsemble):
+            out.update(n_trees=len(self.head.roots), n_nodes=len(self.head.kind))
+        return out
+
+
+# =============================================================
+# Aplanado del preprocesamiento
+# =============================================================
+
+
+def _split_steps(pipeline) -> tuple:
+    from sklearn.pipeline import Pipeline
+
+    if isinstance(pipeline, Pipeline):
+        steps = [s for _, s in pipeline.steps if s not in (None, "passthrough")]
+        if len(steps) > 2:
+            raise UnsupportedPipelineError("Se espera Pipeline([prep, estimador]).")
+        return (steps[0] if len(steps) == 2 else None), steps[-1]
+    return None, pipeline
+
+
+def _block_steps(transformer) -> list:
+    from sklearn.pipeline import Pipeline
+
+    if transformer == "passthrough":
+        return []
+    if isinstance(transformer, Pipeline):
+        return [s for _, s in transformer.steps if s not in (None, "passthrough")]
+    return [transformer]
+
+
+def _compile_preprocessor(prep, estimator) -> CompiledPreprocessor:
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    if prep is None:
+        names = [str(c) for c in getattr(estimator, "feature_names_in_", [])]
+        if not names:
+            raise UnsupportedPipelineError("Estimador sin feature_names_in_ ni preprocesador.")
+        blocks = [("passthrough", names)]
+    elif isinstance(prep, ColumnTransformer):
+        blocks = [(t, list(cols)) for _, t, cols in prep.transformers_ if t != "drop"]
+    else:
+        raise UnsupportedPipelineError(f"Preprocesador no soportado: {type(prep).__name__}")
+
+    num_cols, num_fill, num_mean, num_scale = [], [], [], []
+    cat_cols, cat_categories, cat_fill = [], [], []
+    out_kind, out_col, out_cat = [], [], []
+
+    for transformer, cols in blocks:
+        cols = [str(c) for c in cols]
+        steps = _block_steps(transformer)
+        ohe = next((s for s in steps if isinstance(s, OneHotEncoder)), None)
+        imputer = next((s for s in steps if isinstance(s, SimpleImputer)), None)
+        for s in steps:
+            if not isinstance(s, (SimpleImputer, StandardScaler, OneHotEncoder)):
+                raise UnsupportedPipelineError(f"Paso no soportado: {type(s).__name__}")
+        if imputer is not None and imputer.add_indicator:
+            raise UnsupportedPipelineError("SimpleImputer(add_indicator=True) no soportado.")
+
+        if ohe is None:
+            scaler = next((s for s in steps if isinstance(s, StandardScaler)), None)
+            stats = (
+                np.asarray(imputer.statistics_, dtype=np.float64)
+                if imputer is not None
+                else np.full(len(cols), np.nan)
+            )
+            # SimpleImputer descarta columnas sin ningún valor en el fit.
+            keep = (
+                np.ones(len(cols), dtype=bool)
+                if imputer is None or imputer.keep_empty_features
+                else ~np.isnan(stats)
+            )
+            kept = [c for c, k in zip(cols, keep) if k]
+            mean = np.zeros(len(kept))
+            scale = np.ones(len(kept))
+            if scaler is not None:
+                if scaler.mean_ is not None and scaler.with_mean:
+                    mean = np.asarray(scaler.mean_, dtype=np.float64)
+                if scaler.scale_ is not None:
+                    scale = np.asarray(scaler.scale_, dtype=np.float64)
+            for i, c in enumerate(kept):
+                out_kind.append(KIND_NUM)
+                out_col.append(len(num_cols))
+                out_cat.append(-1)
+                num_cols.append(c)
+                num_fill.append(stats[keep][i])
+                num_mean.append(mean[i])
+                num_scale.append(scale[i])
+        else:
+            if ohe.drop is not None or getattr(ohe, "_infrequent_enabled", False):
+                raise UnsupportedPipelineError("OneHotEncoder con drop/infrecuentes no soportado.")
+            if steps.index(ohe) != len(steps) - 1:
+                raise UnsupportedPipelineError("El OneHotEncoder debe ser el último paso.")
+            stats = list(imputer.statistics_) if imputer is not None else [np.nan] * len(cols)
+            for j, c in enumerate(cols):
+                cats = np.asarray(ohe.categories_[j], dtype=object)
+                for k in range(len(cats)):
+                    out_kind.append(KIND_CAT)
+                    out_col.append(len(cat_cols))
+                    out_cat.append(k)
+                cat_cols.append(c)
+                cat_categories.append(cats)
+                cat_fill.append(stats[j])
+
+    return CompiledPreprocessor(
+        num_cols=num_cols,
+        num_fill=np.asarray(num_fill, dtype=np.float64),
+        num_mean=np.asarray(num_mean, dtype=np.float64),
+        num_scale=np.asarray(num_scale, dtype=np.float64),
+        cat_cols=cat_cols,
+        cat_categories=cat_categories,
+        cat_fill=cat_fill,
+        out_kind=np.asarray(out_kind, dtype=np.int8),
+        out_col=np.asarray(out_col, dtype=np.int32),
+        out_cat=np.asarray(out_cat, dtype=np.int32),
+    )
+
+
+# =============================================================
+# Aplanado de estimadores
+# =============================================================
+
+
+def _compile_linear(est, pre: CompiledPreprocessor) -> LinearHead:
+    coef = np.asarray(est.coef_, dtype=np.float64)
+    if coef.shape[0] != 1:
+        raise UnsupportedPipelineError("Solo clasificación binaria.")
+    coef = coef[0]
+    if len(coef) != len(pre.out_kind):
+        raise UnsupportedPipelineError("Coeficientes no coinciden con las features de salida.")
+
+    num_idx = np.flatnonzero(pre.out_kind == KIND_NUM)
+    # w * (x - mean) / scale = (w / scale) * x - w * mean / scale
+    w_num = np.zeros(len(pre.num_cols))
+    w_num[pre.out_col[num_idx]] = coef[num_idx]
+    coef_num = w_num / pre.num_scale
+    intercept = float(np.asarray(est.intercept_).ravel()[0]) - float(coef_num @ pre.num_mean)
+
+    tables = [np.zeros(len(c) + 1) for c in pre.cat_categories]
+    for i in np.flatnonzero(pre.out_kind == KIND_CAT):
+        tables[pre.out_col[i]][pre.out_cat[i]] = coef[i]
+    return LinearHead(coef_num=coef_num, intercept=intercept, cat_tables=tables)
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray, root: int) -> int:
+    depth, frontier = 0, [root]
+    while frontier:
+        nxt = [c for n in frontier for c in (left[n], right[n]) if c >= 0]
+        if not nxt:
+            break
+        depth, frontier = depth + 1, nxt
+    return depth
+
+
+def _pack_trees(trees: List[Dict[str, np.ndarray]], pre: CompiledPreprocessor, **kwargs):
+    """Concatena árboles (índices locales) en arreglos planos con índices absolutos."""
+    kind, col, cat, thr, left, right, dleft, value, roots = ([] for _ in range(9))
+    offset, max_depth = 0, 0
+    for t in trees:
+        is_leaf = t["left"] < 0
+        feat = np.where(is_leaf, 0, t["feature"])
+        kind.append(np.where(is_leaf, KIND_LEAF, pre.out_kind[feat]).astype(np.int8))
+        col.append(np.where(is_leaf, 0, pre.out_col[feat]).astype(np.int32))
+        cat.append(np.where(is_leaf, -1, pre.out_cat[feat]).astype(np.int32))
+        thr.append(t["threshold"])
+        left.append(np.where(is_leaf, -1, t["left"] + offset).astype(np.int32))
+        right.append(np.where(is_leaf, -1, t["right"] + offset).astype(np.int32))
+        dleft.append(t["default_left"].astype(bool))
+        value.append(t["value"])
+        roots.append(offset)
+        max_depth = max(max_depth, _tree_depth(t["left"], t["right"], 0))
+        offset += len(is_leaf)
+
+    return TreeEnsemble(
+        kind=np.concatenate(kind),
+        col=np.concatenate(col),
+        cat=np.concatenate(cat),
+        threshold=np.concatenate(thr).astype(np.float64),
+        left=np.concatenate(left),
+        right=np.concatenate(right),
+        default_left=np.concatenate(dleft),
+        value=np.concatenate(value).astype(np.float64),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        **kwargs,
+    )
+
+
+def _compile_sklearn_trees(est, pre: CompiledPreprocessor) -> TreeEnsemble:
+    estimators = getattr(est, "estimators_", [est])
+    trees = []
+    for tree in estimators:
+        t = tree.tree_
+        v = t.value[:, 0, :]
+        proba = v[:, 1] / np.maximum(v.sum(axis=1), 1e-300)
+        missing_left = getattr(t, "missing_go_to_left", None)
+        trees.append(
+            {
+                "feature": t.feature,
+                "threshold": t.threshold,
+                "left": t.children_left,
+                "right": t.children_right,
+                "default_left": (
+                    np.asarray(missing_left, dtype=bool)
+                    if missing_left is not None
+                    else np.ones(t.node_count, dtype=bool)
+                ),
+                "value": proba,
+            }
+        )
+    return _pack_trees(trees, pre, strict=False, mode="mean")
+
+
+def _compile_xgboost(est, pre: CompiledPreprocessor) -> TreeEnsemble:
+    booster = est.get_booster()
+    cfg = json.loads(booster.save_raw("json"))
+    learner = cfg["learner"]
+    if learner["objective"]["name"] != "binary:logistic":
+        raise UnsupportedPipelineError("XGBoost: solo objective binary:logistic.")
+    gb = learner["gradient_booster"]
+    if gb.get("name") != "gbtree":
+        raise UnsupportedPipelineError("XGBoost: solo booster gbtree.")
+
+    base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+    base_margin = float(np.log(base_score / (1.0 - base_score)))
+
+    raw_trees = gb["model"]["trees"]
+    per_round = int(gb["model"]["gbtree_model_param"].get("num_parallel_tree", "1"))
+    try:
+        best = est.best_iteration
+        raw_trees = raw_trees[: (best + 1) * per_round]
+    except AttributeError:
+        pass
+
+    trees = []
+    for t in raw_trees:
+        if any(int(s) != 0 for s in t.get("split_type", [])):
+            raise UnsupportedPipelineError("XGBoost: splits categóricos nativos no soportados.")
+        left = np.asarray(t["left_children"], dtype=np.int64)
+        cond = np.asarray(t["split_conditions"], dtype=np.float32).astype(np.float64)
+        trees.append(
+            {
+                "feature": np.asarray(t["split_indices"], dtype=np.int64),
+                "threshold": cond,
+                "left": left,
+                "right": np.asarray(t["right_children"], dtype=np.int64),
+                "default_left": np.asarray(t["default_left"], dtype=bool),
+                # En las hojas, split_conditions guarda el peso de la hoja.
+                "value": np.where(left < 0, cond, 0.0),
+            }
+        )
+    return _pack_trees(trees, pre, strict=True, mode="logit", base_margin=base_margin)
+
+
+def compile_pipeline(pipeline) -> CompiledPipeline:
+    """Aplana un pipeline sklearn entrenado en un CompiledPipeline equivalente."""
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+
+    prep, est = _split_steps(pipeline)
+    classes = np.asarray(getattr(est, "classes_", [0, 1]))
+    if len(classes) != 2:
+        raise UnsupportedPipelineError("Solo clasificación binaria.")
+    pre = _compile_preprocessor(prep, est)
+
+    if isinstance(est, LogisticRegression):
+        head = _compile_linear(est, pre)
+    elif isinstance(est, (RandomForestClassifier, ExtraTreesClassifier, DecisionTreeClassifier)):
+        head = _compile_sklearn_trees(est, pre)
+    elif type(est).__name__ == "XGBClassifier":
+        head = _compile_xgboost(est, pre)
+    else:
+        raise UnsupportedPipelineError(f"Estimador no soportado: {type(est).__name__}")
+
+    names = getattr(pipeline, "feature_names_in_", None)
+    if names is None:
+        names = pre.num_cols + pre.cat_cols
+    return CompiledPipeline(
+        preprocessor=pre,
+        head=head,
+        feature_names_in_=np.asarray([str(c) for c in names], dtype=object),
+        classes_=classes,
+        source=type(est).__name__,
+    )
+
+
+def ensure_compiled(model) -> CompiledPipeline:
+    """Devuelve el modelo compilado (compila si recibe el pipeline sklearn original)."""
+    return model if isinstance(model, CompiledPipeline) else compile_pipeline(model)
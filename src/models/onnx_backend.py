@@ -0,0 +1,241 @@
+"""
+Backend ONNX Runtime para los pipelines de clasificación del proyecto.
+
+export_onnx() convierte el Pipeline completo (ColumnTransformer -> SimpleImputer ->
+StandardScaler -> OneHotEncoder -> estimador) a ONNX con una entrada tipada por columna:
+numéricas como float [N, 1] y categóricas como string [N, 1]. El grafo resultante recibe las
+mismas columnas que /predict_proba, sin el preprocesamiento placeholder de Sprint 4.
+
+ONNX no admite NaN/None en tensores de texto, así que en el grafo exportado:
+- el faltante categórico (NaN) se representa con "" (missing_values del imputer);
+- None, que para sklearn es un valor más y puede ser categoría o relleno del imputer, pasa a
+  una marca propia;
+- los valores no textuales de una columna categórica se envían como una marca desconocida,
+  igual que sklearn, que compara objetos Python (2024.0 != "2024.0").
+
+Los numéricos viajan en float32 (el Imputer de ONNX Runtime no admite double): la paridad
+con pipeline.pkl es del orden de 1e-6, no exacta.
+"""
+
+import copy
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.models.compiled import UnsupportedPipelineError, _block_steps, _split_steps
+
+MISSING = ""
+NONE = "\x00<None>"
+UNKNOWN = "\x00<unk>"
+
+
+def _text(value) -> str:
+    if value is None:
+        return NONE
+    if isinstance(value, float) and value != value:
+        return MISSING
+    if not isinstance(value, str):
+        raise UnsupportedPipelineError(f"Categoría no textual: {value!r}")
+    return value
+
+
+def _onnx_ready(pipeline):
+    """Copia del pipeline con los bloques categóricos adaptados a tensores de texto."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import OneHotEncoder
+
+    pipeline = copy.deepcopy(pipeline)
+    prep, _ = _split_steps(pipeline)
+    if not isinstance(prep, ColumnTransformer):
+        raise UnsupportedPipelineError("Se espera Pipeline([ColumnTransformer, estimador]).")
+
+    num_cols, cat_cols = [], []
+    for name, transformer, cols in prep.transformers_:
+        if transformer == "drop":
+            continue
+        if name == "remainder":
+            raise UnsupportedPipelineError("ColumnTransformer(remainder='passthrough') no soportado.")
+        steps = _block_steps(transformer)
+        ohe = next((s for s in steps if isinstance(s, OneHotEncoder)), None)
+        if ohe is None:
+            num_cols.extend(str(c) for c in cols)
+            continue
+        for s in steps:
+            if isinstance(s, SimpleImputer):
+                s.missing_values = MISSING
+                s.statistics_ = np.array([_text(v) for v in s.statistics_], dtype=object)
+        ohe.categories_ = [np.array([_text(v) for v in c], dtype=object) for c in ohe.categories_]
+        cat_cols.extend(str(c) for c in cols)
+    return pipeline, num_cols, cat_cols
+
+
+def _register_xgboost() -> None:
+    from onnxmltools.convert.xgboost.operator_converters.XGBoost import convert_xgboost
+    from skl2onnx import update_registered_converter
+    from skl2onnx.common.shape_calculator import calculate_linear_classifier_output_shapes
+    from xgboost import XGBClassifier
+
+    update_registered_converter(
+        XGBClassifier,
+        "XGBoostXGBClassifier",
+        calculate_linear_classifier_output_shapes,
+        convert_xgboost,
+        options={"nocl": [True, False], "zipmap": [True, False, "columns"]},
+    )
+
+
+def export_onnx(pipeline, target_opset: int = 17):
+    """Convierte el pipeline completo a ONNX. Devuelve (bytes, num_cols, cat_cols)."""
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType, StringTensorType
+
+    ready, num_cols, cat_cols = _onnx_ready(pipeline)
+    _, est = _split_steps(ready)
+    if type(est).__name__ == "XGBClassifier":
+        _register_xgboost()
+
+    initial_types = [(c, FloatTensorType([None, 1])) for c in num_cols] + [
+        (c, StringTensorType([None, 1])) for c in cat_cols
+    ]
+    model = convert_sklearn(
+        ready,
+        initial_types=initial_types,
+        target_opset=target_opset,
+        options={id(est): {"zipmap": False}},
+    )
+    return model.SerializeToString(), num_cols, cat_cols
+
+
+@dataclass
+class OnnxPipeline:
+    """
+    Sustituto de Pipeline.predict_proba sobre ONNX Runtime.
+
+    Guarda el grafo serializado; la InferenceSession se crea una vez por proceso (al primer
+    uso o tras deserializar) y se comparte entre hilos: InferenceSession.run es thread-safe.
+    """
+
+    model_bytes: bytes
+    num_cols: List[str]
+    cat_cols: List[str]
+    feature_names_in_: np.ndarray
+    classes_: np.ndarray
+    source: str
+    intra_op_threads: int = 1
+    inter_op_threads: int = 1
+    _session: Any = field(default=None, repr=False, compare=False)
+    _lock: Any = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_session"] = None
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, model_bytes: bytes, **threads) -> "OnnxPipeline":
+        """Reconstruye el wrapper desde un .onnx exportado con export_onnx()."""
+        empty = np.empty(0, dtype=object)
+        model = cls(model_bytes, [], [], empty, np.array([0, 1]), "onnx", **threads)
+        for inp in model.session.get_inputs():
+            (model.cat_cols if inp.type == "tensor(string)" else model.num_cols).append(inp.name)
+        model.feature_names_in_ = np.asarray(model.num_cols + model.cat_cols, dtype=object)
+        return model
+
+    def configure(self, intra_op_threads: int, inter_op_threads: int) -> "OnnxPipeline":
+        """Ajusta los hilos de ONNX Runtime (la sesión se recrea en el siguiente uso)."""
+        with self._lock:
+            self.intra_op_threads = intra_op_threads
+            self.inter_op_threads = inter_op_threads
+            self._session = None
+        return self
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import onnxruntime as ort
+
+                    so = ort.SessionOptions()
+                    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+                    so.intra_op_num_threads = self.intra_op_threads
+                    so.inter_op_num_threads = self.inter_op_threads
+                    # Varios hilos del pool de inferencia comparten la CPU: sin spin-wait.
+                    so.add_session_config_entry("session.intra_op.allow_spinning", "0")
+                    self._session = ort.InferenceSession(
+                        self.model_bytes, so, providers=["CPUExecutionProvider"]
+                    )
+        return self._session
+
+    def _feeds(self, X: pd.DataFrame) -> Dict[str, np.ndarray]:
+        n = len(X)
+        feeds = {}
+        for c in self.num_cols:
+            feeds[c] = X[c].to_numpy(dtype=np.float32, na_value=np.nan).reshape(n, 1)
+        for c in self.cat_cols:
+            s = X[c]
+            missing = s.isna().to_numpy()
+            if s.dtype == object:
+                v = s.to_numpy(dtype=object).copy()
+                is_text = np.fromiter((isinstance(x, str) for x in v), dtype=bool, count=n)
+                none = np.equal(v, None)
+                v[~is_text] = UNKNOWN
+                v[none] = NONE
+                missing = missing & ~none
+            elif pd.api.types.is_string_dtype(s.dtype):
+                v = s.to_numpy(dtype=object, na_value=MISSING)
+            else:
+                v = np.full(n, UNKNOWN, dtype=object)
+            v[missing] = MISSING
+            feeds[c] = v.reshape(n, 1)
+        return feeds
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        _, proba = self.session.run(None, self._feeds(X))
+        return np.asarray(proba, dtype=np.float64)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "n_num": len(self.num_cols),
+            "n_cat": len(self.cat_cols),
+            "onnx_bytes": len(self.model_bytes),
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+        }
+
+
+def to_onnx(pipeline, intra_op_threads: int = 1, inter_op_threads: int = 1) -> OnnxPipeline:
+    """Exporta el pipeline sklearn entrenado a un OnnxPipeline listo para servir."""
+    model_bytes, num_cols, cat_cols = export_onnx(pipeline)
+    _, est = _split_steps(pipeline)
+    names = getattr(pipeline, "feature_names_in_", None)
+    if names is None:
+        names = num_cols + cat_cols
+    return OnnxPipeline(
+        model_bytes=model_bytes,
+        num_cols=num_cols,
+        cat_cols=cat_cols,
+        feature_names_in_=np.asarray([str(c) for c in names], dtype=object),
+        classes_=np.asarray(getattr(est, "classes_", [0, 1])),
+        source=type(est).__name__,
+        intra_op_threads=intra_op_threads,
+        inter_op_threads=inter_op_threads,
+    )
+
+
+def ensure_onnx(model, intra_op_threads: int = 1, inter_op_threads: int = 1) -> OnnxPipeline:
+    """Devuelve el modelo ONNX con los hilos pedidos (exporta si recibe el pipeline sklearn)."""
+    if isinstance(model, OnnxPipeline):
+        return model.configure(intra_op_threads, inter_op_threads)
+    return to_onnx(model, intra_op_threads, inter_op_threads)
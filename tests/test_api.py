@@ -20,7 +20,7 @@ def test_predict_shape_ok(monkeypatch):
         def predict_proba(self, X):
             import numpy as np
 
-            return np.c_[1 - 0.7, [0.7] * len(X)]
+            return np.c_[[1 - 0.7] * len(X), [0.7] * len(X)]
 
     def fake_get():
         return DummyPipe(), {"columns": ["a", "b"], "best_threshold_f1": 0.6}
@@ -33,3 +33,126 @@ def test_predict_shape_ok(monkeypatch):
     body = r.json()
     assert len(body["resultados"]) == 2
     assert body["resultados"][0]["riesgoso"] is True
+
+
+def test_predict_proba_columnar(monkeypatch):
+    from src.api import deps
+
+    class DummyPipe:
+        def predict_proba(self, X):
+            import numpy as np
+
+            assert list(X.columns) == ["a", "b"]
+            p = np.where(X["a"].fillna(0) > 2, 0.9, 0.1)
+            return np.c_[1 - p, p]
+
+    def fake_get():
+        return DummyPipe(), {"columns": ["a", "b"], "best_threshold_f1": 0.6}
+
+    monkeypatch.setattr(deps, "get_model_and_meta", fake_get)
+    c = TestClient(app)
+
+    r = c.post("/predict_proba/columnar", json={"columns": {"a": [1, 5], "extra": [0, 0]}})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["proba"] == [0.1, 0.9]
+    assert body["riesgoso"] == [False, True]
+    assert body["threshold"] == 0.6
+
+    r = c.post("/predict_proba/columnar", json={"filas": [{"a": 5, "b": 1}]})
+    assert r.status_code == 200
+    assert r.json()["riesgoso"] == [True]
+
+    r = c.post("/predict_proba/columnar", json={"columns": {"a": [1, 2], "b": [1]}})
+    assert r.status_code == 422
+
+
+def test_predict_single_row(monkeypatch):
+    from src.api import deps
+
+    class DummyPipe:
+        def predict_proba(self, X):
+            import numpy as np
+
+            return np.c_[[0.2] * len(X), [0.8] * len(X)]
+
+    monkeypatch.setattr(
+        deps, "get_model_and_meta", lambda: (DummyPipe(), {"columns": ["a"], "best_threshold_f1": 0.6})
+    )
+    c = TestClient(app)
+    r = c.post("/predict", json={"features": {"a": 1}})
+    assert r.status_code == 200
+    assert r.json() == {"proba": 0.8, "threshold": 0.6, "riesgoso": True}
+
+
+def test_predict_proba_arrow_roundtrip(monkeypatch):
+    from src.api import deps
+    from src.api.arrow_io import ARROW_STREAM, PARQUET, read_table, write_table
+
+    class DummyPipe:
+        def predict_proba(self, X):
+            import numpy as np
+
+            assert list(X.columns) == ["a", "b"]
+            p = np.where(X["a"] > 2, 0.9, 0.1)
+            return np.c_[1 - p, p]
+
+    monkeypatch.setattr(
+        deps, "get_model_and_meta", lambda: (DummyPipe(), {"columns": ["a", "b"], "best_threshold_f1": 0.6})
+    )
+    import pandas as pd
+
+    body = write_table(pd.DataFrame({"a": [1, 5], "extra": ["x", "y"]}), ARROW_STREAM)
+    c = TestClient(app)
+    r = c.post(
+        "/predict_proba",
+        content=body,
+        headers={"Content-Type": ARROW_STREAM, "Accept": PARQUET},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"] == PARQUET
+    out = read_table(r.content, PARQUET)
+    assert out.column("proba").to_pylist() == [0.1, 0.9]
+    assert out.column("riesgoso").to_pylist() == [False, True]
+
+    r = c.post("/predict_proba", content=b"not arrow", headers={"Content-Type": ARROW_STREAM})
+    assert r.status_code == 422
+
+    r = c.post("/predict_proba", json={"filas": []})
+    assert r.status_code == 422
+
+
+def test_livez_and_readyz(monkeypatch, tmp_path):
+    from src.api import deps
+    from src.api.registry import ModelRegistry
+
+    reg = ModelRegistry(tmp_path / "nope.pkl", tmp_path / "nope.json")
+    monkeypatch.setattr(deps, "registry", reg)
+    c = TestClient(app)
+    assert c.get("/livez").json() == {"status": "alive"}
+
+    reg.state = "warming"
+    r = c.get("/readyz")
+    assert r.status_code == 503 and r.json()["status"] == "warming"
+
+    reg.state = "ready"
+    assert c.get("/readyz").status_code == 200
+
+
+def test_admin_closed_without_token(monkeypatch):
+    from src.api import deps
+
+    c = TestClient(app)
+    monkeypatch.setattr(deps, "ADMIN_TOKEN", None)
+    for method, path in (
+        ("post", "/admin/model/reload"),
+        ("post", "/admin/model/rollback"),
+        ("post", "/admin/models/default/load"),
+        ("get", "/admin/model"),
+    ):
+        assert getattr(c, method)(path).status_code == 404
+
+    monkeypatch.setattr(deps, "ADMIN_TOKEN", "secreto")
+    assert c.get("/admin/model").status_code == 403
+    assert c.get("/admin/model", headers={"X-Admin-Token": "otro"}).status_code == 403
+    assert c.get("/admin/model", headers={"X-Admin-Token": "secreto"}).status_code == 200
@@ -0,0 +1,105 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend-predictor"))
+
+import api  # noqa: E402
+
+
+class PctModel:
+    """proba = adicionales_pct."""
+
+    def predict_proba(self, X):
+        p = X["adicionales_pct"].to_numpy(dtype=float)
+        return np.c_[1 - p, p]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "_model", PctModel())
+    monkeypatch.setattr(api, "CSV_CHUNK_ROWS", 7)
+    return TestClient(api.app)
+
+
+def _obras(n):
+    return pd.DataFrame(
+        {
+            "id_obra": [f"O{i:03d}" for i in range(n)],
+            "adicionales_pct": (np.arange(n) % 50) / 50.0,
+            "penalidades": np.arange(n) % 3,
+            "region_riesgo": np.where(np.arange(n) % 4 == 0, "ALTA", "BAJA"),
+        }
+    )
+
+
+def _post_stream(client, df, formato):
+    return client.post(
+        f"/predict-csv/stream?formato={formato}",
+        files={"file": ("obras.csv", df.to_csv(index=False).encode(), "text/csv")},
+    )
+
+
+def test_predict_csv_stream_csv_en_orden(client):
+    df = _obras(30)  # 5 bloques de 7 filas, el último incompleto
+    r = _post_stream(client, df, "csv")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/csv")
+    assert r.text.count("id_obra") == 1
+    out = pd.read_csv(io.StringIO(r.text))
+    assert out["id_obra"].tolist() == df["id_obra"].tolist()
+    np.testing.assert_allclose(out["prob_riesgo"], df["adicionales_pct"])
+    assert out["pred_riesgo"].tolist() == (df["adicionales_pct"] >= 0.5).astype(int).tolist()
+    assert out.loc[0, "top_flags"] == "Región de riesgo ALTA"
+
+
+def test_predict_csv_stream_ndjson_en_orden(client):
+    df = _obras(30)
+    r = _post_stream(client, df, "ndjson")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["id_obra"] for row in rows] == df["id_obra"].tolist()
+    assert [row["flags_mask"] for row in rows[:3]] == [0b10000, 0b00100, 0b00100]
+
+
+def test_predict_usa_modulos_de_src_api(client):
+    from src.api.batching import MicroBatcher
+
+    assert isinstance(api.batcher, MicroBatcher)
+    obra = {
+        "costo_total": 1e6,
+        "plazo_meses": 12,
+        "adicionales_pct": 0.2,
+        "ampliaciones": 2,
+        "penalidades": 0,
+        "baja_competencia": 0,
+        "empresa_sancionada": 0,
+        "consorcio": 1,
+        "experiencia_entidad": 3,
+        "region_riesgo": "ALTA",
+        "tipo_proceso": "Licitación Pública",
+    }
+    r = client.post("/predict", json=obra)
+    assert r.status_code == 200
+    assert r.json() == {
+        "prob_riesgo": 0.2,
+        "pred_riesgo": 0,
+        "top_flags": ["Adicionales > 15%", ">= 2 Ampliaciones", "Región de riesgo ALTA"],
+        "flags_mask": 0b10011,
+    }
+
+
+def test_admin_profiles_requieren_token(client, monkeypatch):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", None)
+    assert client.get("/admin/profiles").status_code == 404
+    assert client.get("/admin/profiles/x.json").status_code == 404
+
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secreto")
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "otro"}).status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "secreto"}).status_code == 200
@@ -0,0 +1,89 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.api.batching import MicroBatcher
+
+
+def test_concurrent_requests_are_coalesced():
+    calls = []
+
+    def predict_fn(X):
+        calls.append(len(X))
+        return X["a"].to_numpy(dtype=float) / 100
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=64, max_wait_ms=20)
+
+    async def run():
+        frames = [pd.DataFrame({"a": [i]}) for i in range(10)]
+        frames.append(pd.DataFrame({"a": [50, 60]}))
+        out = await asyncio.gather(*(batcher.submit(f) for f in frames))
+        await batcher.stop()
+        return out
+
+    out = asyncio.run(run())
+    assert [float(o[0]) for o in out[:10]] == [i / 100 for i in range(10)]
+    assert np.allclose(out[10], [0.5, 0.6])
+    assert sum(calls) == 12
+    assert len(calls) < 11
+
+
+def test_failed_batch_retries_each_request():
+    calls = []
+
+    def predict_fn(X):
+        calls.append(len(X))
+        if (X["a"] < 0).any():
+            raise ValueError("fila inválida")
+        return X["a"].to_numpy(dtype=float) / 100
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        res = await asyncio.gather(
+            *(batcher.submit(pd.DataFrame({"a": [a]})) for a in (10, -1, 30)),
+            return_exceptions=True,
+        )
+        await batcher.stop()
+        return res
+
+    good, bad, other = asyncio.run(run())
+    assert isinstance(bad, ValueError)
+    assert float(good[0]) == 0.1 and float(other[0]) == 0.3
+    assert calls == [3, 1, 1, 1]
+
+
+def test_requests_grouped_by_model():
+    calls = []
+
+    def predict_fn(X, model):
+        calls.append((model["v"], len(X)))
+        return X["a"].to_numpy(dtype=float) * model["v"]
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=64, max_wait_ms=20)
+    v1, v2 = {"v": 1}, {"v": 2}
+
+    async def run():
+        frames = [pd.DataFrame({"a": [i]}) for i in range(6)]
+        models = [v1, v2, v1, v2, v1, v1]
+        out = await asyncio.gather(*(batcher.submit(f, m) for f, m in zip(frames, models)))
+        await batcher.stop()
+        return out
+
+    out = asyncio.run(run())
+    assert [float(o[0]) for o in out] == [0, 2, 2, 6, 4, 5]
+    assert sorted(calls) == [(1, 4), (2, 2)]
+
+
+def test_decision_function_scores_do_not_depend_on_batch():
+    from sklearn.svm import LinearSVC
+
+    from src.api.inference import predict_scores
+
+    X = pd.DataFrame({"a": np.linspace(-2, 2, 40)})
+    model = LinearSVC().fit(X, (X["a"] > 0).astype(int))
+    full = predict_scores(model, X)
+    alone = np.concatenate([predict_scores(model, X.iloc[[i]]) for i in range(40)])
+    assert np.allclose(alone, full)
+    assert 0 < predict_scores(model, X.iloc[[0]])[0] < 0.5 < predict_scores(model, X.iloc[[39]])[0]
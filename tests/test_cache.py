@@ -0,0 +1,94 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.api.cache import PredictionCache, row_keys
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, X):
+        self.rows += len(X)
+        return np.asarray(X["a"], dtype=float) / 10.0
+
+
+def test_row_keys_distinguish_types():
+    X = pd.DataFrame({"a": [2023, "2023", None, np.nan]}, dtype=object)
+    assert len(set(row_keys(X).tolist())) == 4
+    Y = pd.DataFrame({"a": [1.0, 2.0], "b": ["x", None]})
+    assert (row_keys(Y) == row_keys(Y.copy())).all()
+
+
+def test_cache_hits_only_compute_misses():
+    cache = PredictionCache(max_entries=100, ttl_seconds=60)
+    model = CountingModel()
+    X = pd.DataFrame({"a": [1.0, 2.0, 3.0]})
+
+    np.testing.assert_allclose(cache.predict("v1", X, model), [0.1, 0.2, 0.3])
+    Y = pd.DataFrame({"a": [3.0, 4.0, 1.0]})
+    np.testing.assert_allclose(cache.predict("v1", Y, model), [0.3, 0.4, 0.1])
+    assert model.rows == 4
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 4
+
+    # Otra versión del modelo no reutiliza entradas.
+    cache.predict("v2", X, model)
+    assert model.rows == 7
+
+
+def test_cache_lru_ttl_and_clear():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    model = CountingModel()
+    for v in (1.0, 2.0, 3.0):
+        cache.predict("v1", pd.DataFrame({"a": [v]}), model)
+    assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+    expired = PredictionCache(max_entries=10, ttl_seconds=1e-9)
+    expired.predict("v1", pd.DataFrame({"a": [1.0]}), model)
+    expired.predict("v1", pd.DataFrame({"a": [1.0]}), model)
+    assert expired.stats()["hits"] == 0 and expired.stats()["expired"] == 1
+
+
+def test_cache_without_version_is_bypassed():
+    cache = PredictionCache()
+    model = CountingModel()
+    X = pd.DataFrame({"a": [1.0]})
+    cache.predict(None, X, model)
+    cache.predict(None, X, model)
+    assert model.rows == 2 and cache.stats()["entries"] == 0
+
+
+def test_cache_apredict():
+    cache = PredictionCache()
+    model = CountingModel()
+
+    async def submit(X):
+        return model(X)
+
+    X = pd.DataFrame({"a": [5.0, 6.0]})
+    asyncio.run(cache.apredict("v1", X, submit))
+    out = asyncio.run(cache.apredict("v1", X, submit))
+    np.testing.assert_allclose(out, [0.5, 0.6])
+    assert model.rows == 2
+
+
+def test_cache_bypasses_large_batches():
+    cache = PredictionCache(max_entries=100, ttl_seconds=60, max_rows=2)
+    model = CountingModel()
+    X = pd.DataFrame({"a": [1.0, 2.0, 3.0]})
+    cache.predict("v1", X, model)
+    cache.predict("v1", X, model)
+    stats = cache.stats()
+    assert model.rows == 6 and stats["entries"] == 0 and stats["bypassed_batches"] == 2
+    assert stats["hits"] == stats["misses"] == 0
+
+    cache.predict("v1", X.head(2), model)
+    cache.predict("v1", X.head(2), model)
+    assert model.rows == 8 and cache.stats()["hits"] == 2
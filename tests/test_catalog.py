@@ -0,0 +1,162 @@
+import contextlib
+import json
+import threading
+import time
+
+import joblib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.catalog import ModelCatalog, parse_model_specs
+from src.api.main import app
+from src.api.registry import ModelNotReadyError, ModelRegistry
+from src.api.shadow import ShadowScorer, compare
+
+
+def _registry(tmp_path, name, size, gate=None):
+    pkl = tmp_path / f"{name}.pkl"
+    meta = tmp_path / f"{name}_meta.json"
+    joblib.dump({"name": name}, pkl)
+    meta.write_text(json.dumps({"columns": ["a"], "best_threshold_f1": 0.5}))
+    adapter = (lambda obj: gate.wait(5) and obj) if gate is not None else None
+    reg = ModelRegistry(pkl, meta, adapter=adapter, warmup_sizes=())
+    reg.memory_bytes = lambda: size if reg.loaded else 0
+    return reg
+
+
+def test_parse_model_specs(tmp_path):
+    default_meta = tmp_path / "pipeline_meta.json"
+    (tmp_path / "rf_meta.json").write_text("{}")
+    spec = f"rf={tmp_path / 'rf.pkl'}, onnx={tmp_path / 'sub' / 'x.pkl'}@onnx,"
+    assert parse_model_specs(spec, default_meta) == [
+        ("rf", tmp_path / "rf.pkl", tmp_path / "rf_meta.json", "sklearn"),
+        ("onnx", tmp_path / "sub" / "x.pkl", default_meta, "onnx"),
+    ]
+    with pytest.raises(ValueError):
+        parse_model_specs("sin_ruta", default_meta)
+
+
+def _wait(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cond()
+
+
+def test_catalog_lazy_load_and_memory_budget(tmp_path):
+    gate = threading.Event()
+    catalog = ModelCatalog("main", budget_bytes=250)
+    catalog.add("main", _registry(tmp_path, "main", 100), pinned=True)
+    catalog.add("a", _registry(tmp_path, "a", 100, gate))
+    catalog.add("b", _registry(tmp_path, "b", 100, gate))
+    catalog.load_async("main").join(5)
+
+    for name in ("a", "b"):
+        # Primer uso: ModelNotReadyError (503) mientras carga en segundo plano.
+        gate.clear()
+        with pytest.raises(ModelNotReadyError):
+            catalog.get(name)
+        gate.set()
+        _wait(lambda: catalog.registry(name).loaded)
+    _wait(lambda: catalog.stats()["evictions"] == 1)
+    assert catalog.get("b")[0] == {"name": "b"}
+
+    # main (fijado) + b caben en 250; "a" era el menos usado y se descargó.
+    stats = catalog.stats()
+    assert stats["used_bytes"] == 200
+    assert stats["models"]["a"]["state"] == "idle"
+
+
+def test_failed_model_backs_off_until_reset(tmp_path):
+    catalog = ModelCatalog("main", retry_seconds=60)
+    reg = _registry(tmp_path, "a", 100)
+    catalog.add("a", reg)
+    reg.pipeline_path.unlink()
+    catalog.load_async("a").join(5)
+    assert reg.state == "failed"
+
+    # En espera: 503 sin relanzar la carga en cada request.
+    calls = []
+    catalog.load_async = lambda name: calls.append(name)
+    for _ in range(3):
+        with pytest.raises(ModelNotReadyError, match="reintento"):
+            catalog.get("a")
+    assert calls == [] and catalog.stats()["models"]["a"]["failures"] == 1
+
+    # reset (POST /admin/models/a/load) reintenta en el momento.
+    del catalog.load_async
+    joblib.dump({"name": "a"}, reg.pipeline_path)
+    catalog.reset("a")
+    with contextlib.suppress(ModelNotReadyError):  # 503 salvo que la carga ya haya terminado
+        catalog.get("a")
+    _wait(lambda: reg.loaded)
+    assert catalog.get("a")[0] == {"name": "a"}
+    assert catalog.stats()["models"]["a"]["failures"] == 0
+
+
+def test_compare_and_shadow_log(tmp_path):
+    primary = np.array([0.1, 0.6, 0.9])
+    challenger = np.array([0.2, 0.4, 0.9])
+    diff = compare(primary, challenger, 0.5, 0.5)
+    assert diff["disagreements"] == 1 and diff["disagree_rows"] == [1]
+    assert diff["max_abs_diff"] == pytest.approx(0.2)
+
+    shadow = ShadowScorer("rf", directory=tmp_path)
+    assert shadow.submit("/predict_proba", lambda: (challenger, 0.5, "v2"), primary, 0.5, "v1")
+    _wait(lambda: shadow.stats()["requests"]["ok"] == 1)
+    shadow.stop()
+    (log,) = tmp_path.glob("shadow_*.jsonl")
+    record = json.loads(log.read_text())
+    assert record["version"] == "v2" and record["primary_version"] == "v1"
+    assert record["disagreements"] == 1
+
+
+class _FakeRegistry:
+    loaded, state = True, "ready"
+
+    def __init__(self, proba, columns):
+        self.proba, self.columns = proba, columns
+
+    def get(self):
+        outer = self
+
+        class Pipe:
+            def predict_proba(self, X):
+                return np.c_[1 - np.full(len(X), outer.proba), np.full(len(X), outer.proba)]
+
+        return Pipe(), {"columns": self.columns, "model_version": f"v{self.proba}"}
+
+    def memory_bytes(self):
+        return 0
+
+    def stats(self):
+        return {"state": self.state, "version": f"v{self.proba}"}
+
+
+def test_model_selection_and_shadow_endpoint(monkeypatch, tmp_path):
+    from src.api import deps
+
+    main = _FakeRegistry(0.7, ["a", "b"])
+    catalog = ModelCatalog("default")
+    catalog.add("default", main, pinned=True)
+    catalog.add("rf", _FakeRegistry(0.2, ["a"]), pinned=True)
+    shadow = ShadowScorer("rf", directory=tmp_path)
+    monkeypatch.setattr(deps, "get_model_and_meta", main.get)
+    monkeypatch.setattr(deps, "catalog", catalog)
+    monkeypatch.setattr(deps, "shadow", shadow)
+    monkeypatch.setattr(deps, "SHADOW_MODEL", "rf")
+    monkeypatch.setattr(deps.prediction_cache, "max_entries", 0)
+
+    c = TestClient(app)
+    payload = {"filas": [{"a": 1, "b": 2}, {"a": 5}]}
+    by_header = c.post("/predict_proba?formato=arreglos", json=payload, headers={"X-Model": "rf"})
+    by_path = c.post("/models/rf/predict_proba?formato=arreglos", json=payload)
+    assert by_header.json()["proba"] == by_path.json()["proba"] == [0.2, 0.2]
+    assert c.post("/models/nope/predict_proba", json=payload).status_code == 404
+    assert c.get("/models").json()["models"]["rf"]["version"] == "v0.2"
+
+    # Solo el tráfico del modelo principal se compara en shadow.
+    assert c.post("/predict_proba?formato=arreglos", json=payload).json()["proba"] == [0.7, 0.7]
+    _wait(lambda: shadow.stats()["requests"]["ok"] == 1)
+    assert shadow.stats()["disagreements"] == 2
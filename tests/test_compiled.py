@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from src.models.compiled import (
+    CompiledPipeline,
+    CompiledPreprocessor,
+    compile_pipeline,
+    ensure_compiled,
+)
+
+
+def _data(n=600):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "x1": rng.normal(size=n),
+            "x2": rng.exponential(size=n) * 1000,
+            "x3": rng.integers(0, 5, n).astype(float),
+            "c1": rng.choice(["a", "b", "c", None], n).astype(object),
+            "c2": rng.choice(["u", "v"], n).astype(object),
+        }
+    )
+    df.loc[rng.random(n) < 0.1, "x1"] = np.nan
+    df.loc[rng.random(n) < 0.1, "c2"] = np.nan
+    y = ((df.x1.fillna(0) > 0) ^ (df.c1 == "a")).astype(int)
+    return df, y
+
+
+def _pipeline(est, with_mean=True):
+    num = Pipeline(
+        [("imp", SimpleImputer(strategy="median")), ("sc", StandardScaler(with_mean=with_mean))]
+    )
+    cat = Pipeline(
+        [
+            ("imp", SimpleImputer(strategy="most_frequent")),
+            ("ohe", OneHotEncoder(handle_unknown="ignore", sparse_output=False)),
+        ]
+    )
+    prep = ColumnTransformer([("num", num, ["x1", "x2", "x3"]), ("cat", cat, ["c1", "c2"])])
+    return Pipeline([("prep", prep), ("clf", est)])
+
+
+def _estimators():
+    yield LogisticRegression(max_iter=500)
+    yield RandomForestClassifier(n_estimators=20, random_state=0)
+    yield ExtraTreesClassifier(n_estimators=20, random_state=0)
+    try:
+        from xgboost import XGBClassifier
+    except ImportError:
+        return
+    yield XGBClassifier(n_estimators=30, max_depth=4)
+
+
+@pytest.mark.parametrize("est", list(_estimators()), ids=lambda e: type(e).__name__)
+def test_compiled_parity(est):
+    df, y = _data()
+    pipe = _pipeline(est).fit(df, y)
+    test = df.copy()
+    test.loc[::7, "c1"] = "zzz"  # categoría no vista en entrenamiento
+
+    compiled = compile_pipeline(pipe)
+    expected = pipe.predict_proba(test)[:, 1]
+    got = compiled.predict_proba(test)[:, 1]
+    np.testing.assert_allclose(got, expected, atol=1e-6)
+
+
+def test_ensure_compiled_is_idempotent():
+    df, y = _data()
+    pipe = _pipeline(LogisticRegression(max_iter=500)).fit(df, y)
+    compiled = ensure_compiled(pipe)
+    assert isinstance(compiled, CompiledPipeline)
+    assert ensure_compiled(compiled) is compiled
+    assert list(compiled.feature_names_in_) == list(df.columns)
+
+
+def test_codes_none_category():
+    # Artefactos con None como categoría (y como valor de relleno del imputer).
+    pre = CompiledPreprocessor(
+        num_cols=[],
+        num_fill=np.empty(0),
+        num_mean=np.empty(0),
+        num_scale=np.empty(0),
+        cat_cols=["c"],
+        cat_categories=[np.array(["a", "b", None], dtype=object)],
+        cat_fill=[None],
+        out_kind=np.empty(0, dtype=np.int8),
+        out_col=np.empty(0, dtype=np.int64),
+        out_cat=np.empty(0, dtype=np.int64),
+    )
+    codes = pre.codes(pd.DataFrame({"c": [np.nan, np.nan]}))
+    assert codes[:, 0].tolist() == [2, 2]
+    codes = pre.codes(pd.DataFrame({"c": ["b", None, np.nan, "zzz"]}))
+    assert codes[:, 0].tolist() == [1, 2, 2, -1]
+
+
+def test_exported_artifact_is_memory_mapped(tmp_path):
+    import json
+
+    import joblib
+
+    from src.api.registry import ModelRegistry
+
+    df, y = _data()
+    pipe = _pipeline(RandomForestClassifier(n_estimators=20, random_state=0)).fit(df, y)
+    joblib.dump(compile_pipeline(pipe), tmp_path / "pipeline_compiled.pkl")
+    (tmp_path / "pipeline_meta.json").write_text(json.dumps({"columns": list(df.columns)}))
+
+    reg = ModelRegistry(
+        tmp_path / "pipeline_compiled.pkl",
+        tmp_path / "pipeline_meta.json",
+        mmap_mode="r",
+        adapter=ensure_compiled,
+        backend="compiled",
+    )
+    compiled, _ = reg.get()
+    head, pre = compiled.head, compiled.preprocessor
+    for arr in (head.kind, head.threshold, head.left, head.right, head.value, pre.num_mean):
+        assert isinstance(arr, np.memmap) and not arr.flags.writeable
+    np.testing.assert_allclose(compiled.predict_proba(df), pipe.predict_proba(df), atol=1e-6)
@@ -0,0 +1,28 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.api.executor import InferencePool, PoolSaturatedError
+
+
+def test_pool_rejects_when_saturated():
+    pool = InferencePool(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        busy = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.pending == 2
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(lambda: None)
+        release.set()
+        await asyncio.gather(*busy)
+
+    asyncio.run(run())
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["pending"] == 0
+    assert stats["compute"]["count"] == 2
+    # la segunda tarea esperó en cola a que terminara la primera
+    assert stats["queue_wait"]["max_ms"] > 0
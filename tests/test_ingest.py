@@ -0,0 +1,105 @@
+import importlib.util
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+_SPEC = importlib.util.spec_from_file_location(
+    "ingest", Path(__file__).resolve().parents[1] / "scripts" / "ingest.py"
+)
+
+
+@pytest.fixture
+def ingest(monkeypatch, tmp_path):
+    mod = importlib.util.module_from_spec(_SPEC)
+    _SPEC.loader.exec_module(mod)
+    monkeypatch.setattr(mod, "BASE", tmp_path)
+    monkeypatch.setattr(mod, "RAW", tmp_path / "data" / "raw")
+    monkeypatch.setattr(mod, "OBJECTS", tmp_path / "data" / "raw" / "objects")
+    return mod
+
+
+def _registry(ingest, tmp_path):
+    return ingest.Registry(tmp_path / "data" / "datasets.jsonl")
+
+
+def test_new_duplicate_unchanged(ingest, tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.csv").write_text("x\n1\n")
+    (src / "b.csv").write_text("x\n1\n")
+    reg = _registry(ingest, tmp_path)
+    raw = ingest.RAW
+
+    a = ingest.ingest_file(reg, src / "a.csv", raw / "a.csv")
+    b = ingest.ingest_file(reg, src / "b.csv", raw / "b.csv")
+    again = ingest.ingest_file(reg, src / "a.csv", raw / "a.csv")
+    assert [a["result"], b["result"], again["result"]] == ["new", "duplicate", "unchanged"]
+    assert a["object"] == b["object"] and a["sha256"] == b["sha256"]
+    assert os.path.samefile(raw / "a.csv", raw / "b.csv")
+    assert (raw / "b.csv").read_text() == "x\n1\n"
+    assert len(list(ingest.OBJECTS.rglob("*.csv"))) == 1
+    assert not list(ingest.OBJECTS.glob(".ingest-*"))
+
+    # --verify vuelve a leer: mismo contenido ya almacenado -> duplicado.
+    assert ingest.ingest_file(reg, src / "a.csv", raw / "a.csv", verify=True)["result"] == (
+        "duplicate"
+    )
+    # Cambio de contenido -> objeto nuevo y el nombre en data/raw apunta a él.
+    (src / "a.csv").write_text("x\n2\n")
+    changed = ingest.ingest_file(reg, src / "a.csv", raw / "a.csv")
+    assert changed["result"] == "new" and (raw / "a.csv").read_text() == "x\n2\n"
+
+
+def test_index_reload(ingest, tmp_path):
+    (tmp_path / "a.csv").write_text("x\n1\n")
+    reg = _registry(ingest, tmp_path)
+    first = ingest.ingest_file(reg, tmp_path / "a.csv", ingest.RAW / "a.csv")
+
+    reloaded = _registry(ingest, tmp_path)
+    assert reloaded.by_sha[first["sha256"]]["file"] == "data/raw/a.csv"
+    assert reloaded.by_source[str((tmp_path / "a.csv").resolve())]["sha256"] == first["sha256"]
+    again = ingest.ingest_file(reloaded, tmp_path / "a.csv", ingest.RAW / "a.csv")
+    assert again["result"] == "unchanged"
+
+
+def test_reingest_restores_missing_object(ingest, tmp_path):
+    (tmp_path / "a.csv").write_text("x\n1\n")
+    ingest.ingest_file(_registry(ingest, tmp_path), tmp_path / "a.csv", ingest.RAW / "a.csv")
+
+    # Clon nuevo: el índice está versionado pero data/raw no.
+    shutil.rmtree(ingest.RAW)
+    reg = _registry(ingest, tmp_path)
+    rec = ingest.ingest_file(reg, tmp_path / "a.csv", ingest.RAW / "a.csv")
+    assert rec["result"] == "duplicate"
+    assert (tmp_path / rec["object"]).read_text() == "x\n1\n"
+    assert (ingest.RAW / "a.csv").read_text() == "x\n1\n"
+
+
+def test_bulk_mode(ingest, tmp_path):
+    src = tmp_path / "export"
+    (src / "sub").mkdir(parents=True)
+    (src / ".oculto").mkdir()
+    for i in range(6):
+        (src / f"f{i}.csv").write_text(f"x\n{i % 3}\n")
+    (src / "sub" / "g.csv").write_text("x\n9\n")
+    (src / "sub" / "nota.txt").write_text("no")
+    (src / ".oculto" / "h.csv").write_text("x\n8\n")
+    reg = _registry(ingest, tmp_path)
+    dest = ingest.RAW / "seace"
+
+    results = ingest.ingest_dir(reg, src, dest, "*.csv", workers=4, verify=False)
+    assert [r["file"] for r in results] == [
+        *(f"data/raw/seace/f{i}.csv" for i in range(6)),
+        "data/raw/seace/sub/g.csv",
+    ]
+    counts = {}
+    for r in results:
+        counts[r["result"]] = counts.get(r["result"], 0) + 1
+    assert counts == {"new": 4, "duplicate": 3}
+    assert len(list(ingest.OBJECTS.rglob("*.csv"))) == 4
+    assert (dest / "f4.csv").read_text() == "x\n1\n"
+
+    again = ingest.ingest_dir(reg, src, dest, "*.csv", workers=4, verify=False)
+    assert {r["result"] for r in again} == {"unchanged"}
@@ -0,0 +1,112 @@
+import json
+
+import pandas as pd
+
+from src.data.ingesta import cargar_carpeta, inferir_esquema
+
+
+def _csvs(folder):
+    folder.mkdir()
+    pd.DataFrame(
+        {"CODIGO": [1, 2], "NOMBRE": ["Educación", None], "FECHA": ["2024-01-05", "2024-02-01"]}
+    ).to_csv(folder / "DS_1A.csv", index=False, encoding="latin-1")
+    pd.DataFrame({"CODIGO": ["A3"], "MONTO": [1.5]}).to_csv(
+        folder / "DS_1B.csv", index=False, encoding="latin-1"
+    )
+    (folder / "DS_2A.csv").write_bytes(b"x,y\n1,2,3\n")  # fila con más campos: respaldo pandas
+
+
+def test_cargar_carpeta_igual_a_pandas(tmp_path):
+    folder = tmp_path / "obra"
+    _csvs(folder)
+    files = sorted(folder.glob("DS_1*.csv"))
+    esquemas = tmp_path / "esquemas.json"
+    esquemas.write_text(json.dumps({"obra": inferir_esquema(files)}))
+    assert json.loads(esquemas.read_text())["obra"]["CODIGO"] == "string"
+
+    df, lecturas = cargar_carpeta(folder, "DS_1*.csv", columna_origen="__source", esquemas=esquemas)
+    frames = [pd.read_csv(f, encoding="latin-1", dtype={"CODIGO": str}) for f in files]
+    for f, frame in zip(files, frames):
+        frame["__source"] = f.name
+    expected = pd.concat(frames, ignore_index=True)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    assert [s.filas for s in lecturas] == [2, 1] and all(s.mb_s > 0 for s in lecturas)
+
+    _, lecturas = cargar_carpeta(folder, "DS_2A.csv", esquemas=esquemas)
+    assert lecturas[0].motor == "pandas" and lecturas[0].error is None
+
+
+def test_leer_excel_cache_parquet(tmp_path):
+    from src.data.ingesta import iter_excel, leer_excel
+
+    libro = tmp_path / "perfilamiento_obra_riesgosa.xlsx"
+    df = pd.DataFrame({"CODIGO_UNICO": range(30), "RIESGO": ["ALTO", None, "BAJO"] * 10})
+    df.to_excel(libro, index=False)
+    cache = tmp_path / "cache"
+
+    first = leer_excel(libro, cache_dir=cache)
+    (entry,) = cache.glob("*.parquet")
+    pd.testing.assert_frame_equal(first, leer_excel(libro, cache_dir=cache))
+    pd.testing.assert_frame_equal(first, pd.read_excel(libro), check_dtype=False)
+
+    # Cambia el libro: nueva entrada y se descarta la anterior.
+    df.head(5).to_excel(libro, index=False)
+    assert len(leer_excel(libro, cache_dir=cache, streaming=True)) == 5
+    (nueva,) = cache.glob("*.parquet")
+    assert nueva != entry
+
+    assert [len(b) for b in iter_excel(libro, chunk_rows=2)] == [2, 2, 1]
+
+
+def test_leer_excel_tipos_mezclados_sin_cache(tmp_path):
+    from src.data.ingesta import leer_excel
+
+    libro = tmp_path / "mixto.xlsx"
+    pd.DataFrame({"CODIGO": [1, "x", 3], "MONTO": [1.5, 2.0, 3.0]}).to_excel(libro, index=False)
+    cache = tmp_path / "cache"
+
+    esperado = pd.read_excel(libro)
+    for streaming in (False, True, False):
+        df = leer_excel(libro, cache_dir=cache, streaming=streaming)
+        assert df["CODIGO"].tolist() == [1, "x", 3]
+        pd.testing.assert_frame_equal(df, esperado)
+    assert not list(cache.glob("*.parquet"))
+
+
+def test_unir_tablas_esquema_comun():
+    import pyarrow as pa
+
+    from src.data.ingesta import esquema_unificado, unir_tablas
+
+    a = pa.table({"b": [1, 2], "a": ["x", "y"], "v": pa.nulls(2)})
+    b = pa.table({"b": [0.5], "c": [True], "v": ["z"]})
+    assert esquema_unificado([a, b], ordenar=True) == pa.schema(
+        [("a", pa.string()), ("b", pa.float64()), ("c", pa.bool_()), ("v", pa.string())]
+    )
+    t = unir_tablas([a, b])
+    assert t.column_names == ["b", "a", "v", "c"]
+    assert t.column("b").to_pylist() == [1.0, 2.0, 0.5]
+    assert t.column("c").to_pylist() == [None, None, True]
+
+
+def test_smart_concat_ruc_como_texto_en_todos_los_archivos():
+    # DS_DASH_Empresa_2C.csv trae CODIGO_RUC_GANADOR solo con dígitos: el pd.concat original
+    # dejaba esas filas (26 de 8493) como int dentro de una columna object. El registro de
+    # esquemas lo tipa como texto en todos los archivos.
+    import importlib.util
+    from pathlib import Path
+
+    import pytest
+
+    carpeta = Path("data/external/empresa")
+    files = sorted(carpeta.glob("DS_DASH_Empresa_2*.csv"))
+    if not files:
+        pytest.skip("sin exportaciones de empresa")
+    spec = importlib.util.spec_from_file_location("ingest_external", "scripts/ingest_external.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+
+    ruc = mod.smart_concat(files)["CODIGO_RUC_GANADOR"].dropna()
+    assert ruc.map(type).eq(str).all()
+    solo_2c = pd.read_csv(carpeta / "DS_DASH_Empresa_2C.csv", encoding="latin-1")
+    assert set(solo_2c["CODIGO_RUC_GANADOR"].astype(str)) <= set(ruc)
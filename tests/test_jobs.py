@@ -0,0 +1,104 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.testclient import TestClient
+
+from src.api.jobs import DONE, JobManager
+from src.api.main import app
+
+
+class CountingPipe:
+    """proba = a / 100; cuenta las filas puntuadas para verificar la reanudación."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def predict_proba(self, X):
+        self.rows += len(X)
+        p = X["a"].to_numpy(dtype=float) / 100.0
+        return np.c_[1 - p, p]
+
+
+META = {
+    "columns": ["a", "b"],
+    "dtypes": {"a": "number", "b": "string"},
+    "best_threshold_f1": 0.5,
+    "model_version": "v1",
+}
+
+
+def _wait_done(manager, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while manager.get(job_id)["status"] != DONE and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return manager.status(job_id)
+
+
+def _write_csv(path, n):
+    df = pd.DataFrame({"id_obra": [f"O{i}" for i in range(n)], "a": np.arange(n) % 100, "b": "x"})
+    df.to_csv(path, index=False, encoding="latin-1")
+
+
+def test_job_resumes_unfinished_chunks(tmp_path):
+    pipe = CountingPipe()
+    manager = JobManager(tmp_path / "jobs", lambda name: (pipe, META), workers=2, chunk_rows=100)
+    job, upload = manager.create("csv", id_columns=["id_obra"], encoding="latin-1")
+    _write_csv(upload, 450)
+
+    # Simula una caída tras puntuar el primer chunk: el job queda sin terminar.
+    job.update(columns=META["columns"], dtypes=META["dtypes"])
+    manager._prepare(job)
+    manager._score_chunk(job, pipe, 0.5, 0)
+    assert pipe.rows == 100
+
+    restarted = JobManager(tmp_path / "jobs", lambda name: (pipe, META), workers=2)
+    assert restarted.resume() == [job["id"]]
+    status = _wait_done(restarted, job["id"])
+    assert status["status"] == DONE and status["progress"] == 1.0
+    assert status["rows"] == 450 and status["chunks"] == 5
+    assert pipe.rows == 450  # el chunk 0 no se volvió a puntuar
+
+    result = pq.read_table(restarted.result_path(job["id"])).to_pandas()
+    assert result["fila"].tolist() == list(range(450))
+    assert result["id_obra"].iloc[123] == "O123"
+    np.testing.assert_allclose(result["proba"], (np.arange(450) % 100) / 100.0)
+    assert result["riesgoso"].sum() == (np.arange(450) % 100 >= 50).sum()
+    restarted.stop()
+
+
+def test_jobs_endpoints_parquet(monkeypatch, tmp_path):
+    from src.api import deps
+
+    pipe = CountingPipe()
+    manager = JobManager(tmp_path / "jobs", lambda name: (pipe, META), workers=2, chunk_rows=64)
+    monkeypatch.setattr(deps, "jobs", manager)
+    c = TestClient(app)
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(pa.table({"a": np.arange(200, dtype=float), "extra": np.zeros(200)}), sink)
+    r = c.post(
+        "/jobs",
+        content=sink.getvalue().to_pybytes(),
+        headers={"Content-Type": "application/vnd.apache.parquet"},
+    )
+    assert r.status_code == 202
+    job_id = r.json()["id"]
+    assert r.headers["location"] == f"/jobs/{job_id}"
+
+    _wait_done(manager, job_id)
+    status = c.get(f"/jobs/{job_id}").json()
+    assert status["status"] == "done" and status["rows_done"] == 200
+    result = c.get(f"/jobs/{job_id}/result")
+    assert result.status_code == 200
+    table = pq.read_table(pa.BufferReader(result.content))
+    assert table.num_rows == 200 and table.column_names == ["fila", "proba", "riesgoso"]
+
+    assert c.post("/jobs", content=b"x", headers={"Content-Type": "image/png"}).status_code == 415
+    bad = c.post("/jobs?chunk_rows=-5", content=b"a\n1\n", headers={"Content-Type": "text/csv"})
+    assert bad.status_code == 422
+    assert c.get("/jobs/0000000000000000").status_code == 404
+    assert c.delete(f"/jobs/{job_id}").json()["deleted"] is True
+    manager.stop()
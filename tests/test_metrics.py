@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.metrics import Counter, Histogram
+
+
+def test_histogram_render_is_cumulative():
+    h = Histogram("demo_seconds", "demo", ("stage",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v, stage="model")
+    lines = h.render()
+    assert 'demo_seconds_bucket{stage="model",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="model",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{stage="model",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="model"} 4' in lines
+
+    c = Counter("demo_total", "demo", ("path",))
+    c.inc(path="/a")
+    c.inc(2, path="/a")
+    assert 'demo_total{path="/a"} 3' in c.render()
+
+
+def test_metrics_endpoint(monkeypatch):
+    from src.api import deps
+
+    class DummyPipe:
+        def predict_proba(self, X):
+            import numpy as np
+
+            return np.c_[[0.3] * len(X), [0.7] * len(X)]
+
+    monkeypatch.setattr(
+        deps, "get_model_and_meta", lambda: (DummyPipe(), {"columns": ["a"], "best_threshold_f1": 0.5})
+    )
+    c = TestClient(app)
+    assert c.post("/predict_proba", json={"filas": [{"a": 1}, {"a": 2}]}).status_code == 200
+
+    r = c.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'http_requests_total{method="POST",path="/predict_proba",status="200"}' in body
+    for stage in ("parse", "alignment", "model", "serialization"):
+        assert f'predict_stage_seconds_count{{stage="{stage}"}}' in body
+    assert 'predict_batch_rows_count{path="/predict_proba"}' in body
+    assert "http_requests_in_flight" in body
+    assert "inference_pool_pending" in body
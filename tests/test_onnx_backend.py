@@ -0,0 +1,78 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("skl2onnx")
+
+from sklearn.compose import ColumnTransformer  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+from sklearn.impute import SimpleImputer  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+from sklearn.preprocessing import OneHotEncoder, StandardScaler  # noqa: E402
+
+from src.models.onnx_backend import OnnxPipeline, ensure_onnx, to_onnx  # noqa: E402
+
+
+def _data(n=400):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(
+        {
+            "x1": rng.normal(size=n),
+            "x2": rng.exponential(size=n) * 1000,
+            "c1": rng.choice(["a", "b", "c"], n).astype(object),
+            "c2": rng.choice(["u", "v"], n).astype(object),
+        }
+    )
+    df.loc[rng.random(n) < 0.1, "x1"] = np.nan
+    df.loc[rng.random(n) < 0.1, "c2"] = np.nan
+    y = ((df.x1.fillna(0) > 0) ^ (df.c1 == "a")).astype(int)
+    return df, y
+
+
+def _pipeline(est):
+    num = Pipeline([("imp", SimpleImputer(strategy="median")), ("sc", StandardScaler())])
+    cat = Pipeline(
+        [
+            ("imp", SimpleImputer(strategy="most_frequent")),
+            ("ohe", OneHotEncoder(handle_unknown="ignore", sparse_output=False)),
+        ]
+    )
+    prep = ColumnTransformer([("num", num, ["x1", "x2"]), ("cat", cat, ["c1", "c2"])])
+    return Pipeline([("prep", prep), ("clf", est)])
+
+
+@pytest.mark.parametrize(
+    "est",
+    [LogisticRegression(max_iter=500), RandomForestClassifier(n_estimators=10, random_state=0)],
+    ids=lambda e: type(e).__name__,
+)
+def test_onnx_parity(est):
+    df, y = _data()
+    pipe = _pipeline(est).fit(df, y)
+    test = df.copy()
+    test.loc[::7, "c1"] = "zzz"  # categoría no vista
+    test.loc[::11, "c1"] = None  # None es un valor (no faltante) para sklearn
+
+    model = to_onnx(pipe)
+    np.testing.assert_allclose(
+        model.predict_proba(test)[:, 1], pipe.predict_proba(test)[:, 1], atol=1e-5
+    )
+
+
+def test_onnx_pickle_and_threads():
+    df, y = _data()
+    pipe = _pipeline(LogisticRegression(max_iter=500)).fit(df, y)
+    model = pickle.loads(pickle.dumps(to_onnx(pipe)))
+    assert isinstance(model, OnnxPipeline) and model._session is None
+
+    same = ensure_onnx(model, intra_op_threads=2, inter_op_threads=1)
+    assert same is model
+    assert model.describe()["intra_op_threads"] == 2
+    np.testing.assert_allclose(
+        model.predict_proba(df)[:, 1], pipe.predict_proba(df)[:, 1], atol=1e-5
+    )
+    assert model.session is model.session
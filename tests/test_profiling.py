@@ -0,0 +1,102 @@
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.profiling import Profiler, ProfilingMiddleware, annotate
+
+
+def _wait_profiles(profiler, n=1, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        profiles = profiler.store.list()
+        if len(profiles) >= n:
+            return profiles
+        time.sleep(0.02)
+    return profiler.store.list()
+
+
+def test_slow_request_saves_profile(tmp_path):
+    profiler = Profiler(tmp_path, slow_ms=20, interval_ms=1)
+    demo = FastAPI()
+    demo.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @demo.get("/lento")
+    def lento():
+        annotate(rows=3, cols=2)
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < 0.1:
+            sum(range(1000))
+        return {"ok": True}
+
+    @demo.get("/rapido")
+    def rapido():
+        return {"ok": True}
+
+    profiler.start()
+    try:
+        c = TestClient(demo)
+        assert c.get("/rapido").status_code == 200
+        assert c.get("/lento").status_code == 200
+        profiles = _wait_profiles(profiler)
+    finally:
+        profiler.stop()
+
+    assert [p["path"] for p in profiles] == ["lento"]
+    assert profiles[0]["duration_ms"] >= 100
+
+    record = json.loads(profiler.store.path(profiles[0]["name"]).read_text(encoding="utf-8"))
+    assert record["reason"] == "slow"
+    assert record["request"]["path"] == "/lento"
+    assert record["request"]["status"] == 200
+    assert record["samples"] > 0
+    assert any("lento" in stack for stack in record["stacks"])
+
+
+def test_disabled_profiler_does_not_sample(tmp_path):
+    profiler = Profiler(tmp_path)
+    profiler.start()
+    assert not profiler.enabled and not profiler.sampler.running
+
+
+def test_admin_profiles_endpoints(tmp_path, monkeypatch):
+    from src.api import deps
+
+    profiler = Profiler(tmp_path, sample_rate=1.0)
+    path = profiler.store.save(
+        {
+            "started_at": 1700000000.0,
+            "duration_ms": 42.0,
+            "request": {"path": "/predict_proba", "rows": 10},
+            "stacks": {"main;predict_proba": 3},
+        }
+    )
+    monkeypatch.setattr(deps, "profiler", profiler)
+    monkeypatch.setattr(deps, "ADMIN_TOKEN", "secreto")
+    c = TestClient(app, headers={"X-Admin-Token": "secreto"})
+
+    r = c.get("/admin/profiles")
+    assert r.status_code == 200
+    [item] = r.json()["profiles"]
+    assert item["name"] == path.name and item["duration_ms"] == 42
+
+    r = c.get(f"/admin/profiles/{path.name}")
+    assert r.status_code == 200
+    assert r.json()["request"]["rows"] == 10
+
+    r = c.get(f"/admin/profiles/{path.name}", params={"format": "folded"})
+    assert r.text == "main;predict_proba 3\n"
+
+    assert c.get("/admin/profiles/..%2Fdeps.py").status_code == 404
+    assert c.get("/admin/profiles/no_existe.json").status_code == 404
+
+
+def test_admin_profiles_closed_without_token(monkeypatch):
+    from src.api import deps
+
+    monkeypatch.setattr(deps, "ADMIN_TOKEN", None)
+    c = TestClient(app)
+    assert c.get("/admin/profiles").status_code == 404
+    assert c.get("/admin/profiles/x.json", params={"format": "folded"}).status_code == 404
@@ -0,0 +1,249 @@
+import json
+import threading
+
+import joblib
+import pytest
+
+from src.api.registry import ModelNotFoundError, ModelNotReadyError, ModelRegistry
+
+
+def _write_artifacts(tmp_path, meta=None):
+    pkl = tmp_path / "pipeline.pkl"
+    meta_path = tmp_path / "pipeline_meta.json"
+    joblib.dump({"dummy": [1, 2, 3]}, pkl)
+    meta_path.write_text(json.dumps(meta or {"columns": ["a"], "best_threshold_f1": 0.5}))
+    return pkl, meta_path
+
+
+def test_registry_loads_once(tmp_path):
+    reg = ModelRegistry(*_write_artifacts(tmp_path))
+    assert not reg.loaded
+
+    p1, m1 = reg.get()
+    p2, m2 = reg.get()
+    assert p1 is p2 and m1 is m2
+
+    stats = reg.stats()
+    assert stats["loaded"] is True
+    assert stats["load_seconds"] >= 0
+    assert stats["file_bytes"] > 0
+
+
+def test_registry_missing_model(tmp_path):
+    reg = ModelRegistry(tmp_path / "nope.pkl", tmp_path / "nope.json")
+    with pytest.raises(ModelNotFoundError):
+        reg.get()
+    assert reg.stats()["loaded"] is False
+
+
+def test_registry_mmap_mode(tmp_path):
+    import numpy as np
+
+    pkl = tmp_path / "pipeline.pkl"
+    meta_path = tmp_path / "pipeline_meta.json"
+    joblib.dump({"coef": np.arange(10_000, dtype=np.float64)}, pkl)
+    meta_path.write_text(json.dumps({"columns": ["a"]}))
+
+    reg = ModelRegistry(pkl, meta_path, mmap_mode="r")
+    pipeline, _ = reg.get()
+    assert isinstance(pipeline["coef"], np.memmap)
+    assert not pipeline["coef"].flags.writeable
+    assert reg.stats()["mmap_mode"] == "r"
+
+
+def test_registry_reload_and_rollback(tmp_path):
+    pkl, meta_path = _write_artifacts(tmp_path)
+    reg = ModelRegistry(pkl, meta_path)
+    reg._warm = lambda bundle: None  # el dummy no es un pipeline sklearn
+    v1 = reg.load().version
+
+    assert reg.reload() == {"swapped": False, "version": v1}
+
+    old_pipeline, _ = reg.get()  # request "en curso" con la versión anterior
+    joblib.dump({"dummy": [4, 5, 6]}, pkl)
+    out = reg.reload()
+    assert out["swapped"] is True and out["previous"] == v1
+    assert reg.get()[0] == {"dummy": [4, 5, 6]}
+    assert old_pipeline == {"dummy": [1, 2, 3]}
+
+    reg.rollback()
+    assert reg.current_version() == v1
+    assert reg.get()[0] == {"dummy": [1, 2, 3]}
+
+
+def test_active_version_followed_by_other_workers(tmp_path):
+    pkl, meta_path = _write_artifacts(tmp_path)
+    active = tmp_path / "active_version.json"
+    workers = [ModelRegistry(pkl, meta_path, active_path=active) for _ in range(3)]
+    for reg in workers:
+        reg._warm = lambda bundle: None
+        reg.load()
+    v1 = workers[0].current_version()
+    assert workers[0].follow_active() is None  # sin publicar
+
+    # /admin/model/reload atendido por el worker 0.
+    joblib.dump({"dummy": [4, 5, 6]}, pkl)
+    v2 = workers[0].reload()["version"]
+    assert workers[0].publish()
+    assert workers[0].follow_active() is None
+    for reg in workers[1:]:
+        assert reg.follow_active()["version"] == v2
+    assert {reg.current_version() for reg in workers} == {v2}
+
+    # /admin/model/rollback atendido por el worker 2: los demás vuelven a v1 aunque el disco
+    # siga con v2.
+    workers[2].rollback()
+    workers[2].publish()
+    for reg in workers[:2]:
+        reg.follow_active()
+    assert {reg.current_version() for reg in workers} == {v1}
+    assert workers[0].follow_active() is None  # ya aplicada
+
+
+def test_registry_rollback_without_previous(tmp_path):
+    from src.api.registry import RollbackUnavailableError
+
+    reg = ModelRegistry(*_write_artifacts(tmp_path))
+    reg.load()
+    with pytest.raises(RollbackUnavailableError):
+        reg.rollback()
+
+
+def test_registry_adapter(tmp_path):
+    reg = ModelRegistry(
+        *_write_artifacts(tmp_path), adapter=lambda p: {"adapted": p}, backend="compiled"
+    )
+    pipeline, _ = reg.get()
+    assert pipeline == {"adapted": {"dummy": [1, 2, 3]}}
+    assert reg.stats()["backend"] == "compiled"
+
+
+def test_registry_swap_listener(tmp_path):
+    pkl, meta_path = _write_artifacts(tmp_path)
+    reg = ModelRegistry(pkl, meta_path)
+    seen = []
+    reg.add_swap_listener(seen.append)
+    reg.load()
+    assert reg.get()[1]["model_version"] == reg.current_version()
+
+    meta_path.write_text(json.dumps({"columns": ["a"], "best_threshold_f1": 0.4}))
+    reg._warm = lambda bundle: None
+    reg.reload()
+    reg.rollback()
+    assert len(seen) == 2 and seen[-1] == reg.current_version()
+
+
+def test_registry_background_load_state(tmp_path):
+    release = threading.Event()
+
+    def slow_adapter(obj):
+        release.wait(5)
+        return obj
+
+    reg = ModelRegistry(*_write_artifacts(tmp_path), adapter=slow_adapter, warmup_sizes=())
+    assert reg.state == "idle"
+    loader = reg.load_async()
+    assert reg.state == "loading"
+    with pytest.raises(ModelNotReadyError):
+        reg.get()
+    release.set()
+    loader.join(5)
+    assert reg.state == "ready"
+    assert reg.get()[0] == {"dummy": [1, 2, 3]}
+
+    failed = ModelRegistry(tmp_path / "nope.pkl", tmp_path / "nope.json")
+    failed.load_async().join(5)
+    assert failed.state == "failed"
+    assert "nope.pkl" in failed.stats()["error"]
+
+
+
+class _NanSafe:
+    """LogisticRegression no admite NaN y el calentamiento manda ~10% de faltantes."""
+
+    def __init__(self, est):
+        self.est = est
+
+    def predict_proba(self, X):
+        return self.est.predict_proba(X.fillna(0.0))
+
+
+def test_registry_warmup_gates_readiness(tmp_path):
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+
+    pkl, meta_path = _write_artifacts(tmp_path, {"columns": ["a", "b"]})
+    X = pd.DataFrame({"a": [0.0, 1.0, 2.0, 3.0], "b": [1.0, 0.0, 1.0, 0.0]})
+    joblib.dump(LogisticRegression().fit(X, [0, 0, 1, 1]), pkl)
+
+    reg = ModelRegistry(pkl, meta_path, adapter=_NanSafe, warmup_sizes=(1, 8, 32))
+    reg.load_async().join(10)
+    assert reg.state == "ready"
+    warmup = reg.get()[1]["warmup"]
+    assert [b["rows"] for b in warmup["batches"]] == [1, 8, 32]
+    assert warmup["total_ms"] >= 0
+
+
+def test_warmup_failure_marks_failed(tmp_path):
+    reg = ModelRegistry(*_write_artifacts(tmp_path), warmup_sizes=(4,))
+    reg.load_async().join(5)  # el dummy no es un pipeline: el calentamiento falla
+    assert reg.state == "failed"
+    assert not reg.loaded
+
+
+def test_preloaded_model_warms_in_worker(tmp_path):
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+
+    pkl, meta_path = _write_artifacts(tmp_path, {"columns": ["a"]})
+    joblib.dump(LogisticRegression().fit(pd.DataFrame({"a": [0.0, 1.0]}), [0, 1]), pkl)
+    reg = ModelRegistry(pkl, meta_path, adapter=_NanSafe, warmup_sizes=(4,))
+
+    # Master de gunicorn: carga sin calentar.
+    reg.load()
+    assert reg.state == "ready" and "warmup" not in reg.get()[1]
+
+    # Worker tras el fork: mismo bundle, calentado antes de pasar a "ready".
+    bundle = reg._bundle
+    release = threading.Event()
+    warm = reg._warm
+    reg._warm = lambda b: (release.wait(5), warm(b))
+    loader = reg.load_async()
+    assert reg.state == "warming"
+    assert reg.get()[0] is bundle.pipeline  # sigue sirviendo mientras calienta
+    release.set()
+    loader.join(5)
+    assert reg.state == "ready" and reg._bundle is bundle
+    assert [b["rows"] for b in reg.get()[1]["warmup"]["batches"]] == [4]
+
+
+def test_preloaded_worker_does_not_watch_files(tmp_path):
+    import time
+
+    pkl, meta_path = _write_artifacts(tmp_path)
+    active = tmp_path / "active_version.json"
+    master, worker = (ModelRegistry(pkl, meta_path, active_path=active) for _ in range(2))
+    for reg in (master, worker):
+        reg._warm = lambda bundle: None
+        reg.load()
+    assert not worker.preloaded
+    worker._bundle.pid = -1  # cargado en el master antes del fork
+    assert worker.preloaded
+    v1 = worker.current_version()
+
+    worker.start_watcher(0.02, watch_files=not worker.preloaded)
+    try:
+        assert worker.stats()["watching_files"] is False
+        joblib.dump({"dummy": [4, 5, 6]}, pkl)
+        time.sleep(0.2)
+        assert worker.current_version() == v1  # models/ cambió, pero no recarga solo
+
+        # Un reload por /admin en otro worker sí se sigue.
+        v2 = master.reload()["version"]
+        master.publish()
+        deadline = time.monotonic() + 5
+        while worker.current_version() != v2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert worker.current_version() == v2 and not worker.preloaded
+    finally:
+        worker.stop_watcher()
@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1] / "backend-predictor"
+sys.path.insert(0, str(BACKEND))
+
+from rules import MAX_RULES, Rule, RuleSet, _parse_rule  # noqa: E402
+
+RULES = RuleSet.from_yaml(BACKEND / "rules.yaml")
+
+
+def add_flags(df: pd.DataFrame) -> pd.DataFrame:
+    """add_flags original de backend-predictor/api.py (antes de rules.yaml)."""
+    if "adicionales_pct" in df.columns:
+        df["flag_adicionales_altos"] = (df["adicionales_pct"] > 0.15).astype(int)
+    if "ampliaciones" in df.columns:
+        df["flag_muchas_ampliaciones"] = (df["ampliaciones"] >= 2).astype(int)
+    if "penalidades" in df.columns:
+        df["flag_penalidades"] = (df["penalidades"] >= 1).astype(int)
+    if "tipo_proceso" in df.columns:
+        directa = df["tipo_proceso"] == "Contratación Directa"
+        df["flag_contratacion_directa"] = directa.astype(int)
+    if "region_riesgo" in df.columns:
+        df["flag_region_alta"] = (df["region_riesgo"] == "ALTA").astype(int)
+    return df
+
+
+def _obras():
+    return pd.DataFrame(
+        {
+            "adicionales_pct": [0.10, 0.15, 0.151, np.nan, 0.9],
+            "ampliaciones": [0, 1, 2, 3, np.nan],
+            "penalidades": [0, 1, 0, np.nan, 5],
+            "tipo_proceso": [
+                "Contratación Directa", "Licitación Pública", None, "x", "Contratación Directa"
+            ],
+            "region_riesgo": ["ALTA", "BAJA", "ALTA", None, "MEDIA"],
+        }
+    )
+
+
+def test_yaml_compila_reglas():
+    assert [r.name for r in RULES.rules] == [
+        "flag_adicionales_altos",
+        "flag_muchas_ampliaciones",
+        "flag_penalidades",
+        "flag_contratacion_directa",
+        "flag_region_alta",
+    ]
+    assert RULES.rules[0] == Rule(
+        "flag_adicionales_altos", "adicionales_pct", ">", 0.15, "Adicionales > 15%"
+    )
+    assert _parse_rule({"name": "r", "column": "c", "op": "in", "value": [1, 2]}) == Rule(
+        "r", "c", "in", (1, 2), "r"
+    )
+    with pytest.raises(ValueError, match="operador"):
+        _parse_rule({"name": "r", "column": "c", "op": "~", "value": 1})
+    with pytest.raises(ValueError, match="lista"):
+        _parse_rule({"name": "r", "column": "c", "op": "in", "value": 1})
+    with pytest.raises(ValueError, match="faltan"):
+        _parse_rule({"name": "r", "op": ">"})
+    with pytest.raises(ValueError, match="repetidos"):
+        RuleSet([RULES.rules[0], RULES.rules[0]])
+    with pytest.raises(ValueError, match="Máximo"):
+        RuleSet([Rule(f"r{i}", "c", ">", 0, "x") for i in range(MAX_RULES + 1)])
+
+
+def test_paridad_con_add_flags():
+    df = _obras()
+    esperado = add_flags(df.copy())
+    bits = RULES.apply(df)
+    pd.testing.assert_frame_equal(df, esperado)
+    flags = esperado[[r.name for r in RULES.rules]].to_numpy()
+    assert bits.tolist() == (flags << np.arange(len(RULES.rules))).sum(axis=1).tolist()
+
+
+def test_bitmask_y_etiquetas_con_nan():
+    df = _obras()
+    bits = RULES.apply(df)
+    # Fila 3: todo NaN/None salvo ampliaciones=3 y un tipo de proceso sin bandera.
+    assert bits.tolist() == [0b11000, 0b00100, 0b10011, 0b00010, 0b01101]
+    labels = RULES.labels_for(bits)
+    assert labels[0] == ["Contratación Directa", "Región de riesgo ALTA"]
+    assert labels[3] == [">= 2 Ampliaciones"]
+    assert RULES.joined_labels(bits)[2] == (
+        "Adicionales > 15%; >= 2 Ampliaciones; Región de riesgo ALTA"
+    )
+
+    parcial = pd.DataFrame({"penalidades": [2, 0]})  # solo las reglas con columna presente
+    assert RULES.apply(parcial).tolist() == [0b100, 0]
+    assert list(parcial.columns) == ["penalidades", "flag_penalidades"]
+
+    otra = RuleSet([_parse_rule({"name": "r", "column": "c", "op": "not_in", "value": ["a"]})])
+    assert otra.apply(pd.DataFrame({"c": ["a", "b", None]})).tolist() == [0, 1, 0]
+
+
+def test_lote_vacio():
+    df = _obras().iloc[:0]
+    bits = RULES.apply(df)
+    assert bits.dtype == np.int64 and len(bits) == 0
+    assert RULES.labels_for(bits) == []
+    assert len(RULES.joined_labels(bits)) == 0
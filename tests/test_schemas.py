@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from src.api.main import app
+from src.api.schemas import column_dtypes, typed_adapters
+
+
+def _pipeline():
+    X = pd.DataFrame({"monto": [1.0, 2.0, np.nan, 4.0], "sector": ["a", "b", "a", None]})
+    prep = ColumnTransformer(
+        [
+            ("num", Pipeline([("imp", SimpleImputer()), ("sc", StandardScaler())]), ["monto"]),
+            (
+                "cat",
+                Pipeline(
+                    [
+                        ("imp", SimpleImputer(strategy="most_frequent")),
+                        ("ohe", OneHotEncoder(handle_unknown="ignore")),
+                    ]
+                ),
+                ["sector"],
+            ),
+        ]
+    )
+    return Pipeline([("prep", prep), ("clf", LogisticRegression())]).fit(X, [0, 1, 0, 1])
+
+
+def test_column_dtypes_from_pipeline():
+    assert column_dtypes(_pipeline()) == {"monto": "number", "sector": "string"}
+    assert column_dtypes(object()) is None
+
+
+def test_typed_adapters_validate_in_bulk():
+    batch, columnar = typed_adapters(("monto", "sector"), ("number", "string"))
+    req = batch.validate_json(b'{"filas": [{"monto": "1.5", "sector": 2023, "x": 1}, {"sector": null}]}')
+    # Numéricas -> float; categóricas conservan el tipo; extras descartadas.
+    assert req.filas == [{"monto": 1.5, "sector": 2023}, {"sector": None}]
+
+    req = columnar.validate_json(b'{"columns": {"monto": [1, null], "sector": ["a", true]}}')
+    assert req.columns == {"monto": [1.0, None], "sector": ["a", True]}
+
+
+def test_typed_request_errors_and_array_response(monkeypatch):
+    from src.api import deps
+
+    pipe = _pipeline()
+    meta = {"columns": ["monto", "sector"], "dtypes": column_dtypes(pipe), "best_threshold_f1": 0.5}
+    monkeypatch.setattr(deps, "get_model_and_meta", lambda: (pipe, meta))
+    c = TestClient(app)
+
+    r = c.post("/predict_proba", json={"filas": [{"monto": "abc", "sector": "a"}]})
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["loc"][-2:] == [0, "monto"]
+    r = c.post("/predict_proba", json={"filas": [{"monto": 1}, {"otra": 1}]})
+    assert r.status_code == 422
+    r = c.post("/predict_proba/columnar", json={"columns": {"sector": [{"a": 1}]}})
+    assert r.status_code == 422
+
+    filas = [{"monto": 1, "sector": "a"}, {"monto": 4.0, "sector": "zz"}]
+    r = c.post("/predict_proba", params={"formato": "arreglos"}, json={"filas": filas})
+    assert r.status_code == 200
+    body = r.json()
+    expected = pipe.predict_proba(pd.DataFrame(filas))[:, 1]
+    assert np.allclose(body["proba"], expected)
+    assert body["riesgoso"] == (expected >= 0.5).tolist()
+    assert "resultados" in c.post("/predict_proba", json={"filas": filas}).json()
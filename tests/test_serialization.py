@@ -0,0 +1,88 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.serialization import CompressionMiddleware, FastJSONResponse, dumps, negotiate
+
+
+def test_dumps_numpy_and_frames():
+    body = dumps(
+        {
+            "proba": np.array([0.25, 0.5]),
+            "riesgoso": np.array([False, True]),
+            "n": np.int64(2),
+            "filas": pd.DataFrame({"p": [0.1, np.nan], "s": ["ñ", None]}),
+        }
+    )
+    assert json.loads(body) == {
+        "proba": [0.25, 0.5],
+        "riesgoso": [False, True],
+        "n": 2,
+        "filas": [{"p": 0.1, "s": "ñ"}, {"p": None, "s": None}],
+    }
+    assert json.loads(FastJSONResponse({"a": np.arange(3)}).body) == {"a": [0, 1, 2]}
+
+
+def test_negotiate():
+    assert negotiate("gzip, deflate, br", ["br", "gzip"]) == "br"
+    assert negotiate("br;q=0.5, gzip", ["br", "gzip"]) == "gzip"
+    assert negotiate("br;q=0, identity", ["br", "gzip"]) is None
+    assert negotiate("*", ["gzip"]) == "gzip"
+
+
+def test_compression_middleware():
+    demo = FastAPI()
+    demo.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @demo.get("/grande")
+    def grande():
+        return FastJSONResponse({"proba": np.linspace(0, 1, 1000)})
+
+    @demo.get("/chico")
+    def chico():
+        return {"ok": True}
+
+    @demo.get("/stream")
+    def stream():
+        return StreamingResponse((b"x" * 500 for _ in range(4)), media_type="text/csv")
+
+    c = TestClient(demo)
+    r = c.get("/grande", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert int(r.headers["content-length"]) < len(json.dumps(r.json()))
+    assert len(r.json()["proba"]) == 1000
+    assert "content-encoding" not in c.get("/chico", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in c.get("/grande", headers={"Accept-Encoding": "identity"}).headers
+
+    r = c.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == "x" * 2000
+
+    with c.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as raw:
+        assert gzip.decompress(b"".join(raw.iter_raw())) == b"x" * 2000
+
+
+def test_proba_rounding(monkeypatch):
+    from src.api import deps
+
+    class DummyPipe:
+        def predict_proba(self, X):
+            p = np.full(len(X), 0.123456789)
+            return np.c_[1 - p, p]
+
+    monkeypatch.setattr(
+        deps, "get_model_and_meta", lambda: (DummyPipe(), {"columns": ["a"], "best_threshold_f1": 0.12345})
+    )
+    monkeypatch.setattr(deps, "PROBA_DECIMALS", 3)
+    c = TestClient(app)
+    r = c.post("/predict_proba", json={"filas": [{"a": 1}]})
+    # La etiqueta usa la probabilidad sin redondear (0.12346 >= umbral, 0.123 no).
+    assert r.json()["resultados"] == [{"proba": 0.123, "threshold": 0.12345, "riesgoso": True}]
+    r = c.post("/predict_proba/columnar", json={"columns": {"a": [1, 2]}})
+    assert r.json()["proba"] == [0.123, 0.123]
@@ -0,0 +1,43 @@
+import json
+
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.api import serving
+from src.api.registry import ModelRegistry
+
+
+def test_serving_profile_from_cpus(monkeypatch):
+    monkeypatch.setattr(serving, "available_cpus", lambda: 8)
+    profile = serving.serving_profile({})
+    assert (profile.workers, profile.threads, profile.native_threads) == (8, 1, 1)
+    assert profile.keepalive == 75 and profile.backlog == 2048
+
+    profile = serving.serving_profile({"WEB_CONCURRENCY": "2", "KEEPALIVE": "5"})
+    assert (profile.workers, profile.threads, profile.keepalive) == (2, 4, 5)
+
+
+def test_apply_thread_limits_keeps_explicit_values(monkeypatch):
+    monkeypatch.setattr(serving, "available_cpus", lambda: 4)
+    env = {"WEB_CONCURRENCY": "2", "OMP_NUM_THREADS": "3"}
+    serving.apply_thread_limits(serving.serving_profile(env), env)
+    assert env["OMP_NUM_THREADS"] == "3"
+    assert env["MKL_NUM_THREADS"] == env["MODEL_N_JOBS"] == "1"
+    assert env["INFERENCE_WORKERS"] == env["JOBS_WORKERS"] == "2"
+
+
+def test_registry_limits_n_jobs(tmp_path):
+    pipe = Pipeline([("sc", StandardScaler()), ("rf", RandomForestClassifier(n_jobs=-1))])
+    joblib.dump(pipe, tmp_path / "pipeline.pkl")
+    (tmp_path / "pipeline_meta.json").write_text(json.dumps({"best_threshold_f1": 0.5}))
+    reg = ModelRegistry(
+        tmp_path / "pipeline.pkl", tmp_path / "pipeline_meta.json", warmup_sizes=(), n_jobs=1
+    )
+    reg.load()
+    assert reg.get()[0].named_steps["rf"].n_jobs == 1
+
+    # Ya cargado (preload en el master de gunicorn): load_async no lo vuelve a "loading".
+    reg.load_async().join(5)
+    assert reg.state == "ready"
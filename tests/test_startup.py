@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Presupuesto de import de src.api.main (crea el objeto ASGI), en microsegundos.
+IMPORT_BUDGET_US = 1_000_000
+# Se importan al cargar el modelo o al primer uso, no al arrancar el proceso.
+LAZY_MODULES = ("pandas", "pyarrow", "joblib", "sklearn", "xgboost", "lightgbm")
+
+
+def _importtime():
+    code = "import sys, src.api.main; print(','.join(sorted(sys.modules)))"
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = (p.strip() for p in line[len("import time:"):].split("|"))
+        if cum.isdigit():
+            cumulative[name] = int(cum)
+    return cumulative, set(out.stdout.strip().split(","))
+
+
+def test_app_import_budget_and_lazy_modules():
+    cumulative, modules = _importtime()
+    assert cumulative["src.api.main"] < IMPORT_BUDGET_US, cumulative["src.api.main"]
+    assert not [m for m in LAZY_MODULES if m in modules]